@@ -0,0 +1,138 @@
+"""
+Storage codecs for audit_events.payload_json.
+
+Event hashes are always computed over the canonical JSON text (sort_keys,
+compact separators). A codec only changes how those exact bytes are stored:
+decode(encode(text)) == text byte for byte, so verification and export
+never re-serialize a payload.
+
+    json      canonical text as-is; stored with payload_codec NULL (the original format)
+    zlib      zlib level 9, no dictionary (what compaction wrote before codecs existed)
+    zlib-d1   zlib with the DICT_V1 preset dictionary
+    zstd-d1   zstd with DICT_V1 as a raw-content dictionary; needs the `zstandard` package
+
+Most payloads are a few hundred bytes of repeated keys, which a plain
+compressor cannot exploit. The preset dictionary supplies those keys, and
+that is where most of the size reduction comes from. A dictionary is part
+of the on-disk format: never edit DICT_V1; add DICT_V2 under a new codec name.
+"""
+
+from __future__ import annotations
+
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for the zstd codecs
+    zstandard = None
+
+# Skeletons of the payloads the orchestrator and risk-mcp write, most frequent last
+# (deflate reaches the end of the dictionary with the shortest distances).
+DICT_V1 = "".join((
+    '{"error":"","error_type":"TimeoutError"}',
+    '{"decision":"reject","max_allowed":,"policy_id":"RISK-POS-","reason":"policy_violation","requested":,"version":"v1"}',
+    '{"audit_id":"pending","compliance":{"evidence_refs":[],"policy_refs":["RISK-"],"status":"pass"},'
+    '"confidence":0.,"modified_trade":null,"next_steps":["create_execution_ticket"],"rationale":"",'
+    '"recommendation":"proceed","risk_flags":[]}',
+    '{"decision":"proceed","risk_result":{"policy_id":"RISK-POS-","policy_version":"v1",'
+    '"reason":"position limit exceeded","result":"reject"},"source":"orchestrator"}',
+    '{"actor":{"desk":"equities","role":"trader","user_id":"trader-"},"as_of":"T:00:00.000000+00:00",'
+    '"intent":"","request_id":"","source":"orchestrator",'
+    '"trade":{"limit_price":null,"order_type":"market","quantity":,"side":"buy","symbol":""}}',
+    '{"advisory":{"confidence":0.,"model":"claude","model_version":"claude-","rationale":"",'
+    '"recommendation":"proceed","risk_flags":["position_limit_check"],"suggested_next_steps":["review_position_size"]},'
+    '"advisory_meta":{"deadline_exceeded":false,"hedged":false,"latency_ms":,"model":"claude-","model_latency_ms":,'
+    '"source":"model"},"advisory_used":false,'
+    '"evals":{"checks":{"confidence":{"details":{},"status":"pass"},"hallucination":{"details":{},"status":"pass"},'
+    '"length_limits":{"details":{},"status":"pass"},"no_override":{"details":{},"status":"pass"},'
+    '"recommendation":{"details":{},"status":"pass"},"schema":{"details":{},"status":"pass"}},"passed":true},'
+    '"risk_result":{"result":"pass"}}',
+)).encode("utf-8")
+
+Stored = Union[str, bytes]
+
+
+@dataclass(frozen=True, slots=True)
+class Codec:
+    name: str
+    encode: Callable[[str], Stored]
+    decode: Callable[[Stored], str]
+
+    @property
+    def column_value(self) -> Optional[str]:
+        """What goes in payload_codec; canonical text keeps the original NULL."""
+        return None if self.name == "json" else self.name
+
+
+def _zlib_encode(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 9)
+
+
+def _zlib_decode(data: Stored) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def _zlib_dict_codec(name: str, zdict: bytes) -> Codec:
+    def encode(text: str) -> bytes:
+        c = zlib.compressobj(9, zdict=zdict)
+        return c.compress(text.encode("utf-8")) + c.flush()
+
+    def decode(data: Stored) -> str:
+        d = zlib.decompressobj(zdict=zdict)
+        return (d.decompress(data) + d.flush()).decode("utf-8")
+
+    return Codec(name, encode, decode)
+
+
+def _zstd_dict_codec(name: str, raw_dict: bytes, level: int = 9) -> Codec:
+    # Compressor objects are not thread-safe, and SQL functions run on every pooled connection.
+    local = threading.local()
+    prepared = []
+
+    def objects():
+        if not hasattr(local, "cctx"):
+            if not prepared:
+                d = zstandard.ZstdCompressionDict(raw_dict, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+                d.precompute_compress(level=level)
+                prepared.append(d)
+            local.cctx = zstandard.ZstdCompressor(level=level, dict_data=prepared[0], write_content_size=True)
+            local.dctx = zstandard.ZstdDecompressor(dict_data=prepared[0])
+        return local
+
+    def encode(text: str) -> bytes:
+        return objects().cctx.compress(text.encode("utf-8"))
+
+    def decode(data: Stored) -> str:
+        return objects().dctx.decompress(data).decode("utf-8")
+
+    return Codec(name, encode, decode)
+
+
+CODECS: dict[str, Codec] = {
+    "json": Codec("json", lambda text: text, lambda data: data),
+    "zlib": Codec("zlib", _zlib_encode, _zlib_decode),
+    "zlib-d1": _zlib_dict_codec("zlib-d1", DICT_V1),
+}
+if zstandard is not None:
+    CODECS["zstd-d1"] = _zstd_dict_codec("zstd-d1", DICT_V1)
+
+_ZSTD_CODECS = ("zstd-d1",)
+
+
+def get_codec(name: str) -> Codec:
+    codec = CODECS.get(name)
+    if codec is None:
+        if name in _ZSTD_CODECS:
+            raise ValueError(f"payload codec {name} requires the zstandard package")
+        raise ValueError(f"unknown payload codec: {name}")
+    return codec
+
+
+def decode_payload(payload: Stored, codec: Optional[str]) -> str:
+    """SQL function audit_payload(payload_json, payload_codec) -> canonical JSON text."""
+    if codec is None:
+        return payload
+    return get_codec(codec).decode(payload)
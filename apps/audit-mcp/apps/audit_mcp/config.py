@@ -1,7 +1,44 @@
+from typing import Literal
 from pydantic import BaseModel
 from shared.config_utils import get_env
 
 
+class StorageSettings(BaseModel):
+    """SQLite tuning profile applied to every connection the store opens."""
+
+    journal_mode: Literal["wal", "delete"] = get_env(
+        "AUDIT_SQLITE_JOURNAL_MODE",
+        "wal"
+    ).lower()
+
+    # NORMAL is durable across process crashes in WAL mode; FULL also survives power loss.
+    synchronous: Literal["NORMAL", "FULL"] = get_env(
+        "AUDIT_SQLITE_SYNCHRONOUS",
+        "FULL"
+    ).upper()
+
+    mmap_size: int = int(get_env(
+        "AUDIT_SQLITE_MMAP_SIZE",
+        str(256 * 1024 * 1024)
+    ))
+
+    # Negative values are KiB, as in PRAGMA cache_size.
+    cache_size: int = int(get_env(
+        "AUDIT_SQLITE_CACHE_SIZE",
+        "-65536"
+    ))
+
+    busy_timeout_ms: int = int(get_env(
+        "AUDIT_SQLITE_BUSY_TIMEOUT_MS",
+        "5000"
+    ))
+
+    reader_pool_size: int = int(get_env(
+        "AUDIT_SQLITE_READERS",
+        "4"
+    ))
+
+
 class Settings(BaseModel):
     app_env: str = get_env(
         "APP_ENV", 
@@ -23,5 +60,93 @@ class Settings(BaseModel):
         "true"
     ).lower() == "true"
 
+    batch_max_size: int = int(get_env(
+        "AUDIT_BATCH_MAX_SIZE",
+        "500"
+    ))
+
+    batch_max_delay_ms: float = float(get_env(
+        "AUDIT_BATCH_MAX_DELAY_MS",
+        "2"
+    ))
+
+    chain_cache_size: int = int(get_env(
+        "AUDIT_CHAIN_CACHE_SIZE",
+        "100000"
+    ))
+
+    storage: StorageSettings = StorageSettings()
+
+    # none: single file at db_path. daily / size: rolling segments under segment_dir.
+    partition: Literal["none", "daily", "size"] = get_env(
+        "AUDIT_PARTITION",
+        "none"
+    ).lower()
+
+    segment_dir: str | None = get_env(
+        "AUDIT_SEGMENT_DIR",
+        ""
+    ) or None
+
+    segment_max_bytes: int = int(get_env(
+        "AUDIT_SEGMENT_MAX_BYTES",
+        str(1024 * 1024 * 1024)
+    ))
+
+    # Storage codec for new payloads (json, zlib, zlib-d1, zstd-d1); hashes always cover canonical JSON.
+    payload_codec: str = get_env(
+        "AUDIT_PAYLOAD_CODEC",
+        "json"
+    ).lower()
+
+    # Codec that compaction re-encodes canonical-text payloads with; json leaves them as they are.
+    compact_codec: str = get_env(
+        "AUDIT_COMPACT_CODEC",
+        "zlib-d1"
+    ).lower()
+
+    verify_state_path: str | None = get_env(
+        "AUDIT_VERIFY_STATE_PATH",
+        ""
+    ) or None
+
+    verify_workers: int | None = int(get_env(
+        "AUDIT_VERIFY_WORKERS",
+        "0"
+    )) or None
+
+    # Span export: empty (off), an NDJSON file path, or an OTLP/HTTP JSON URL.
+    trace_export: str = get_env(
+        "TRACE_EXPORT",
+        ""
+    )
+
+    trace_ring_size: int = int(get_env(
+        "TRACE_RING_SIZE",
+        "10000"
+    ))
+
+    trace_export_interval_seconds: float = float(get_env(
+        "TRACE_EXPORT_INTERVAL_SECONDS",
+        "1.0"
+    ))
+
+    # /debug/profile sampling profiler; off unless enabled. In prod it also needs ADMIN_TOKEN.
+    profiler_enabled: bool = get_env(
+        "PROFILER_ENABLED",
+        "false"
+    ).lower() == "true"
+
+    # Always-on low-rate sampling (0 = off), served at /debug/profile/continuous.
+    profiler_continuous_hz: float = float(get_env(
+        "PROFILER_CONTINUOUS_HZ",
+        "0"
+    ))
+
+    admin_token: str = get_env(
+        "ADMIN_TOKEN",
+        ""
+    )
+
 settings = Settings()
 
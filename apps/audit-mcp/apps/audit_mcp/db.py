@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from .codec import decode_payload
+from .config import StorageSettings
+
+# How often a thread waiting for a reader re-checks whether the pool was closed.
+ACQUIRE_POLL_SECONDS = 0.1
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    conn.create_function("audit_payload", 2, decode_payload, deterministic=True)
+
+
+def open_connection(
+    db_path: str,
+    storage: StorageSettings,
+    *,
+    readonly: bool = False,
+    immutable: bool = False,
+) -> sqlite3.Connection:
+    if immutable:
+        # Compacted segments never change again; skip locking entirely.
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    register_functions(conn)
+
+    conn.execute(f"PRAGMA mmap_size = {int(storage.mmap_size)}")
+    conn.execute(f"PRAGMA cache_size = {int(storage.cache_size)}")
+    if immutable:
+        return conn
+
+    conn.execute(f"PRAGMA busy_timeout = {int(storage.busy_timeout_ms)}")
+    if readonly:
+        conn.execute("PRAGMA query_only = 1")
+    else:
+        conn.execute(f"PRAGMA journal_mode = {storage.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {storage.synchronous}")
+    return conn
+
+
+class PoolClosedError(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    """
+    One writer connection plus up to `reader_pool_size` reader connections.
+
+    In WAL mode readers see the last committed snapshot and never wait on the
+    writer, so reads keep flowing during a long group commit. The writer must
+    be serialized by the caller (AuditStore holds its write lock around it).
+    Readers are opened on first use, so pools for rarely read segments stay cheap.
+    """
+
+    def __init__(self, db_path: str, storage: StorageSettings, *, writable: bool = True, immutable: bool = False):
+        self.db_path = db_path
+        self.storage = storage
+        self.immutable = immutable
+
+        # The writer goes first so journal_mode is set before any reader attaches.
+        self.writer = open_connection(db_path, storage) if writable else None
+
+        self._readers: queue.Queue[sqlite3.Connection] = queue.Queue()
+        self._max_readers = max(1, storage.reader_pool_size)
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self) -> sqlite3.Connection:
+        self._check_open()
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self._max_readers:
+                self._opened += 1
+                return open_connection(self.db_path, self.storage, readonly=True, immutable=self.immutable)
+        # All readers are checked out. After close() they are closed rather than
+        # returned, so keep re-checking instead of waiting on the queue forever.
+        while True:
+            try:
+                return self._readers.get(timeout=ACQUIRE_POLL_SECONDS)
+            except queue.Empty:
+                self._check_open()
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise PoolClosedError(f"connection pool for {self.db_path} is closed")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        # Never hand a connection back mid-transaction.
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+        else:
+            self._readers.put(conn)
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_writer(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def close(self) -> None:
+        """Close idle connections now; readers still in use are closed when returned."""
+        self._closed = True
+        self.close_writer()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
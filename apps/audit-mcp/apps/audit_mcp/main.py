@@ -1,12 +1,71 @@
-from fastapi import FastAPI, Query
-from shared.schemas.audit import AuditWriteRequest, AuditWriteResponse, AuditEvent, AuditEventType
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime
+from itertools import islice
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from shared import instrumentation, tracing
+from shared.profiler import Profiler, debug_router
+from shared.schemas.audit import (
+    AuditWriteRequest,
+    AuditWriteResponse,
+    AuditWriteBatchRequest,
+    AuditWriteBatchResponse,
+    AuditEvent,
+    AuditEventType,
+)
 from .config import settings
-from .storage import AuditStore
+from .storage import AuditStore, decode_cursor, encode_cursor
+from .verify import run_verification
+from .writer import AuditWriter, WriterStoppedError
 
 
-app = FastAPI(title="AITDP Audit MCP Server", version=settings.app_version)
+tracing.configure(
+    "audit-mcp",
+    settings.trace_export,
+    ring_size=settings.trace_ring_size,
+    export_interval_seconds=settings.trace_export_interval_seconds,
+)
+profiler = Profiler(continuous_hz=settings.profiler_continuous_hz if settings.profiler_enabled else 0)
+store = AuditStore(
+    db_path=settings.db_path,
+    hash_chain=settings.hash_chain,
+    chain_cache_size=settings.chain_cache_size,
+    storage=settings.storage,
+    partition=settings.partition,
+    segment_dir=settings.segment_dir,
+    segment_max_bytes=settings.segment_max_bytes,
+    payload_codec=settings.payload_codec,
+    compact_codec=settings.compact_codec,
+)
+writer = AuditWriter(
+    store,
+    max_batch_size=settings.batch_max_size,
+    max_delay_seconds=settings.batch_max_delay_ms / 1000,
+)
 
-store = AuditStore(db_path=settings.db_path, hash_chain=settings.hash_chain)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tracing.TRACER.start()
+    profiler.start()
+    await writer.start()
+    yield
+    await writer.stop()
+    store.close()
+    profiler.stop()
+    tracing.TRACER.stop()
+
+
+app = FastAPI(title="AITDP Audit MCP Server", version=settings.app_version, lifespan=lifespan)
+app.add_middleware(tracing.TracingMiddleware)
+app.include_router(debug_router(
+    profiler,
+    enabled=settings.profiler_enabled,
+    app_env=settings.app_env,
+    admin_token=settings.admin_token,
+    service="audit-mcp",
+))
 
 @app.get("/health")
 async def health():
@@ -18,10 +77,84 @@ async def health():
         "hash_chain": settings.hash_chain
     }
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(instrumentation.render(), media_type=instrumentation.CONTENT_TYPE)
+
 @app.post("/audit/log", response_model=AuditWriteResponse)
 async def log_event(req: AuditWriteRequest):
-    return store.write(req)
+    try:
+        return await writer.submit(req)
+    except WriterStoppedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
+@app.post("/audit/log/batch", response_model=AuditWriteBatchResponse)
+async def log_events(req: AuditWriteBatchRequest):
+    try:
+        return AuditWriteBatchResponse(results=await writer.submit_many(req.events))
+    except WriterStoppedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+# Plain def: runs in the threadpool on a pooled reader, never on the event loop.
+# Returned pre-serialized: payloads go out as stored, without a parse/validate/dump round trip.
 @app.get("/audit/events", response_model=list[AuditEvent])
-async def list_events(trace_id: str = Query(..., min_length=1)):
-    return store.list_by_trace(trace_id)
+def list_events(trace_id: str = Query(..., min_length=1)):
+    return Response(store.list_by_trace_json(trace_id), media_type="application/json")
+
+@app.get("/audit/export")
+def export_events(
+    start: datetime,
+    end: datetime,
+    event_type: list[AuditEventType] | None = Query(default=None),
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, gt=0),
+):
+    """
+    Stream events with start <= timestamp < end as NDJSON, oldest first.
+    Bounds may carry any UTC offset; bounds without one are taken as UTC.
+
+    When `limit` is reached the last line is {"next_cursor": ...}; pass it back
+    as `cursor` to resume after the last event sent.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rows = store.iter_export(
+        start,
+        end,
+        event_types=[t.value for t in event_type] if event_type else None,
+        after=after,
+    )
+
+    def body():
+        sent = 0
+        position = None
+        for position, line in islice(rows, limit):
+            sent += 1
+            yield line
+        if limit is not None and sent == limit and position is not None:
+            yield f'{{"next_cursor":"{encode_cursor(position)}"}}\n'
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+_verify_lock = threading.Lock()
+
+@app.post("/audit/verify")
+def verify_chains(full: bool = False):
+    """Verify hash chains; incremental from the last checkpoint unless full=true."""
+    if not _verify_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Verification already running")
+    try:
+        return run_verification(
+            settings.db_path,
+            hash_chain=settings.hash_chain,
+            segment_dir=store.segment_dir if settings.partition != "none" else None,
+            state_path=settings.verify_state_path,
+            full=full,
+            workers=settings.verify_workers,
+        )
+    finally:
+        _verify_lock.release()
@@ -0,0 +1,260 @@
+"""
+Time-partitioned audit segments.
+
+Each segment is a self-contained SQLite file with the regular audit schema.
+Exactly one segment is open for writes; it rolls over daily or when it
+passes a size threshold. A small manifest database records every segment's
+time range, event count and a Bloom filter of its trace_ids, so queries
+only open the segments that can hold matching rows.
+
+Closed segments are compacted in the background: payloads are compressed,
+the file is rewritten with VACUUM INTO, marked read-only on disk and
+served through immutable connections from then on.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .codec import get_codec
+from .db import ConnectionPool, PoolClosedError, register_functions
+
+MANIFEST_SQL = """
+CREATE TABLE IF NOT EXISTS segments (
+  segment_id INTEGER PRIMARY KEY,
+  path TEXT NOT NULL,
+  state TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  closed_at TEXT,
+  min_ts TEXT,
+  max_ts TEXT,
+  events INTEGER NOT NULL DEFAULT 0,
+  bytes INTEGER,
+  trace_bloom BLOB
+);
+"""
+
+OPEN, CLOSED, COMPACTED = "open", "closed", "compacted"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over trace_ids (~1% false positives at the sized capacity)."""
+
+    def __init__(self, bits: bytearray, hashes: int):
+        self.bits = bits
+        self.hashes = hashes
+        self.size = len(bits) * 8
+
+    @classmethod
+    def build(cls, keys: Iterable[str], expected: int, fp_rate: float = 0.01) -> "BloomFilter":
+        n = max(1, expected)
+        m = max(64, int(-n * math.log(fp_rate) / (math.log(2) ** 2)))
+        bloom = cls(bytearray((m + 7) // 8), max(1, round(m / n * math.log(2))))
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.hashes]) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "BloomFilter":
+        return cls(bytearray(raw[1:]), raw[0])
+
+
+@dataclass(eq=False)
+class Segment:
+    segment_id: int
+    path: str
+    state: str
+    created_at: str
+    min_ts: Optional[str] = None
+    max_ts: Optional[str] = None
+    events: int = 0
+    bloom: Optional[BloomFilter] = None
+    # Swapped in place when the segment is compacted, so running scans pick up the new file.
+    pool: Optional[ConnectionPool] = field(default=None, repr=False)
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Reader on the segment's current pool; retries if compaction swaps the pool mid-acquire."""
+        while True:
+            pool = self.pool
+            try:
+                conn = pool.acquire()
+                break
+            except PoolClosedError:
+                if self.pool is pool:
+                    raise
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+
+    def may_contain(self, trace_id: str) -> bool:
+        return self.bloom is None or trace_id in self.bloom
+
+    def overlaps(self, start: str, end: str) -> bool:
+        if self.state == OPEN:
+            return True
+        if self.min_ts is None:  # closed while empty
+            return False
+        return self.min_ts < end and self.max_ts >= start
+
+
+def default_segment_dir(db_path: str) -> str:
+    return str(Path(db_path).parent / "segments")
+
+
+def manifest_path(segment_dir: str) -> str:
+    return str(Path(segment_dir) / "manifest.db")
+
+
+def segment_path(segment_dir: str, segment_id: int, created_at: datetime, compacted: bool = False) -> str:
+    return str(Path(segment_dir) / f"audit-{created_at:%Y%m%d}-{segment_id:06d}{'.c' if compacted else ''}.db")
+
+
+class Manifest:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(MANIFEST_SQL)
+
+    def segments(self) -> list[Segment]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM segments ORDER BY segment_id").fetchall()
+        return [
+            Segment(
+                segment_id=r["segment_id"],
+                path=r["path"],
+                state=r["state"],
+                created_at=r["created_at"],
+                min_ts=r["min_ts"],
+                max_ts=r["max_ts"],
+                events=r["events"],
+                bloom=BloomFilter.from_bytes(r["trace_bloom"]) if r["trace_bloom"] else None,
+            )
+            for r in rows
+        ]
+
+    def create(self, segment_dir: str, created_at: datetime) -> Segment:
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO segments(path, state, created_at) VALUES('', ?, ?)",
+                (OPEN, created_at.isoformat()),
+            )
+            segment_id = cur.lastrowid
+            path = segment_path(segment_dir, segment_id, created_at)
+            self._conn.execute("UPDATE segments SET path = ? WHERE segment_id = ?", (path, segment_id))
+        return Segment(segment_id=segment_id, path=path, state=OPEN, created_at=created_at.isoformat())
+
+    def adopt(self, path: str, created_at: datetime) -> Segment:
+        """Register an existing database file (e.g. a pre-partitioning audit.db) as an open segment."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO segments(path, state, created_at) VALUES(?, ?, ?)",
+                (path, OPEN, created_at.isoformat()),
+            )
+        return Segment(segment_id=cur.lastrowid, path=path, state=OPEN, created_at=created_at.isoformat())
+
+    def close(self, segment: Segment) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE segments SET state = ?, closed_at = ?, min_ts = ?, max_ts = ?, events = ?, trace_bloom = ? "
+                "WHERE segment_id = ?",
+                (
+                    CLOSED,
+                    datetime.now(timezone.utc).isoformat(),
+                    segment.min_ts,
+                    segment.max_ts,
+                    segment.events,
+                    segment.bloom.to_bytes() if segment.bloom else None,
+                    segment.segment_id,
+                ),
+            )
+
+    def mark_compacted(self, segment: Segment, path: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE segments SET state = ?, path = ?, bytes = ? WHERE segment_id = ?",
+                (COMPACTED, path, os.path.getsize(path), segment.segment_id),
+            )
+
+    def close_manifest(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def seal(segment: Segment) -> None:
+    """Capture the time range and trace_id Bloom filter of a segment that just stopped taking writes."""
+    with segment.reader() as conn:
+        segment.min_ts, segment.max_ts, segment.events = conn.execute(
+            "SELECT MIN(timestamp), MAX(timestamp), COUNT(*) FROM audit_events"
+        ).fetchone()
+        traces = conn.execute("SELECT COUNT(DISTINCT trace_id) FROM audit_events").fetchone()[0]
+        segment.bloom = BloomFilter.build(
+            (r[0] for r in conn.execute("SELECT DISTINCT trace_id FROM audit_events")), traces
+        )
+    segment.state = CLOSED
+
+
+def compact(segment: Segment, segment_dir: str, codec: str = "zlib-d1") -> str:
+    """
+    Re-encode canonical-text payloads with `codec` and rewrite a closed segment
+    into a fresh, read-only file in segment_dir. Returns the new path; the
+    caller swaps the segment's pool over to it.
+    """
+    encoder = get_codec(codec)
+    target = segment_path(segment_dir, segment.segment_id, datetime.fromisoformat(segment.created_at), compacted=True)
+    if os.path.exists(target):
+        os.chmod(target, 0o644)
+        os.remove(target)
+
+    conn = sqlite3.connect(segment.path)
+    register_functions(conn)
+    if encoder.column_value is not None:
+        conn.create_function("audit_encode", 1, encoder.encode, deterministic=True)
+        with conn:
+            conn.execute(
+                "UPDATE audit_events SET payload_json = audit_encode(payload_json), payload_codec = ? "
+                "WHERE payload_codec IS NULL",
+                (encoder.column_value,),
+            )
+    conn.execute("VACUUM INTO ?", (target,))
+    conn.close()
+
+    os.chmod(target, 0o444)
+    return target
+
+
+def remove_segment_files(path: str) -> None:
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
@@ -1,13 +1,44 @@
 from __future__ import annotations
 
+import base64
+import heapq
+import logging
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Iterator, Optional
 import json
 import hashlib
 
+from shared import instrumentation
 from shared.schemas.audit import AuditEventType, AuditWriteRequest, AuditWriteResponse, AuditEvent
+from .codec import get_codec
+from .config import StorageSettings
+from .db import ConnectionPool
+from .segments import (
+    CLOSED,
+    COMPACTED,
+    OPEN,
+    Manifest,
+    Segment,
+    compact,
+    default_segment_dir,
+    manifest_path,
+    remove_segment_files,
+    seal,
+)
+
+log = logging.getLogger(__name__)
+
+WRITE_SECONDS = instrumentation.histogram(
+    "aitdp_audit_write_seconds", "AuditStore.write/write_many latency per transaction, including lock wait"
+)
+EVENTS_WRITTEN = instrumentation.counter("aitdp_audit_events_written_total", "Audit events committed")
+LIST_BY_TRACE_SECONDS = instrumentation.histogram("aitdp_audit_list_by_trace_seconds", "AuditStore.list_by_trace latency")
+COMPACTION_FAILURES = instrumentation.counter("aitdp_audit_compaction_failures_total", "Segment compactions that failed")
 
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS audit_events (
@@ -17,12 +48,53 @@ CREATE TABLE IF NOT EXISTS audit_events (
   timestamp TEXT NOT NULL,
   payload_json TEXT NOT NULL,
   prev_hash TEXT,
-  event_hash TEXT
+  event_hash TEXT,
+  seq INTEGER,
+  payload_codec TEXT
 );
+"""
+
+INDEX_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_audit_trace_seq ON audit_events(trace_id, seq);
+CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_events(timestamp, seq, audit_id);
+DROP INDEX IF EXISTS idx_audit_trace;
+"""
 
-CREATE INDEX IF NOT EXISTS idx_audit_trace ON audit_events(trace_id);
+# Databases created before `seq` existed: number each trace's events in timestamp order.
+BACKFILL_SEQ_SQL = """
+ALTER TABLE audit_events ADD COLUMN seq INTEGER;
+
+UPDATE audit_events
+SET seq = numbered.n
+FROM (
+  SELECT rowid AS rid, ROW_NUMBER() OVER (PARTITION BY trace_id ORDER BY timestamp, rowid) AS n
+  FROM audit_events
+) AS numbered
+WHERE audit_events.rowid = numbered.rid;
 """
 
+PARTITION_MODES = ("none", "daily", "size")
+
+_EVENT_COLUMNS = (
+    "audit_id, trace_id, event_type, timestamp, prev_hash, event_hash, seq, "
+    "audit_payload(payload_json, payload_codec) AS payload_json"
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def utc_isoformat(value: datetime) -> str:
+    """
+    ISO text comparable with stored timestamps, which are UTC (+00:00).
+    Range bounds are compared as strings, so other offsets are converted
+    first; naive datetimes are taken to be UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
 def _hash_event(trace_id: str, event_type: str, timestamp: str, payload_json: str, prev_hash: Optional[str]) -> str:
     m = hashlib.sha256()
     m.update(trace_id.encode("utf-8"))
@@ -33,60 +105,353 @@ def _hash_event(trace_id: str, event_type: str, timestamp: str, payload_json: st
         m.update(prev_hash.encode("utf-8"))
     return m.hexdigest()
 
+def _event_json(
+    audit_id: str, trace_id: str, event_type: str, ts: str, seq: int,
+    prev_hash: Optional[str], event_hash: Optional[str], payload_json: str,
+) -> str:
+    """One event as a JSON object with the stored canonical payload spliced in verbatim."""
+    head = json.dumps(
+        {
+            "audit_id": audit_id,
+            "trace_id": trace_id,
+            "event_type": event_type,
+            "timestamp": ts,
+            "seq": seq,
+            "prev_hash": prev_hash,
+            "event_hash": event_hash,
+        },
+        separators=(",", ":"),
+    )
+    return f'{head[:-1]},"payload":{payload_json}}}'
+
+ExportPosition = tuple[str, int, str]  # (timestamp, seq, audit_id) of the last row sent
+
+
+def encode_cursor(position: ExportPosition) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> ExportPosition:
+    try:
+        ts, seq, audit_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return utc_isoformat(datetime.fromisoformat(ts)), int(seq), str(audit_id)
+    except Exception as e:
+        raise ValueError("invalid export cursor") from e
+
+
+class ChainHeadCache:
+    """
+    LRU of trace_id -> (seq, event_hash) for the last committed event of each trace.
+    Only touched while holding the store's write lock.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._heads: OrderedDict[str, tuple[int, Optional[str]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, trace_id: str) -> Optional[tuple[int, Optional[str]]]:
+        head = self._heads.get(trace_id)
+        if head is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._heads.move_to_end(trace_id)
+        return head
+
+    def put(self, trace_id: str, head: tuple[int, Optional[str]]) -> None:
+        self._heads[trace_id] = head
+        self._heads.move_to_end(trace_id)
+        if len(self._heads) > self.capacity:
+            self._heads.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._heads)
+
+
 class AuditStore:
-    def __init__(self, db_path: str, hash_chain: bool = True):
+    """
+    Hash-chained audit log over one or more SQLite segments.
+
+    With partition="none" the store is a single file at db_path. With "daily"
+    or "size" it writes to one open segment under segment_dir and rolls over
+    to a new file each UTC day or once the open file passes segment_max_bytes;
+    closed segments are sealed into the manifest and compacted in the
+    background. Reads fan out only to segments whose time range or trace_id
+    filter can match.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        hash_chain: bool = True,
+        chain_cache_size: int = 100_000,
+        storage: StorageSettings | None = None,
+        partition: str = "none",
+        segment_dir: str | None = None,
+        segment_max_bytes: int = 1 << 30,
+        payload_codec: str = "json",
+        compact_codec: str = "zlib-d1",
+    ):
+        if partition not in PARTITION_MODES:
+            raise ValueError(f"partition must be one of {PARTITION_MODES}")
+
         self.db_path = db_path
         self.hash_chain = hash_chain
+        self.storage = storage or StorageSettings()
+        self.partition = partition
+        self.segment_max_bytes = segment_max_bytes
+        self.codec = get_codec(payload_codec)
+        self.compact_codec = get_codec(compact_codec).name
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # One long-lived writer connection, serialized by _write_lock, plus pooled readers.
+        # Holding the lock while extending chains is what orders events per trace.
+        self._write_lock = threading.Lock()
+        self._heads = ChainHeadCache(chain_cache_size)
+
+        self._manifest: Manifest | None = None
+        if partition == "none":
+            segments = [Segment(segment_id=0, path=db_path, state=OPEN, created_at=_utcnow().isoformat())]
+        else:
+            self.segment_dir = segment_dir or default_segment_dir(db_path)
+            Path(self.segment_dir).mkdir(parents=True, exist_ok=True)
+            self._manifest = Manifest(manifest_path(self.segment_dir))
+            segments = self._manifest.segments()
+            if not segments or segments[-1].state != OPEN:
+                if not segments and Path(db_path).exists():
+                    segments.append(self._manifest.adopt(db_path, _utcnow()))
+                else:
+                    segments.append(self._manifest.create(self.segment_dir, _utcnow()))
+
+        for segment in segments:
+            self._attach(segment)
+
+        # Replaced, never mutated, so readers can iterate a snapshot without locking.
+        self._segments: list[Segment] = segments
+        self._active = segments[-1]
+        self._writer = self._active.pool.writer
         self._init_db()
 
-    def _conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        for segment in segments:
+            if segment.state == CLOSED:
+                self._compact_async(segment)
+
+    def _attach(self, segment: Segment) -> None:
+        segment.pool = ConnectionPool(
+            segment.path,
+            self.storage,
+            writable=segment.state == OPEN,
+            immutable=segment.state == COMPACTED,
+        )
+
+    def close(self) -> None:
+        with self._write_lock:
+            for segment in self._segments:
+                segment.pool.close()
+            if self._manifest is not None:
+                self._manifest.close_manifest()
 
     def _init_db(self) -> None:
-        with self._conn() as conn:
-            conn.executescript(SCHEMA_SQL)
-            conn.commit()
+        conn = self._writer
+        conn.executescript(SCHEMA_SQL)
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(audit_events)")}
+        if "seq" not in columns:
+            conn.executescript(BACKFILL_SEQ_SQL)
+        if "payload_codec" not in columns:
+            conn.execute("ALTER TABLE audit_events ADD COLUMN payload_codec TEXT")
+        conn.executescript(INDEX_SQL)
+        conn.commit()
 
-    def _get_prev_hash(self, trace_id: str) -> Optional[str]:
-        if not self.hash_chain:
-            return None
-        with self._conn() as conn:
-            row = conn.execute(
-                "SELECT event_hash FROM audit_events WHERE trace_id = ? ORDER BY timestamp DESC LIMIT 1",
-                (trace_id,),
-            ).fetchone()
-            return row["event_hash"] if row else None
+    def segments(self) -> list[Segment]:
+        return self._segments
+
+    def _should_roll(self) -> bool:
+        if self.partition == "daily":
+            return datetime.fromisoformat(self._active.created_at).date() != _utcnow().date()
+        if self.partition == "size":
+            page_count = self._writer.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._writer.execute("PRAGMA page_size").fetchone()[0]
+            return page_count * page_size >= self.segment_max_bytes
+        return False
+
+    def _roll(self) -> None:
+        """Close the open segment and start a new one. Caller holds the write lock."""
+        old = self._active
+        old.pool.close_writer()
+        seal(old)
+        self._manifest.close(old)
+
+        new = self._manifest.create(self.segment_dir, _utcnow())
+        self._attach(new)
+        self._segments = self._segments + [new]
+        self._active = new
+        self._writer = new.pool.writer
+        self._init_db()
+
+        self._compact_async(old)
+
+    def _compact_async(self, segment: Segment) -> None:
+        threading.Thread(
+            target=self._compact, args=(segment,), name=f"audit-compact-{segment.segment_id}", daemon=True
+        ).start()
+
+    def _compact(self, segment: Segment) -> None:
+        try:
+            path = compact(segment, self.segment_dir, self.compact_codec)
+        except Exception as e:
+            COMPACTION_FAILURES.inc()
+            log.error("[AUDIT COMPACTION FAILED] %s", {"segment": segment.segment_id, "error": str(e)})
+            return
+
+        old_pool, old_path = segment.pool, segment.path
+        segment.pool = ConnectionPool(path, self.storage, writable=False, immutable=True)
+        segment.path = path
+        segment.state = COMPACTED
+        self._manifest.mark_compacted(segment, path)
+
+        old_pool.close()
+        remove_segment_files(old_path)
+
+    def _chain_head(self, trace_id: str) -> tuple[int, Optional[str]]:
+        """(seq, event_hash) of the trace's last event; (0, None) for a new trace."""
+        head = self._heads.get(trace_id)
+        if head is not None:
+            return head
+
+        sql = "SELECT seq, event_hash FROM audit_events WHERE trace_id = ? ORDER BY seq DESC LIMIT 1"
+        row = self._writer.execute(sql, (trace_id,)).fetchone()
+
+        # Chains continue across segments: fall back to older segments, newest first.
+        if row is None:
+            for segment in reversed(self._segments[:-1]):
+                if not segment.may_contain(trace_id):
+                    continue
+                with segment.reader() as conn:
+                    row = conn.execute(sql, (trace_id,)).fetchone()
+                if row is not None:
+                    break
+
+        head = (row["seq"], row["event_hash"]) if row else (0, None)
+        self._heads.put(trace_id, head)
+        return head
 
     def write(self, req: AuditWriteRequest) -> AuditWriteResponse:
-        audit_id = f"AUD-{hashlib.md5((req.trace_id + req.timestamp.isoformat()).encode()).hexdigest()[:12]}"
-        payload_json = json.dumps(req.payload, separators=(",", ":"), sort_keys=True)
+        return self.write_many([req])[0]
+
+    def write_many(self, reqs: list[AuditWriteRequest]) -> list[AuditWriteResponse]:
+        """
+        Persist a batch of events in one transaction, in order.
+        Events for the same trace within the batch chain onto each other.
+        """
+        started = time.perf_counter()
+        with self._write_lock:
+            results = self._write_many(reqs)
+        WRITE_SECONDS.observe(time.perf_counter() - started)
+        EVENTS_WRITTEN.inc(len(results))
+        return results
+
+    def _write_many(self, reqs: list[AuditWriteRequest]) -> list[AuditWriteResponse]:
+        if self.partition != "none" and self._should_roll():
+            self._roll()
+
+        prepared = [self._prepare(req) for req in reqs]
+        try:
+            return self._insert(prepared)
+        except sqlite3.IntegrityError:
+            # Producers with an outbox redeliver after a lost acknowledgement. An event
+            # already stored with identical content is answered from the stored row.
+            existing = self._find_existing(prepared)
+            if not existing:
+                raise
+            fresh = [p for p in prepared if p[0] not in existing]
+            written = iter(self._insert(fresh) if fresh else [])
+            return [existing[p[0]] if p[0] in existing else next(written) for p in prepared]
+
+    @staticmethod
+    def _prepare(req: AuditWriteRequest) -> tuple[str, str, str, str, str]:
         ts = req.timestamp.isoformat()
+        audit_id = f"AUD-{hashlib.md5((req.trace_id + ts).encode()).hexdigest()[:12]}"
+        payload_json = json.dumps(req.payload, separators=(",", ":"), sort_keys=True)
+        return audit_id, req.trace_id, req.event_type.value, ts, payload_json
 
-        prev_hash = self._get_prev_hash(req.trace_id)
-        event_hash = _hash_event(req.trace_id, req.event_type.value, ts, payload_json, prev_hash)
+    def _find_existing(self, prepared: list[tuple[str, str, str, str, str]]) -> dict[str, AuditWriteResponse]:
+        """Stored responses for events whose audit_id already exists with the same content."""
+        found: dict[str, AuditWriteResponse] = {}
+        ids = [p[0] for p in prepared]
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            rows = self._writer.execute(
+                f"SELECT {_EVENT_COLUMNS} FROM audit_events WHERE audit_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for r in rows:
+                found[r["audit_id"]] = r
 
-        with self._conn() as conn:
-            conn.execute(
+        existing: dict[str, AuditWriteResponse] = {}
+        for audit_id, trace_id, event_type, ts, payload_json in prepared:
+            r = found.get(audit_id)
+            if r is None:
+                continue
+            if (r["trace_id"], r["event_type"], r["timestamp"], r["payload_json"]) != (trace_id, event_type, ts, payload_json):
+                raise sqlite3.IntegrityError(f"audit_id {audit_id} already exists with different content")
+            existing[audit_id] = AuditWriteResponse(
+                audit_id=audit_id, event_hash=r["event_hash"], prev_hash=r["prev_hash"], seq=r["seq"]
+            )
+        return existing
+
+    def _insert(self, prepared: list[tuple[str, str, str, str, str]]) -> list[AuditWriteResponse]:
+        rows = []
+        results: list[AuditWriteResponse] = []
+        # New heads are staged here and only published to the cache after commit.
+        heads: dict[str, tuple[int, Optional[str]]] = {}
+        encode, codec = self.codec.encode, self.codec.column_value
+
+        for audit_id, trace_id, event_type, ts, payload_json in prepared:
+            head_seq, head_hash = heads.get(trace_id) or self._chain_head(trace_id)
+            seq = head_seq + 1
+            prev_hash = head_hash if self.hash_chain else None
+            event_hash = _hash_event(trace_id, event_type, ts, payload_json, prev_hash)
+            heads[trace_id] = (seq, event_hash)
+
+            # The hash covers the canonical text; only the stored bytes go through the codec.
+            rows.append((audit_id, trace_id, event_type, ts, encode(payload_json), prev_hash, event_hash, seq, codec))
+            results.append(AuditWriteResponse(audit_id=audit_id, event_hash=event_hash, prev_hash=prev_hash, seq=seq))
+
+        with self._writer:
+            self._writer.executemany(
                 """
-                INSERT INTO audit_events(audit_id, trace_id, event_type, timestamp, payload_json, prev_hash, event_hash)
-                VALUES(?,?,?,?,?,?,?)
+                INSERT INTO audit_events(
+                  audit_id, trace_id, event_type, timestamp, payload_json, prev_hash, event_hash, seq, payload_codec
+                )
+                VALUES(?,?,?,?,?,?,?,?,?)
                 """,
-                (audit_id, req.trace_id, req.event_type.value, ts, payload_json, prev_hash, event_hash),
+                rows,
             )
-            conn.commit()
 
-        return AuditWriteResponse(audit_id=audit_id, event_hash=event_hash, prev_hash=prev_hash)
+        for trace_id, head in heads.items():
+            self._heads.put(trace_id, head)
 
-    def list_by_trace(self, trace_id: str) -> list[AuditEvent]:
-        with self._conn() as conn:
-            rows = conn.execute(
-                "SELECT * FROM audit_events WHERE trace_id = ? ORDER BY timestamp ASC",
-                (trace_id,),
-            ).fetchall()
+        return results
+
+    def _trace_rows(self, trace_id: str) -> list[sqlite3.Row]:
+        rows = []
+        for segment in self._segments:
+            if not segment.may_contain(trace_id):
+                continue
+            with segment.reader() as conn:
+                rows.extend(
+                    conn.execute(
+                        f"SELECT {_EVENT_COLUMNS} FROM audit_events WHERE trace_id = ? ORDER BY seq ASC",
+                        (trace_id,),
+                    ).fetchall()
+                )
+        return rows
 
+    def list_by_trace(self, trace_id: str) -> list[AuditEvent]:
+        started = time.perf_counter()
+        rows = self._trace_rows(trace_id)
         events: list[AuditEvent] = []
         for r in rows:
             events.append(
@@ -98,6 +463,82 @@ class AuditStore:
                     payload=json.loads(r["payload_json"]),
                     prev_hash=r["prev_hash"],
                     event_hash=r["event_hash"],
+                    seq=r["seq"],
                 )
             )
+        LIST_BY_TRACE_SECONDS.observe(time.perf_counter() - started)
         return events
+
+    def list_by_trace_json(self, trace_id: str) -> str:
+        """
+        Same events as list_by_trace, as a JSON array. Stored payloads are spliced
+        in as canonical text without being parsed or re-serialized.
+        """
+        started = time.perf_counter()
+        body = ",".join(
+            _event_json(r["audit_id"], r["trace_id"], r["event_type"], r["timestamp"], r["seq"],
+                        r["prev_hash"], r["event_hash"], r["payload_json"])
+            for r in self._trace_rows(trace_id)
+        )
+        LIST_BY_TRACE_SECONDS.observe(time.perf_counter() - started)
+        return f"[{body}]"
+
+    def iter_export(
+        self,
+        start: datetime,
+        end: datetime,
+        event_types: list[str] | None = None,
+        after: ExportPosition | None = None,
+        page_size: int = 1000,
+    ) -> Iterator[tuple[ExportPosition, str]]:
+        """
+        Yield (position, ndjson line) for events with start <= timestamp < end,
+        in (timestamp, seq, audit_id) order.
+
+        Pages with a keyset cursor so memory stays at one page regardless of the
+        range size, and a reader connection is only held while a page is fetched.
+        The stored payload_json is spliced into each line verbatim. Bounds with
+        another offset are converted to UTC; naive bounds are taken as UTC.
+        """
+        start_iso, end_iso = utc_isoformat(start), utc_isoformat(end)
+        where = ["timestamp >= ?", "timestamp < ?"]
+        params: list = [start_iso, end_iso]
+        if event_types:
+            where.append(f"event_type IN ({','.join('?' * len(event_types))})")
+            params.extend(event_types)
+
+        sql = f"""
+            SELECT audit_id, trace_id, event_type, timestamp, seq, prev_hash, event_hash,
+                   audit_payload(payload_json, payload_codec) AS payload_json
+            FROM audit_events
+            WHERE {" AND ".join(where)} AND (timestamp, seq, audit_id) > (?, ?, ?)
+            ORDER BY timestamp, seq, audit_id
+            LIMIT ?
+        """
+
+        streams = [
+            self._iter_segment(segment, sql, params, after or ("", -1, ""), page_size)
+            for segment in self._segments
+            if segment.overlaps(start_iso, end_iso)
+        ]
+        if len(streams) == 1:
+            yield from streams[0]
+        else:
+            # Segments can overlap at their edges; merge keeps global order.
+            yield from heapq.merge(*streams, key=lambda item: item[0])
+
+    @staticmethod
+    def _iter_segment(
+        segment: Segment, sql: str, params: list, position: ExportPosition, page_size: int
+    ) -> Iterator[tuple[ExportPosition, str]]:
+        while True:
+            with segment.reader() as conn:
+                rows = conn.execute(sql, (*params, *position, page_size)).fetchall()
+
+            for audit_id, trace_id, event_type, ts, seq, prev_hash, event_hash, payload_json in rows:
+                position = (ts, seq, audit_id)
+                line = _event_json(audit_id, trace_id, event_type, ts, seq, prev_hash, event_hash, payload_json)
+                yield position, line + "\n"
+
+            if len(rows) < page_size:
+                return
@@ -0,0 +1,368 @@
+"""
+Hash-chain verification for the audit store.
+
+Recomputes `event_hash` for every event and checks each trace's chain
+linkage and seq continuity. Work is sharded by trace_id across a process
+pool; each worker opens its own read-only connection and scans its traces
+along the (trace_id, seq) index.
+
+Progress is checkpointed in a sidecar SQLite file: a "segment:rowid"
+watermark plus the last verified (seq, event_hash) of every trace.
+Incremental runs only visit traces that gained events past the watermark
+and resume each chain from its checkpoint.
+
+Partitioned stores are verified segment by segment, oldest first, so chains
+that span segments continue from the heads left by the previous segment.
+Rowids are only compared within the open segment; compaction rewrites
+closed segments and may renumber them.
+
+    python -m apps.audit_mcp.verify --db /data/audit.db [--segment-dir DIR] [--full] [--workers 16]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from .db import register_functions
+from .segments import OPEN, manifest_path
+from .storage import _hash_event
+
+STATE_SQL = """
+CREATE TABLE IF NOT EXISTS verify_state (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS trace_heads (
+  trace_id TEXT PRIMARY KEY,
+  seq INTEGER NOT NULL,
+  event_hash TEXT
+);
+
+CREATE TABLE IF NOT EXISTS chain_breaks (
+  trace_id TEXT NOT NULL,
+  seq INTEGER,
+  audit_id TEXT,
+  kind TEXT NOT NULL,
+  detected_at TEXT NOT NULL
+);
+"""
+
+MAX_REPORTED_BREAKS = 100
+TRACES_PER_TASK = 2_000
+
+
+def _open_source(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only = 1")
+    register_functions(conn)
+    return conn
+
+
+def list_segment_files(db_path: str, segment_dir: Optional[str]) -> list[tuple[int, str, str]]:
+    """(segment_id, path, state) oldest first; an unpartitioned store is a single open segment 0."""
+    if segment_dir is None:
+        return [(0, db_path, OPEN)]
+    conn = sqlite3.connect(f"file:{manifest_path(segment_dir)}?mode=ro", uri=True)
+    rows = conn.execute("SELECT segment_id, path, state FROM segments ORDER BY segment_id").fetchall()
+    conn.close()
+    return rows
+
+
+def _open_segment(path: str, segment_dir: Optional[str], segment_id: int) -> sqlite3.Connection:
+    """Open a segment, following it to its new file if compaction replaced it since it was listed."""
+    while True:
+        try:
+            return _open_source(path)
+        except sqlite3.OperationalError:
+            if segment_dir is None:
+                raise
+            current = {sid: p for sid, p, _ in list_segment_files(path, segment_dir)}.get(segment_id)
+            if current is None or current == path:
+                raise
+            path = current
+
+
+def _parse_watermark(value: str) -> tuple[int, int]:
+    # Checkpoints written before partitioning hold a bare rowid.
+    segment_id, _, rowid = value.rpartition(":")
+    return int(segment_id or 0), int(rowid)
+
+
+def _open_state(state_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(state_path, timeout=60)
+    conn.execute("PRAGMA journal_mode = wal")
+    conn.executescript(STATE_SQL)
+    return conn
+
+
+def _verify_rows(
+    rows: Iterable[tuple],
+    hash_chain: bool,
+    starts: dict[str, tuple[int, Optional[str]]] | _CheckpointStarts,
+    breaks: list[dict],
+    heads: list[tuple[str, int, Optional[str]]],
+) -> int:
+    """
+    Verify rows ordered by (trace_id, seq). Appends breaks and the new head of
+    every trace whose chain verified cleanly. Returns the number of events checked.
+    """
+    checked = 0
+    current: Optional[str] = None
+    expected_seq = 0
+    expected_prev: Optional[str] = None
+    broken = False
+
+    def close_trace() -> None:
+        if current is not None and not broken:
+            heads.append((current, expected_seq, expected_prev))
+
+    for audit_id, trace_id, event_type, ts, payload_json, prev_hash, event_hash, seq in rows:
+        if trace_id != current:
+            close_trace()
+            current = trace_id
+            expected_seq, expected_prev = starts.get(trace_id, (0, None))
+            broken = False
+
+        checked += 1
+        if broken:
+            continue
+
+        kind = None
+        if seq != expected_seq + 1:
+            kind = "seq_gap"
+        elif hash_chain and prev_hash != expected_prev:
+            kind = "prev_hash_mismatch"
+        elif _hash_event(trace_id, event_type, ts, payload_json, prev_hash) != event_hash:
+            kind = "event_hash_mismatch"
+
+        if kind is not None:
+            breaks.append({"trace_id": trace_id, "seq": seq, "audit_id": audit_id, "kind": kind})
+            broken = True
+            continue
+
+        expected_seq = seq
+        expected_prev = event_hash
+
+    close_trace()
+    return checked
+
+
+_SELECT = (
+    "SELECT audit_id, trace_id, event_type, timestamp, audit_payload(payload_json, payload_codec), "
+    "prev_hash, event_hash, seq FROM audit_events"
+)
+
+
+class _CheckpointStarts:
+    """Lazy trace_id -> (seq, event_hash) lookup against the sidecar's trace_heads."""
+
+    def __init__(self, state: sqlite3.Connection):
+        self.state = state
+
+    def get(self, trace_id: str, default: tuple[int, Optional[str]]) -> tuple[int, Optional[str]]:
+        row = self.state.execute("SELECT seq, event_hash FROM trace_heads WHERE trace_id = ?", (trace_id,)).fetchone()
+        return tuple(row) if row else default
+
+
+def _verify_task(
+    segment: tuple[int, str, Optional[str]],
+    state_path: str,
+    hash_chain: bool,
+    max_rowid: Optional[int],
+    shard: tuple,
+) -> dict[str, Any]:
+    """
+    Worker entry point for one segment. A shard is either ("range", lo, hi)
+    over trace_id for full runs, or ("traces", [(trace_id, seq, event_hash), ...])
+    for incremental runs. max_rowid bounds the scan of the open segment.
+    """
+    segment_id, path, segment_dir = segment
+    src = _open_segment(path, segment_dir, segment_id)
+    state = _open_state(state_path)
+    breaks: list[dict] = []
+    heads: list[tuple[str, int, Optional[str]]] = []
+    bound, bound_params = ("AND rowid <= ?", [max_rowid]) if max_rowid is not None else ("", [])
+
+    if shard[0] == "range":
+        _, lo, hi = shard
+        where, params = ["1"], []
+        if lo is not None:
+            where.append("trace_id >= ?")
+            params.append(lo)
+        if hi is not None:
+            where.append("trace_id < ?")
+            params.append(hi)
+        rows = src.execute(
+            f"{_SELECT} WHERE {' AND '.join(where)} {bound} ORDER BY trace_id, seq", [*params, *bound_params]
+        )
+        checked = _verify_rows(rows, hash_chain, _CheckpointStarts(state), breaks, heads)
+    else:
+        starts = {trace_id: (seq, event_hash) for trace_id, seq, event_hash in shard[1]}
+        checked = 0
+        for trace_id, (seq, _) in starts.items():
+            rows = src.execute(
+                f"{_SELECT} WHERE trace_id = ? AND seq > ? {bound} ORDER BY seq",
+                (trace_id, seq, *bound_params),
+            )
+            checked += _verify_rows(rows, hash_chain, starts, breaks, heads)
+
+    src.close()
+
+    detected_at = datetime.now(timezone.utc).isoformat()
+    with state:
+        state.executemany(
+            "INSERT INTO trace_heads(trace_id, seq, event_hash) VALUES(?,?,?) "
+            "ON CONFLICT(trace_id) DO UPDATE SET seq = excluded.seq, event_hash = excluded.event_hash",
+            heads,
+        )
+        state.executemany(
+            "INSERT INTO chain_breaks(trace_id, seq, audit_id, kind, detected_at) VALUES(?,?,?,?,?)",
+            [(b["trace_id"], b["seq"], b["audit_id"], b["kind"], detected_at) for b in breaks],
+        )
+    state.close()
+
+    return {"events": checked, "traces": len(heads) + len(breaks), "breaks": breaks}
+
+
+def _range_shards(src: sqlite3.Connection, watermark: int, count: int) -> list[tuple]:
+    """Split the trace_id space into ~count ranges using trace_ids sampled by rowid (up to watermark)."""
+    if count <= 1 or watermark == 0:
+        return [("range", None, None)]
+
+    sample_rowids = random.Random(watermark).sample(range(1, watermark + 1), min(watermark, count * 32))
+    sampled = set()
+    for i in range(0, len(sample_rowids), 500):
+        chunk = sample_rowids[i : i + 500]
+        sampled.update(
+            r[0]
+            for r in src.execute(
+                f"SELECT trace_id FROM audit_events WHERE rowid IN ({','.join('?' * len(chunk))})", chunk
+            )
+        )
+
+    ordered = sorted(sampled)
+    step = max(1, len(ordered) // count)
+    bounds = [None] + ordered[step::step][: count - 1] + [None]
+    return [("range", bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+def run_verification(
+    db_path: str,
+    *,
+    hash_chain: bool = True,
+    segment_dir: Optional[str] = None,
+    state_path: Optional[str] = None,
+    full: bool = False,
+    workers: Optional[int] = None,
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    state_path = state_path or f"{db_path}.verify"
+    workers = workers or os.cpu_count() or 1
+    segments = list_segment_files(db_path, segment_dir)
+
+    state = _open_state(state_path)
+    row = state.execute("SELECT value FROM verify_state WHERE key = 'watermark'").fetchone()
+    previous = None if full or row is None else _parse_watermark(row[0])
+    if previous is not None and previous[0] not in {segment_id for segment_id, _, _ in segments}:
+        previous = None  # checkpoint from a different layout
+
+    if previous is None:
+        with state:
+            state.execute("DELETE FROM trace_heads")
+        pending = segments
+    else:
+        pending = [s for s in segments if s[0] >= previous[0]]
+
+    totals = {"events": 0, "traces": 0, "breaks": []}
+    watermark = previous or (segments[-1][0], 0)
+
+    # spawn, not fork: this also runs inside the threaded API server.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        # Segments run one after another: each resumes chains from the heads the previous one stored.
+        for segment_id, path, seg_state in pending:
+            src = _open_segment(path, segment_dir, segment_id)
+            max_rowid = src.execute("SELECT COALESCE(MAX(rowid), 0) FROM audit_events").fetchone()[0]
+            bound = max_rowid if seg_state == OPEN else None
+
+            if previous is None:
+                shards = _range_shards(src, max_rowid, workers * 4)
+            else:
+                if segment_id == previous[0] and seg_state == OPEN:
+                    touched_sql, touched_params = (
+                        "SELECT DISTINCT trace_id FROM audit_events WHERE rowid > ? AND rowid <= ?",
+                        (previous[1], max_rowid),
+                    )
+                else:
+                    touched_sql, touched_params = "SELECT DISTINCT trace_id FROM audit_events", ()
+                starts = []
+                for (trace_id,) in src.execute(touched_sql, touched_params).fetchall():
+                    head = state.execute(
+                        "SELECT seq, event_hash FROM trace_heads WHERE trace_id = ?", (trace_id,)
+                    ).fetchone()
+                    starts.append((trace_id, *(head or (0, None))))
+                shards = [("traces", starts[i : i + TRACES_PER_TASK]) for i in range(0, len(starts), TRACES_PER_TASK)]
+            src.close()
+
+            futures = [pool.submit(_verify_task, (segment_id, path, segment_dir), state_path, hash_chain, bound, shard) for shard in shards]
+            for fut in futures:
+                result = fut.result()
+                totals["events"] += result["events"]
+                totals["traces"] += result["traces"]
+                totals["breaks"].extend(result["breaks"])
+            watermark = (segment_id, max_rowid)
+
+    with state:
+        state.execute(
+            "INSERT INTO verify_state(key, value) VALUES('watermark', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (f"{watermark[0]}:{watermark[1]}",),
+        )
+    state.close()
+
+    return {
+        "mode": "full" if previous is None else "incremental",
+        "watermark_from": f"{previous[0]}:{previous[1]}" if previous else None,
+        "watermark_to": f"{watermark[0]}:{watermark[1]}",
+        "segments_scanned": len(pending),
+        "traces_verified": totals["traces"],
+        "events_verified": totals["events"],
+        "break_count": len(totals["breaks"]),
+        "breaks": totals["breaks"][:MAX_REPORTED_BREAKS],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verify audit hash chains.")
+    parser.add_argument("--db", required=True, help="Path to the audit SQLite database")
+    parser.add_argument("--segment-dir", default=None, help="Segment directory of a partitioned store")
+    parser.add_argument("--state", default=None, help="Checkpoint file (default: <db>.verify)")
+    parser.add_argument("--full", action="store_true", help="Ignore checkpoints and verify everything")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-hash-chain", action="store_true", help="Store was written with AUDIT_HASH_CHAIN=false")
+    args = parser.parse_args()
+
+    report = run_verification(
+        args.db,
+        hash_chain=not args.no_hash_chain,
+        segment_dir=args.segment_dir,
+        state_path=args.state,
+        full=args.full,
+        workers=args.workers,
+    )
+    print(json.dumps(report, indent=2))
+    raise SystemExit(1 if report["break_count"] else 0)
+
+
+if __name__ == "__main__":
+    main()
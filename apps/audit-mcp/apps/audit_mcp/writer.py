@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+
+from shared.schemas.audit import AuditWriteRequest, AuditWriteResponse
+from .storage import AuditStore
+
+
+class WriterStoppedError(RuntimeError):
+    """Raised for submissions after the writer has begun shutting down."""
+
+
+class AuditWriter:
+    """
+    Single background writer with group commit.
+
+    Handlers enqueue events and await a future; the writer task drains the
+    queue into batches (up to `max_batch_size` events, waiting at most
+    `max_delay_seconds` for more) and persists each batch with one
+    `executemany` in one transaction, off the event loop. A caller's future
+    resolves only after the transaction holding its events has committed.
+
+    `stop()` refuses new submissions, then commits everything already queued
+    before the writer task exits, so no caller is left waiting.
+    """
+
+    def __init__(self, store: AuditStore, max_batch_size: int = 500, max_delay_seconds: float = 0.002):
+        self.store = store
+        self.max_batch_size = max_batch_size
+        self.max_delay_seconds = max_delay_seconds
+
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        self.batches = 0
+        self.events = 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="audit-writer")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, req: AuditWriteRequest) -> AuditWriteResponse:
+        return (await self.submit_many([req]))[0]
+
+    async def submit_many(self, reqs: list[AuditWriteRequest]) -> list[AuditWriteResponse]:
+        """Events submitted together are always committed in the same transaction."""
+        if self._task is None or self._stopping:
+            raise WriterStoppedError("AuditWriter is not running")
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((reqs, fut))
+        return await fut
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+
+            batch = [entry]
+            size = len(entry[0])
+            deadline = loop.time() + self.max_delay_seconds
+
+            while size < self.max_batch_size:
+                try:
+                    entry = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        entry = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+                size += len(entry[0])
+
+            await asyncio.to_thread(self._commit, batch)
+
+        # Entries queued before stop() refused new ones may sit behind the sentinel.
+        leftover = []
+        while not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry is not None:
+                leftover.append(entry)
+        if leftover:
+            await asyncio.to_thread(self._commit, leftover)
+
+    def _commit(self, batch: list[tuple[list[AuditWriteRequest], asyncio.Future]]) -> None:
+        reqs = [req for entry_reqs, _ in batch for req in entry_reqs]
+        try:
+            results = self.store.write_many(reqs)
+        except Exception as e:
+            if len(batch) == 1:
+                self._settle(batch[0][1], exc=e)
+                return
+            # Isolate the failure: retry each caller's events in its own transaction.
+            for entry in batch:
+                self._commit([entry])
+            return
+
+        self.batches += 1
+        self.events += len(reqs)
+
+        offset = 0
+        for entry_reqs, fut in batch:
+            self._settle(fut, result=results[offset : offset + len(entry_reqs)])
+            offset += len(entry_reqs)
+
+    @staticmethod
+    def _settle(fut: asyncio.Future, *, result=None, exc: BaseException | None = None) -> None:
+        def apply() -> None:
+            if fut.done():  # caller went away
+                return
+            if exc is not None:
+                fut.set_exception(exc)
+            else:
+                fut.set_result(result)
+
+        fut.get_loop().call_soon_threadsafe(apply)
+
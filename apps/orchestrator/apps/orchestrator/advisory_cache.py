@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+SQLITE_SQL = """
+CREATE TABLE IF NOT EXISTS advisory_cache (
+  key TEXT PRIMARY KEY,
+  advisory_json TEXT NOT NULL,
+  expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_advisory_cache_expires ON advisory_cache(expires_at);
+"""
+
+
+def advisory_cache_key(model: str, prompt: str) -> str:
+    """Content address of one model call: the model name plus the exact user prompt."""
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+def is_cacheable(advisory: dict[str, Any]) -> bool:
+    # Fail-closed fallbacks describe a transient failure, not the trade; never replay them.
+    return advisory.get("model_version") != "error" and not advisory.get("error")
+
+
+class AdvisoryCache:
+    """
+    Content-addressed cache of model advisories.
+
+    Tier 1 is an in-process LRU bounded by entry count, with a per-entry TTL.
+    Tier 2, when `sqlite_path` is set, is a SQLite file that several
+    orchestrator workers can share; hits there are promoted into the LRU.
+    Entries are stored as JSON text and decoded on every hit, so callers
+    always get their own copy.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 3600.0, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+        self.sqlite_path = sqlite_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if sqlite_path:
+            Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode = wal")
+            self._db.execute("PRAGMA synchronous = NORMAL")
+            self._db.executescript(SQLITE_SQL)
+
+        self.hits = 0
+        self.sqlite_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Optional[dict[str, Any]]:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, advisory_json = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(advisory_json)
+            del self._entries[key]
+            self.expirations += 1
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._sqlite_get, key, now)
+            if row is not None:
+                expires_at, advisory_json = row
+                self._remember(key, expires_at, advisory_json)
+                self.hits += 1
+                self.sqlite_hits += 1
+                return json.loads(advisory_json)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, advisory: dict[str, Any]) -> bool:
+        """Store an advisory; returns False (and stores nothing) for fallbacks."""
+        if not is_cacheable(advisory):
+            self.skipped += 1
+            return False
+
+        expires_at = time.time() + self.ttl_seconds
+        advisory_json = json.dumps(advisory, separators=(",", ":"))
+        self._remember(key, expires_at, advisory_json)
+        if self._db is not None:
+            await asyncio.to_thread(self._sqlite_put, key, advisory_json, expires_at)
+        self.stores += 1
+        return True
+
+    def _remember(self, key: str, expires_at: float, advisory_json: str) -> None:
+        self._entries[key] = (expires_at, advisory_json)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _sqlite_get(self, key: str, now: float) -> Optional[tuple[float, str]]:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT expires_at, advisory_json FROM advisory_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+
+    def _sqlite_put(self, key: str, advisory_json: str, expires_at: float) -> None:
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT INTO advisory_cache(key, advisory_json, expires_at) VALUES(?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET advisory_json = excluded.advisory_json, expires_at = excluded.expires_at",
+                (key, advisory_json, expires_at),
+            )
+            self._db.execute("DELETE FROM advisory_cache WHERE expires_at <= ?", (time.time(),))
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "sqlite_path": self.sqlite_path,
+            "hits": self.hits,
+            "sqlite_hits": self.sqlite_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "skipped_uncacheable": self.skipped,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
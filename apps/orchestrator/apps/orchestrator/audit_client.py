@@ -1,20 +1,143 @@
+from __future__ import annotations
+
+import logging
+import time
 from datetime import datetime, timezone
 import httpx
 from .config import settings
-from shared.schemas.audit import AuditWriteRequest, AuditWriteResponse, AuditEventType
+from shared import instrumentation, tracing
+from shared.schemas.audit import (
+    AuditWriteRequest,
+    AuditWriteResponse,
+    AuditWriteBatchResponse,
+    AuditEventType,
+)
+from shared.schemas.serialization import dumps, json_array, splice
+
+log = logging.getLogger(__name__)
+
+AUDIT_CALL_SECONDS = instrumentation.histogram(
+    "aitdp_orchestrator_audit_call_seconds", "Latency of audit-mcp writes from the orchestrator", ["path"]
+)
+AUDIT_CALL_ERRORS = instrumentation.counter(
+    "aitdp_orchestrator_audit_call_errors_total", "Failed audit-mcp writes from the orchestrator", ["path"]
+)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def encode_event(trace_id: str, event_type: AuditEventType, timestamp: datetime, payload: dict | bytes) -> bytes:
+    """
+    An AuditWriteRequest body as JSON bytes. `payload` may already be serialized
+    (e.g. Serialized.with_fields()), in which case it is spliced in as-is.
+    """
+    head = dumps({"trace_id": trace_id, "event_type": event_type.value, "timestamp": timestamp.isoformat()})
+    return splice(head, payload=payload if isinstance(payload, bytes) else dumps(payload))
+
 
 class AuditClient:
+    """
+    Shared async client for audit-mcp.
+
+    Owns one keep-alive httpx.AsyncClient for the app's lifetime (start/close
+    from the lifespan). Events can be written one at a time with `log`, or
+    collected per request with `batch()` and sent as a single
+    /audit/log/batch call, which audit-mcp commits in one transaction.
+    """
+
     def __init__(self, base_url: str | None = None):
         self.base_url = (base_url or settings.audit_mcp_base_url).rstrip("/")
+        self._client: httpx.AsyncClient | None = None
 
-    async def log(self, trace_id: str, event_type: AuditEventType, payload: dict) -> AuditWriteResponse:
-        req = AuditWriteRequest(
-            trace_id=trace_id,
-            event_type=event_type,
-            timestamp=datetime.now(timezone.utc),
-            payload=payload,
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(settings.audit_timeout_seconds, connect=settings.audit_connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.audit_max_connections,
+                max_keepalive_connections=settings.audit_max_keepalive,
+            ),
         )
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(f"{self.base_url}/audit/log", json=req.model_dump(mode="json"))
-            resp.raise_for_status()
-            return AuditWriteResponse(**resp.json())
+
+    async def close(self) -> None:
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+
+    async def _post(self, path: str, body: bytes) -> dict:
+        if self._client is None:
+            await self.start()
+        started = time.perf_counter()
+        try:
+            with tracing.span("audit.write", "client", path=path):
+                resp = await self._client.post(
+                    path, content=body, headers={**_JSON_HEADERS, **tracing.outbound_headers()}
+                )
+                resp.raise_for_status()
+        except Exception:
+            AUDIT_CALL_ERRORS.labels(path).inc()
+            raise
+        AUDIT_CALL_SECONDS.labels(path).observe(time.perf_counter() - started)
+        return resp.json()
+
+    async def log(self, trace_id: str, event_type: AuditEventType, payload: dict | bytes) -> AuditWriteResponse:
+        body = encode_event(trace_id, event_type, datetime.now(timezone.utc), payload)
+        return AuditWriteResponse(**await self._post("/audit/log", body))
+
+    async def log_many(self, events: list[AuditWriteRequest | bytes]) -> list[AuditWriteResponse]:
+        """
+        Write events in one request; audit-mcp persists them atomically, in order.
+        Events may be AuditWriteRequest models or bodies from `encode_event`.
+        """
+        if not events:
+            return []
+        body = b'{"events":' + json_array(e if isinstance(e, bytes) else dumps(e) for e in events) + b"}"
+        return AuditWriteBatchResponse(**await self._post("/audit/log/batch", body)).results
+
+    def batch(self, trace_id: str) -> "AuditBatch":
+        return AuditBatch(self, trace_id)
+
+
+class AuditBatch:
+    """
+    Events for one request, sent together when the `async with` block exits.
+
+    Timestamps are taken when each event is added, so ordering and timing
+    match individual writes. Events are flushed even when the block raises,
+    so a failed request still leaves its trail; if the block succeeded but the
+    flush fails, the error propagates (fail-closed).
+    """
+
+    def __init__(self, client: AuditClient, trace_id: str):
+        self.client = client
+        self.trace_id = trace_id
+        self.events: list[bytes] = []
+        self.results: list[AuditWriteResponse] = []
+
+    def add(self, event_type: AuditEventType, payload: dict | bytes) -> int:
+        """
+        Queue an event, serialized now; returns its index into `results` after the flush.
+        `payload` may be a dict or pre-serialized JSON bytes.
+        """
+        self.events.append(encode_event(self.trace_id, event_type, datetime.now(timezone.utc), payload))
+        return len(self.events) - 1
+
+    async def flush(self) -> list[AuditWriteResponse]:
+        pending, self.events = self.events, []
+        self.results.extend(await self.client.log_many(pending))
+        return self.results
+
+    async def __aenter__(self) -> "AuditBatch":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.flush()
+            return
+        try:
+            await self.flush()
+        except Exception as e:
+            log.error("[AUDIT BATCH FLUSH FAILED] %s", {"trace_id": self.trace_id, "error": str(e)})
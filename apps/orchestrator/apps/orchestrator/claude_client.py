@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import copy
 import json
+import time
+from collections import deque
 from typing import Any
 from anthropic import AsyncAnthropic
+from .advisory_cache import AdvisoryCache, advisory_cache_key, is_cacheable
 from .config import settings
+from shared import instrumentation, tracing
+
+ADVISORY_SECONDS = instrumentation.histogram(
+    "aitdp_orchestrator_advisory_seconds",
+    "generate_advisory latency by outcome (model, cache, coalesced, error, cancelled)",
+    ["source"],
+)
 
 
 class AdvisoryParseError(Exception):
@@ -38,10 +50,10 @@ Produce an advisory that matches this exact schema:
 }}
 
 Trade:
-{json.dumps(trade, indent=2)}
+{json.dumps(trade, indent=2, sort_keys=True)}
 
 Risk Result:
-{json.dumps(risk_result, indent=2)}
+{json.dumps(risk_result, indent=2, sort_keys=True)}
 """
 
 
@@ -63,31 +75,248 @@ def extract_json_object(text: str) -> str:
     return text[start : end + 1]
 
 
+def deadline_advisory() -> dict[str, Any]:
+    return {
+        "recommendation": "caution",
+        "rationale": "Advisory unavailable: model deadline exceeded",
+        "risk_flags": ["advisory_error"],
+        "confidence": 0.0,
+        "suggested_next_steps": ["review_manually"],
+        "model": "claude",
+        "model_version": "error",
+    }
+
+
+class LatencyWindow:
+    """Recent successful primary-model latencies, used to place the hedge at ~p95."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.samples: deque[float] = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
 class ClaudeClient:
-    def __init__(self) -> None:
+    def __init__(self, cache: AdvisoryCache | None = None) -> None:
         if not settings.anthropic_api_key:
             raise RuntimeError("ANTHROPIC_API_KEY not set")
 
-        self.client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        self.client = AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            base_url=settings.anthropic_base_url,
+        )
+        self.cache = cache
+        self.primary_latency = LatencyWindow()
+
+        # Single-flight: one shared model call per advisory key while it is in flight.
+        self._inflight: dict[str, asyncio.Task] = {}
+        # Caps parallel model calls so a burst queues here instead of hitting rate limits.
+        self._limiter = asyncio.Semaphore(settings.claude_max_concurrency)
+
+        self.calls = 0
+        self.coalesced = 0
+        self.waiting = 0
+        self.active = 0
+        self.max_waiting = 0
+        self.hedges = 0
+        self.fallback_wins = 0
+        self.deadline_exceeded = 0
 
-    async def generate_advisory(
+    async def generate_advisory(self, payload: dict, risk_result: dict) -> dict[str, Any]:
+        advisory, _ = await self.generate_advisory_with_meta(payload, risk_result)
+        return advisory
+
+    async def generate_advisory_with_meta(
         self,
         payload: dict,
         risk_result: dict,
-    ) -> dict[str, Any]:
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        """
+        Returns (advisory, meta). meta records where the advisory came from
+        (model, cache or a coalesced in-flight call), which model answered,
+        whether the request was hedged, and the model latency.
+        """
+        started = time.perf_counter()
+        try:
+            advisory, meta = await self._generate(payload, risk_result)
+        except asyncio.CancelledError:
+            ADVISORY_SECONDS.labels("cancelled").observe(time.perf_counter() - started)
+            raise
+        except Exception:
+            ADVISORY_SECONDS.labels("error").observe(time.perf_counter() - started)
+            raise
+        ADVISORY_SECONDS.labels(meta["source"]).observe(time.perf_counter() - started)
+        return advisory, meta
+
+    async def _generate(self, payload: dict, risk_result: dict) -> tuple[dict[str, Any], dict[str, Any]]:
         trade = payload.get("trade") or {}
 
+        # Keys sorted: the prompt is canonical, so equal (trade, risk_result) pairs share a cache key.
         user_prompt = build_user_prompt(trade, risk_result)
 
-        resp = await self.client.messages.create(
-            model=settings.claude_primary_model,
-            system=SYSTEM_PROMPT,
-            max_tokens=400,
-            temperature=0,
-            messages=[
-                {"role": "user", "content": user_prompt},
-            ],
-        )
+        key = advisory_cache_key(settings.claude_primary_model, user_prompt)
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached, {"source": "cache", "model": cached.get("model_version")}
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, user_prompt), name=f"advisory:{key[:12]}")
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            source = "model"
+        else:
+            self.coalesced += 1
+            source = "coalesced"
+
+        # shield: a caller giving up (e.g. its latency budget) must not cancel the call others share.
+        advisory, meta = await asyncio.shield(task)
+        return copy.deepcopy(advisory), {**meta, "source": source}
+
+    async def _fetch(self, key: str, user_prompt: str) -> tuple[dict[str, Any], dict[str, Any]]:
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._limiter.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.calls += 1
+        try:
+            advisory, meta = await self._hedged_call(user_prompt)
+        finally:
+            self.active -= 1
+            self._limiter.release()
+
+        # The key names the primary model; a fallback (or deadline) answer must not be served under it.
+        if self.cache is not None and meta["model"] == settings.claude_primary_model:
+            await self.cache.put(key, advisory)
+        return advisory, meta
+
+    def hedge_delay(self) -> float:
+        """p95 of recent primary latencies, clamped; the configured delay until there are enough samples."""
+        observed = self.primary_latency.quantile(settings.claude_hedge_percentile / 100)
+        delay = settings.claude_hedge_delay_seconds if observed is None else observed
+        return max(settings.claude_hedge_min_delay_seconds, min(delay, settings.claude_deadline_seconds))
+
+    async def _timed_call(self, model: str, user_prompt: str) -> tuple[str, float, dict[str, Any]]:
+        started = time.perf_counter()
+        advisory = await self._call_model(user_prompt, model)
+        elapsed = time.perf_counter() - started
+        if model == settings.claude_primary_model and is_cacheable(advisory):
+            self.primary_latency.add(elapsed)
+        return model, elapsed, advisory
+
+    async def _hedged_call(self, user_prompt: str) -> tuple[dict[str, Any], dict[str, Any]]:
+        """
+        Call the primary model; if it has not produced a valid advisory within
+        hedge_delay(), also call the fallback model and take the first valid
+        answer. Past claude_deadline_seconds, return the fail-closed caution
+        advisory. Losing calls are cancelled.
+        """
+        started = time.perf_counter()
+        deadline = started + settings.claude_deadline_seconds
+        primary = settings.claude_primary_model
+        fallback = settings.claude_fallback_model
+        hedge_at = started + self.hedge_delay()
+        can_hedge = settings.claude_hedge_enabled and fallback and fallback != primary
+
+        pending = {asyncio.create_task(self._timed_call(primary, user_prompt))}
+        hedged = False
+        last_result: tuple[str, float, dict[str, Any]] | None = None
+        last_error: BaseException | None = None
+
+        try:
+            while pending:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                wake_at = deadline if hedged or not can_hedge else min(hedge_at, deadline)
+                done, pending = await asyncio.wait(
+                    pending, timeout=wake_at - now, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if is_cacheable(result[2]):
+                        return self._settle(result, hedged, started)
+                    last_result = result
+
+                # Hedge on the delay, or right away once the primary has failed.
+                if can_hedge and not hedged and (time.perf_counter() >= hedge_at or not pending):
+                    hedged = True
+                    self.hedges += 1
+                    pending.add(asyncio.create_task(self._timed_call(fallback, user_prompt)))
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if pending or time.perf_counter() >= deadline:
+            self.deadline_exceeded += 1
+            return deadline_advisory(), {
+                "model": None,
+                "hedged": hedged,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "deadline_exceeded": True,
+            }
+        if last_result is not None:
+            return self._settle(last_result, hedged, started)
+        raise last_error
+
+    def _settle(
+        self, result: tuple[str, float, dict[str, Any]], hedged: bool, started: float
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        model, elapsed, advisory = result
+        if model != settings.claude_primary_model:
+            self.fallback_wins += 1
+        return advisory, {
+            "model": model,
+            "hedged": hedged,
+            "model_latency_ms": round(elapsed * 1000, 1),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "deadline_exceeded": False,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "model_calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight_keys": len(self._inflight),
+            "active_calls": self.active,
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "max_concurrency": settings.claude_max_concurrency,
+            "hedges": self.hedges,
+            "fallback_wins": self.fallback_wins,
+            "deadline_exceeded": self.deadline_exceeded,
+            "hedge_delay_seconds": round(self.hedge_delay(), 4),
+        }
+
+    async def _call_model(self, user_prompt: str, model: str) -> dict[str, Any]:
+        with tracing.span("model.call", "client", model=model):
+            resp = await self.client.messages.create(
+                model=model,
+                system=SYSTEM_PROMPT,
+                max_tokens=400,
+                temperature=0,
+                messages=[
+                    {"role": "user", "content": user_prompt},
+                ],
+            )
 
         # Fail closed on unexpected or empty responses
         if not resp.content or resp.content[0].type != "text":
@@ -135,5 +364,5 @@ class ClaudeClient:
         )
 
         advisory["model"] = "claude"
-        advisory["model_version"] = settings.claude_primary_model
+        advisory["model_version"] = model
         return advisory
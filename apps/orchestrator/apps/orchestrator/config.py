@@ -17,11 +17,63 @@ class Settings(BaseModel):
         "http://audit-mcp:8020"
     )
 
+    audit_timeout_seconds: float = float(get_env(
+        "AUDIT_MCP_TIMEOUT_SECONDS",
+        "10"
+    ))
+
+    audit_connect_timeout_seconds: float = float(get_env(
+        "AUDIT_MCP_CONNECT_TIMEOUT_SECONDS",
+        "1"
+    ))
+
+    audit_max_connections: int = int(get_env(
+        "AUDIT_MCP_MAX_CONNECTIONS",
+        "200"
+    ))
+
+    audit_max_keepalive: int = int(get_env(
+        "AUDIT_MCP_MAX_KEEPALIVE",
+        "50"
+    ))
+
     risk_mcp_base_url: str = get_env(
         "RISK_MCP_BASE_URL",
         "http://risk-mcp:8020"
     )
 
+    # Whole-call deadline for one risk evaluation; the decision fails closed past it.
+    risk_timeout_seconds: float = float(get_env(
+        "RISK_MCP_TIMEOUT_SECONDS",
+        "5"
+    ))
+
+    risk_connect_timeout_seconds: float = float(get_env(
+        "RISK_MCP_CONNECT_TIMEOUT_SECONDS",
+        "1"
+    ))
+
+    # How long a request may wait for a free pooled connection.
+    risk_pool_timeout_seconds: float = float(get_env(
+        "RISK_MCP_POOL_TIMEOUT_SECONDS",
+        "2"
+    ))
+
+    risk_max_connections: int = int(get_env(
+        "RISK_MCP_MAX_CONNECTIONS",
+        "200"
+    ))
+
+    risk_max_keepalive: int = int(get_env(
+        "RISK_MCP_MAX_KEEPALIVE",
+        "50"
+    ))
+
+    risk_keepalive_seconds: float = float(get_env(
+        "RISK_MCP_KEEPALIVE_SECONDS",
+        "30"
+    ))
+
     
     require_trace_id: bool = get_env(
         "ORCH_REQUIRE_TRACE_ID", 
@@ -32,6 +84,45 @@ class Settings(BaseModel):
         "ANTHROPIC_API_KEY"
     )
 
+    # Override the API endpoint, e.g. to point at bench/fake_anthropic.py.
+    anthropic_base_url: str | None = get_env(
+        "ANTHROPIC_BASE_URL",
+        ""
+    ) or None
+
+    # Longest the advisory may take before it is recorded as failed; never blocks the decision beyond this.
+    advisory_budget_seconds: float = float(get_env(
+        "ADVISORY_BUDGET_SECONDS",
+        "3"
+    ))
+
+    advisory_cache_enabled: bool = get_env(
+        "ADVISORY_CACHE_ENABLED",
+        "true"
+    ).lower() == "true"
+
+    advisory_cache_max_entries: int = int(get_env(
+        "ADVISORY_CACHE_MAX_ENTRIES",
+        "10000"
+    ))
+
+    advisory_cache_ttl_seconds: float = float(get_env(
+        "ADVISORY_CACHE_TTL_SECONDS",
+        "3600"
+    ))
+
+    # Optional shared second tier (e.g. on a volume all workers mount); empty disables it.
+    advisory_cache_sqlite_path: str | None = get_env(
+        "ADVISORY_CACHE_SQLITE_PATH",
+        ""
+    ) or None
+
+    # Parallel model calls per process; further distinct advisories wait in line.
+    claude_max_concurrency: int = int(get_env(
+        "CLAUDE_MAX_CONCURRENCY",
+        "16"
+    ))
+
     claude_primary_model: str = get_env(
         "CLAUDE_PRIMARY_MODEL",
         "claude-3-haiku-20240307"
@@ -41,6 +132,67 @@ class Settings(BaseModel):
         "CLAUDE_FALLBACK_MODEL",
         "claude-3-5-haiku-20241022"
     )
+
+    # Past this, the client returns the fail-closed caution advisory. Keep it under ADVISORY_BUDGET_SECONDS.
+    claude_deadline_seconds: float = float(get_env(
+        "CLAUDE_DEADLINE_SECONDS",
+        "2.5"
+    ))
+
+    claude_hedge_enabled: bool = get_env(
+        "CLAUDE_HEDGE_ENABLED",
+        "true"
+    ).lower() == "true"
+
+    # Hedge after this percentile of recent primary latencies...
+    claude_hedge_percentile: float = float(get_env(
+        "CLAUDE_HEDGE_PERCENTILE",
+        "95"
+    ))
+
+    # ...or after this fixed delay until enough latencies have been observed.
+    claude_hedge_delay_seconds: float = float(get_env(
+        "CLAUDE_HEDGE_DELAY_SECONDS",
+        "1.0"
+    ))
+
+    claude_hedge_min_delay_seconds: float = float(get_env(
+        "CLAUDE_HEDGE_MIN_DELAY_SECONDS",
+        "0.05"
+    ))
+
+    # Span export: empty (off), an NDJSON file path, or an OTLP/HTTP JSON URL.
+    trace_export: str = get_env(
+        "TRACE_EXPORT",
+        ""
+    )
+
+    trace_ring_size: int = int(get_env(
+        "TRACE_RING_SIZE",
+        "10000"
+    ))
+
+    trace_export_interval_seconds: float = float(get_env(
+        "TRACE_EXPORT_INTERVAL_SECONDS",
+        "1.0"
+    ))
+
+    # /debug/profile sampling profiler; off unless enabled. In prod it also needs ADMIN_TOKEN.
+    profiler_enabled: bool = get_env(
+        "PROFILER_ENABLED",
+        "false"
+    ).lower() == "true"
+
+    # Always-on low-rate sampling (0 = off), served at /debug/profile/continuous.
+    profiler_continuous_hz: float = float(get_env(
+        "PROFILER_CONTINUOUS_HZ",
+        "0"
+    ))
+
+    admin_token: str = get_env(
+        "ADMIN_TOKEN",
+        ""
+    )
     
 settings = Settings()
 
@@ -0,0 +1,266 @@
+"""
+Offline re-scoring of historical advisories.
+
+Streams ADVISORY_GENERATED events from audit-mcp's NDJSON export (or a saved
+export file), re-runs the current advisory evals on each stored
+advisory/risk_result, and aggregates pass/fail per check, per model
+version and per day. It also counts advisories whose overall verdict changed
+from the one recorded at the time.
+
+The reader sends raw NDJSON lines to a process pool in fixed-size chunks and
+keeps only a bounded number of chunks in flight. Workers parse, evaluate and
+return partial aggregates. Memory stays flat however many months are
+replayed; only the aggregates grow, with the number of days and model
+versions.
+
+    python -m apps.orchestrator.eval_replay --audit-url http://localhost:8010 \\
+        --start 2026-01-01 --end 2026-07-01 [--workers 8] [--output replay.json]
+    python -m apps.orchestrator.eval_replay --file export.ndjson
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, Optional
+
+import httpx
+
+from shared.schemas.audit import AuditEventType
+
+from .evals import run_advisory_evals
+
+EXPORT_PAGE_SIZE = 10_000
+
+
+def iter_export_lines(
+    audit_url: str,
+    start: datetime,
+    end: datetime,
+    page_size: int = EXPORT_PAGE_SIZE,
+    timeout: float = 60.0,
+) -> Iterator[str]:
+    """
+    Yield ADVISORY_GENERATED lines from GET /audit/export, one page per request.
+
+    Pages are chained with the export's `next_cursor`, so a dropped connection
+    only costs the current page.
+    """
+    params: dict[str, Any] = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "event_type": AuditEventType.ADVISORY_GENERATED.value,
+        "limit": page_size,
+    }
+    with httpx.Client(base_url=audit_url, timeout=timeout) as client:
+        while True:
+            next_cursor = None
+            with client.stream("GET", "/audit/export", params=params) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    if line.startswith('{"next_cursor"'):
+                        next_cursor = json.loads(line)["next_cursor"]
+                        continue
+                    yield line
+            if next_cursor is None:
+                return
+            params["cursor"] = next_cursor
+
+
+def iter_file_lines(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def _empty_bucket() -> dict[str, Any]:
+    return {"total": 0, "passed": 0, "checks": {}}
+
+
+def _add_report(bucket: dict[str, Any], report: dict[str, Any]) -> None:
+    bucket["total"] += 1
+    bucket["passed"] += report["passed"]
+    for name, result in report["checks"].items():
+        counts = bucket["checks"].setdefault(name, {"pass": 0, "fail": 0})
+        counts["pass" if result["status"] == "pass" else "fail"] += 1
+
+
+def _merge_bucket(into: dict[str, Any], part: dict[str, Any]) -> None:
+    into["total"] += part["total"]
+    into["passed"] += part["passed"]
+    for name, counts in part["checks"].items():
+        target = into["checks"].setdefault(name, {"pass": 0, "fail": 0})
+        target["pass"] += counts["pass"]
+        target["fail"] += counts["fail"]
+
+
+def _empty_totals() -> dict[str, Any]:
+    return {
+        "events": 0,
+        "skipped": {},
+        "overall": _empty_bucket(),
+        "by_model_version": {},
+        "by_day": {},
+        "verdict_changes": {"pass_to_fail": 0, "fail_to_pass": 0},
+    }
+
+
+def _replay_chunk(lines: list[str]) -> dict[str, Any]:
+    """Worker: evaluate one chunk of export lines and return its partial aggregates."""
+    totals = _empty_totals()
+    skipped = totals["skipped"]
+
+    for line in lines:
+        totals["events"] += 1
+        try:
+            event = json.loads(line)
+        except ValueError:
+            skipped["unparseable"] = skipped.get("unparseable", 0) + 1
+            continue
+
+        if event.get("event_type") != AuditEventType.ADVISORY_GENERATED.value:
+            skipped["other_event_type"] = skipped.get("other_event_type", 0) + 1
+            continue
+        payload = event.get("payload") or {}
+        advisory = payload.get("advisory")
+        if not isinstance(advisory, dict):
+            # Failed or over-budget advisories are recorded with advisory=None.
+            skipped["no_advisory"] = skipped.get("no_advisory", 0) + 1
+            continue
+
+        report = run_advisory_evals(advisory, payload.get("risk_result") or {})
+        model_version = str(advisory.get("model_version") or "unknown")
+        day = str(event.get("timestamp", ""))[:10] or "unknown"
+
+        _add_report(totals["overall"], report)
+        _add_report(totals["by_model_version"].setdefault(model_version, _empty_bucket()), report)
+        _add_report(totals["by_day"].setdefault(day, _empty_bucket()), report)
+
+        recorded = (payload.get("evals") or {}).get("passed")
+        if recorded is True and not report["passed"]:
+            totals["verdict_changes"]["pass_to_fail"] += 1
+        elif recorded is False and report["passed"]:
+            totals["verdict_changes"]["fail_to_pass"] += 1
+
+    return totals
+
+
+def _merge_totals(into: dict[str, Any], part: dict[str, Any]) -> None:
+    into["events"] += part["events"]
+    for reason, n in part["skipped"].items():
+        into["skipped"][reason] = into["skipped"].get(reason, 0) + n
+    _merge_bucket(into["overall"], part["overall"])
+    for key in ("by_model_version", "by_day"):
+        for name, bucket in part[key].items():
+            _merge_bucket(into[key].setdefault(name, _empty_bucket()), bucket)
+    for change, n in part["verdict_changes"].items():
+        into["verdict_changes"][change] += n
+
+
+def _chunks(lines: Iterator[str], size: int) -> Iterator[list[str]]:
+    chunk: list[str] = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _with_rates(bucket: dict[str, Any]) -> dict[str, Any]:
+    total = bucket["total"]
+    return {
+        **bucket,
+        "pass_rate": round(bucket["passed"] / total, 4) if total else None,
+        "checks": {
+            name: {**counts, "fail_rate": round(counts["fail"] / total, 4) if total else None}
+            for name, counts in sorted(bucket["checks"].items())
+        },
+    }
+
+
+def run_replay(
+    lines: Iterator[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 2_000,
+    max_inflight: Optional[int] = None,
+) -> dict[str, Any]:
+    """
+    Re-score every advisory in `lines` (export NDJSON) and return aggregates.
+
+    At most `max_inflight` chunks (default 2 per worker) are buffered or being
+    evaluated at a time.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    max_inflight = max_inflight or workers * 2
+    totals = _empty_totals()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        pending: deque[Future] = deque()
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(pool.submit(_replay_chunk, chunk))
+            # Merge in submission order; this also applies backpressure to the reader.
+            while len(pending) >= max_inflight:
+                _merge_totals(totals, pending.popleft().result())
+        while pending:
+            _merge_totals(totals, pending.popleft().result())
+
+    seconds = time.perf_counter() - started
+    return {
+        "events": totals["events"],
+        "evaluated": totals["overall"]["total"],
+        "skipped": totals["skipped"],
+        "verdict_changes": totals["verdict_changes"],
+        "overall": _with_rates(totals["overall"]),
+        "by_model_version": {k: _with_rates(v) for k, v in sorted(totals["by_model_version"].items())},
+        "by_day": {k: _with_rates(v) for k, v in sorted(totals["by_day"].items())},
+        "seconds": round(seconds, 3),
+        "events_per_second": round(totals["events"] / seconds, 1) if seconds else 0.0,
+    }
+
+
+def _parse_time(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-run advisory evals over audit history.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--audit-url", help="audit-mcp base URL to stream /audit/export from")
+    source.add_argument("--file", help="NDJSON file previously saved from /audit/export")
+    parser.add_argument("--start", default="1970-01-01", help="Inclusive start (ISO date/time, UTC if naive)")
+    parser.add_argument("--end", default=None, help="Exclusive end (default: tomorrow)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=2_000)
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if args.file:
+        lines = iter_file_lines(args.file)
+    else:
+        end = _parse_time(args.end) if args.end else datetime.now(timezone.utc) + timedelta(days=1)
+        lines = iter_export_lines(args.audit_url, _parse_time(args.start), end)
+
+    report = run_replay(lines, workers=args.workers, chunk_size=args.chunk_size)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from typing import Any
+import re
+import time
+from collections import Counter
+from typing import Any, Callable, Iterable, Optional
+
+from shared import instrumentation
 
 
 REQUIRED_FIELDS: dict[str, type] = {
@@ -15,34 +20,161 @@ REQUIRED_FIELDS: dict[str, type] = {
 
 ALLOWED_RECOMMENDATIONS = {"proceed", "caution", "reject"}
 
+# A policy ref is a token starting with 'RISK-', where tokens are separated by whitespace, ',' or '.'.
+# The pattern starts with the literal so the regex engine can skip ahead; matches that begin
+# mid-token are dropped in policy_refs().
+POLICY_REF_RE = re.compile(r"RISK-[^\s,.]*")
 
-def run_advisory_evals(advisory: dict[str, Any], risk_result: dict[str, Any]) -> dict[str, Any]:
-    """
-    Returns a structured eval report. Never raises.
-    """
-    checks: dict[str, dict[str, Any]] = {}
+EVALS_SECONDS = instrumentation.histogram("aitdp_orchestrator_evals_seconds", "run_advisory_evals latency")
+EVALS = instrumentation.counter("aitdp_orchestrator_evals_total", "Advisory eval reports by overall verdict", ["passed"])
 
-    try:
-        checks["schema"] = _check_schema(advisory)
-        checks["recommendation"] = _check_recommendation(advisory)
-        checks["confidence"] = _check_confidence(advisory)
-        checks["length_limits"] = _check_length_limits(advisory)
-        checks["no_override"] = _check_no_policy_override(advisory, risk_result)
-        checks["hallucination"] = _check_no_fabricated_policy_refs(advisory, risk_result)
+Check = Callable[[dict[str, Any], dict[str, Any]], dict[str, Any]]
 
-        passed = all(v["status"] == "pass" for v in checks.values())
 
-        return {
+class EvalRegistry:
+    """
+    Ordered set of named advisory checks.
+
+    Each check takes (advisory, risk_result) and returns a _pass/_fail dict.
+    The registry times every check it runs and keeps running totals, so a
+    slow or newly added check shows up in `stats()` without extra wiring.
+    """
+
+    def __init__(self) -> None:
+        self._checks: dict[str, Check] = {}
+        # Per check: [calls, total_ns, max_ns]. Kept beside the callable so the hot loop
+        # does a single list update per check.
+        self._timings: dict[str, list[int]] = {}
+        self._plan: tuple[tuple[str, Check, list[int]], ...] = ()
+
+    def register(self, name: str, fn: Optional[Check] = None):
+        """Add (or replace) a check; usable as `@registry.register("name")`."""
+        def add(check: Check) -> Check:
+            self._checks[name] = check
+            self._timings.setdefault(name, [0, 0, 0])
+            self._compile()
+            return check
+
+        return add(fn) if fn is not None else add
+
+    def unregister(self, name: str) -> None:
+        self._checks.pop(name, None)
+        self._compile()
+
+    def _compile(self) -> None:
+        self._plan = tuple((name, check, self._timings[name]) for name, check in self._checks.items())
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._checks)
+
+    def evaluate(self, advisory: dict[str, Any], risk_result: dict[str, Any], *, timings: bool = False) -> dict[str, Any]:
+        """
+        Returns a structured eval report. Never raises.
+
+        With `timings=True` the report also carries per-check `timings_us`.
+        """
+        checks: dict[str, dict[str, Any]] = {}
+        elapsed_ns: dict[str, int] = {}
+        passed = True
+        clock = time.perf_counter_ns
+
+        try:
+            mark = clock()
+            for name, check, stat in self._plan:
+                result = check(advisory, risk_result)
+                now = clock()
+                ns = now - mark
+                mark = now
+                checks[name] = result
+                passed = passed and result["status"] == "pass"
+                stat[0] += 1
+                stat[1] += ns
+                if ns > stat[2]:
+                    stat[2] = ns
+                if timings:
+                    elapsed_ns[name] = ns
+
+            report = {
+                "passed": passed,
+                "checks": checks,
+            }
+
+        except Exception as e:
+            # Fail safe: if eval code itself breaks, report it (do NOT crash request).
+            report = {
+                "passed": False,
+                "checks": checks,
+                "error": f"eval_runner_exception: {type(e).__name__}: {e}",
+            }
+
+        if timings:
+            report["timings_us"] = {name: round(ns / 1000, 2) for name, ns in elapsed_ns.items()}
+        return report
+
+    def evaluate_batch(
+        self,
+        items: Iterable[tuple[dict[str, Any], dict[str, Any]]],
+        *,
+        keep_reports: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Evaluate many (advisory, risk_result) pairs, e.g. for offline regression runs.
+
+        Returns pass/fail counts overall and per check, failure reasons, and
+        per-check timing totals for this batch. Reports are included only
+        with `keep_reports=True`.
+        """
+        total = passed = runner_errors = 0
+        failures: Counter = Counter()
+        reasons: dict[str, Counter] = {}
+        batch_ns: Counter = Counter()
+        reports = []
+
+        started = time.perf_counter()
+        for advisory, risk_result in items:
+            report = self.evaluate(advisory, risk_result, timings=True)
+            total += 1
+            passed += report["passed"]
+            runner_errors += "error" in report
+            for name, result in report["checks"].items():
+                if result["status"] != "pass":
+                    failures[name] += 1
+                    reasons.setdefault(name, Counter())[result.get("reason")] += 1
+            for name, us in report.pop("timings_us").items():
+                batch_ns[name] += int(us * 1000)
+            if keep_reports:
+                reports.append(report)
+        elapsed = time.perf_counter() - started
+
+        summary = {
+            "total": total,
             "passed": passed,
-            "checks": checks,
+            "failed": total - passed,
+            "runner_errors": runner_errors,
+            "failures_by_check": dict(failures),
+            "reasons_by_check": {name: dict(c) for name, c in reasons.items()},
+            "timings_us": {
+                name: {"total": round(ns / 1000, 1), "mean": round(ns / 1000 / total, 2)}
+                for name, ns in batch_ns.items()
+            },
+            "elapsed_seconds": round(elapsed, 4),
+            "advisories_per_second": round(total / elapsed, 1) if elapsed else 0.0,
         }
+        if keep_reports:
+            summary["reports"] = reports
+        return summary
 
-    except Exception as e:
-        # Fail safe: if eval code itself breaks, report it (do NOT crash request).
+    def stats(self) -> dict[str, Any]:
         return {
-            "passed": False,
-            "checks": checks,
-            "error": f"eval_runner_exception: {type(e).__name__}: {e}",
+            "checks": {
+                name: {
+                    "calls": calls,
+                    "mean_us": round(total_ns / calls / 1000, 2) if calls else 0.0,
+                    "max_us": round(max_ns / 1000, 2),
+                }
+                for name, (calls, total_ns, max_ns) in ((n, self._timings[n]) for n in self._checks)
+            }
         }
 
 
@@ -54,46 +186,46 @@ def _fail(reason: str, details: dict[str, Any] | None = None) -> dict[str, Any]:
     return {"status": "fail", "reason": reason, "details": details or {}}
 
 
-def _check_schema(advisory: dict[str, Any]) -> dict[str, Any]:
-    missing = []
-    type_errors = []
+def compile_schema_check(required: dict[str, Any], string_lists: tuple[str, ...]) -> Check:
+    """Build a schema check for `required` once, instead of re-deriving it per advisory."""
+    fields = tuple((field, expected, str(expected)) for field, expected in required.items())
 
-    for field, expected_type in REQUIRED_FIELDS.items():
-        if field not in advisory:
-            missing.append(field)
-            continue
+    def check_schema(advisory: dict[str, Any], _risk_result: dict[str, Any]) -> dict[str, Any]:
+        # Fast path: one lookup per field; a missing field reads as None and fails isinstance.
+        for field, expected, _ in fields:
+            if not isinstance(advisory.get(field), expected):
+                return _explain(advisory)
 
-        val = advisory[field]
-        if isinstance(expected_type, tuple):
-            ok = isinstance(val, expected_type)
-        else:
-            ok = isinstance(val, expected_type)
+        # Ensure list fields contain strings (soft requirement but valuable)
+        for lf in string_lists:
+            if any(not isinstance(x, str) for x in advisory[lf]):
+                return _fail("list_items_must_be_strings", {"field": lf})
 
-        if not ok:
-            type_errors.append({"field": field, "expected": str(expected_type), "actual": type(val).__name__})
+        return _pass()
 
-    if missing:
-        return _fail("missing_required_fields", {"missing": missing})
+    def _explain(advisory: dict[str, Any]) -> dict[str, Any]:
+        missing = [field for field, _, _ in fields if field not in advisory]
+        if missing:
+            return _fail("missing_required_fields", {"missing": missing})
 
-    if type_errors:
+        type_errors = [
+            {"field": field, "expected": expected_name, "actual": type(advisory[field]).__name__}
+            for field, expected, expected_name in fields
+            if not isinstance(advisory[field], expected)
+        ]
         return _fail("type_mismatch", {"errors": type_errors})
 
-    # Ensure list fields contain strings (soft requirement but valuable)
-    for lf in ("risk_flags", "suggested_next_steps"):
-        if any(not isinstance(x, str) for x in advisory.get(lf, [])):
-            return _fail("list_items_must_be_strings", {"field": lf})
-
-    return _pass()
+    return check_schema
 
 
-def _check_recommendation(advisory: dict[str, Any]) -> dict[str, Any]:
+def _check_recommendation(advisory: dict[str, Any], _risk_result: dict[str, Any]) -> dict[str, Any]:
     rec = advisory.get("recommendation")
     if rec not in ALLOWED_RECOMMENDATIONS:
         return _fail("invalid_recommendation", {"allowed": sorted(ALLOWED_RECOMMENDATIONS), "got": rec})
     return _pass()
 
 
-def _check_confidence(advisory: dict[str, Any]) -> dict[str, Any]:
+def _check_confidence(advisory: dict[str, Any], _risk_result: dict[str, Any]) -> dict[str, Any]:
     conf = advisory.get("confidence")
     try:
         conf_f = float(conf)
@@ -105,7 +237,7 @@ def _check_confidence(advisory: dict[str, Any]) -> dict[str, Any]:
     return _pass()
 
 
-def _check_length_limits(advisory: dict[str, Any]) -> dict[str, Any]:
+def _check_length_limits(advisory: dict[str, Any], _risk_result: dict[str, Any]) -> dict[str, Any]:
     rationale = advisory.get("rationale", "")
     if len(rationale) > 500:
         return _fail("rationale_too_long", {"max": 500, "got": len(rationale)})
@@ -131,19 +263,22 @@ def _check_no_policy_override(advisory: dict[str, Any], risk_result: dict[str, A
     return _pass()
 
 
+def policy_refs(text: str) -> list[str]:
+    if "RISK-" not in text:
+        return []
+    return [
+        m.group()
+        for m in POLICY_REF_RE.finditer(text)
+        if m.start() == 0 or text[m.start() - 1] in ",." or text[m.start() - 1].isspace()
+    ]
+
+
 def _check_no_fabricated_policy_refs(advisory: dict[str, Any], risk_result: dict[str, Any]) -> dict[str, Any]:
     """
     Very lightweight hallucination guard:
     If rationale mentions a policy id (e.g. 'RISK-...'), it must match risk_result policy_id (if present).
     """
-    rationale = advisory.get("rationale", "")
-    mentioned = []
-
-    # Simple scan: look for tokens that start with 'RISK-'
-    for token in rationale.replace(",", " ").replace(".", " ").split():
-        if token.startswith("RISK-"):
-            mentioned.append(token)
-
+    mentioned = policy_refs(advisory.get("rationale", ""))
     if not mentioned:
         return _pass()
 
@@ -156,3 +291,29 @@ def _check_no_fabricated_policy_refs(advisory: dict[str, Any], risk_result: dict
         return _fail("fabricated_or_unexpected_policy_refs", {"mentioned": mentioned, "allowed": sorted(allowed)})
 
     return _pass()
+
+
+default_registry = EvalRegistry()
+default_registry.register("schema", compile_schema_check(REQUIRED_FIELDS, ("risk_flags", "suggested_next_steps")))
+default_registry.register("recommendation", _check_recommendation)
+default_registry.register("confidence", _check_confidence)
+default_registry.register("length_limits", _check_length_limits)
+default_registry.register("no_override", _check_no_policy_override)
+default_registry.register("hallucination", _check_no_fabricated_policy_refs)
+
+
+def run_advisory_evals(advisory: dict[str, Any], risk_result: dict[str, Any]) -> dict[str, Any]:
+    """
+    Returns a structured eval report. Never raises.
+    """
+    started = time.perf_counter()
+    report = default_registry.evaluate(advisory, risk_result)
+    EVALS_SECONDS.observe(time.perf_counter() - started)
+    EVALS.labels("true" if report["passed"] else "false").inc()
+    return report
+
+
+def run_advisory_evals_batch(
+    items: Iterable[tuple[dict[str, Any], dict[str, Any]]], *, keep_reports: bool = False
+) -> dict[str, Any]:
+    return default_registry.evaluate_batch(items, keep_reports=keep_reports)
@@ -1,24 +1,71 @@
-from fastapi import FastAPI, Header, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Response
+from shared import instrumentation, tracing
+from shared.profiler import Profiler, debug_router
 from shared.schemas.trade import TradeRecommendationRequest, TradeRecommendationResponse, ComplianceResult, RiskFlag
 from shared.schemas.audit import AuditEventType
+from shared.schemas.serialization import serialize
 from .config import settings
 from .audit_client import AuditClient
+from .pipeline import Pipeline
+from .risk_client import RiskClient
 import uuid
-import requests
-from .evals import run_advisory_evals
+from .evals import default_registry as eval_registry, run_advisory_evals
 from .claude_client import ClaudeClient
+from .advisory_cache import AdvisoryCache
 
-RISK_MCP_BASE_URL = settings.risk_mcp_base_url
+STAGE_SECONDS = instrumentation.histogram(
+    "aitdp_orchestrator_stage_seconds", "trade_decision pipeline stage durations", ["stage"]
+)
+
+tracing.configure(
+    "orchestrator",
+    settings.trace_export,
+    ring_size=settings.trace_ring_size,
+    export_interval_seconds=settings.trace_export_interval_seconds,
+)
+profiler = Profiler(continuous_hz=settings.profiler_continuous_hz if settings.profiler_enabled else 0)
 
-app = FastAPI(title="AITDP Orchestrator", version=settings.app_version)
 audit = AuditClient()
+risk = RiskClient()
+advisory_cache = AdvisoryCache(
+    max_entries=settings.advisory_cache_max_entries,
+    ttl_seconds=settings.advisory_cache_ttl_seconds,
+    sqlite_path=settings.advisory_cache_sqlite_path,
+) if settings.advisory_cache_enabled else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tracing.TRACER.start()
+    profiler.start()
+    await audit.start()
+    await risk.start()
+    yield
+    await risk.close()
+    await audit.close()
+    if advisory_cache is not None:
+        advisory_cache.close()
+    profiler.stop()
+    tracing.TRACER.stop()
+
+
+app = FastAPI(title="AITDP Orchestrator", version=settings.app_version, lifespan=lifespan)
+app.add_middleware(tracing.TracingMiddleware)
+app.include_router(debug_router(
+    profiler,
+    enabled=settings.profiler_enabled,
+    app_env=settings.app_env,
+    admin_token=settings.admin_token,
+    service="orchestrator",
+))
 
 claude: ClaudeClient | None = None
 def get_claude() -> ClaudeClient:
     global claude
 
     if claude is None:
-        claude = ClaudeClient()  # reads env vars NOW, not at import
+        claude = ClaudeClient(cache=advisory_cache)  # reads env vars NOW, not at import
 
     return claude
 
@@ -32,6 +79,26 @@ async def health():
         "env": settings.app_env
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(instrumentation.render(), media_type=instrumentation.CONTENT_TYPE)
+
+@app.get("/advisory/cache/stats")
+async def advisory_cache_stats():
+    if advisory_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **advisory_cache.stats()}
+
+@app.get("/advisory/calls/stats")
+async def advisory_call_stats():
+    if claude is None:
+        return {"initialized": False}
+    return {"initialized": True, **claude.stats()}
+
+@app.get("/evals/stats")
+async def eval_stats():
+    return eval_registry.stats()
+
 def require_trace_id(x_trace_id: str | None) -> str:
     if settings.require_trace_id and not x_trace_id:
         raise HTTPException(status_code=400, detail="Missing required header: X-Trace-Id")
@@ -40,107 +107,148 @@ def require_trace_id(x_trace_id: str | None) -> str:
 @app.post("/trade/recommendation", response_model=TradeRecommendationResponse)
 async def trade_recommendation(req: TradeRecommendationRequest, x_trace_id: str | None = Header(default=None, alias="X-Trace-Id")):
     trace_id = require_trace_id(x_trace_id)
+    tracing.bind_trace_id(trace_id)
 
-    await audit.log(trace_id, AuditEventType.REQUEST_RECEIVED, {
-        "request_id": req.request_id,
-        "actor": req.actor.model_dump(),
-        "trade": req.trade.model_dump(),
-        "intent": req.intent,
-        "as_of": req.as_of.isoformat(),
-    })
-
-    # deterministic placeholder logic
-    if req.trade.quantity > 100_000:
-        resp = TradeRecommendationResponse(
-            recommendation="escalate",
-            modified_trade=None,
-            rationale="Quantity exceeds desk threshold; escalation required.",
-            risk_flags=[RiskFlag(type="size", severity="high", evidence_ref="mock:size_gate")],
-            compliance=ComplianceResult(status="needs_review", policy_refs=["RISK-012"], evidence_refs=["mock:size_gate"]),
-            confidence=0.9,
-            next_steps=["escalate_to_risk"],
-            audit_id="pending",
-        )
-    else:
-        resp = TradeRecommendationResponse(
-            recommendation="proceed",
-            modified_trade=None,
-            rationale="Trade passes mock checks. Replace with tool-gated risk checks and Claude workflow.",
-            risk_flags=[],
-            compliance=ComplianceResult(status="pass", policy_refs=["RISK-000"], evidence_refs=["mock"]),
-            confidence=0.75,
-            next_steps=["create_execution_ticket"],
-            audit_id="pending",
-        )
+    async with audit.batch(trace_id) as events:
+        events.add(AuditEventType.REQUEST_RECEIVED, {
+            "request_id": req.request_id,
+            "actor": req.actor,
+            "trade": req.trade,
+            "intent": req.intent,
+            "as_of": req.as_of.isoformat(),
+        })
 
-    decision_evt = await audit.log(trace_id, AuditEventType.DECISION_MADE, resp.model_dump(mode="json"))
-    return resp.model_copy(update={"audit_id": decision_evt.audit_id})
+        # deterministic placeholder logic
+        if req.trade.quantity > 100_000:
+            resp = TradeRecommendationResponse(
+                recommendation="escalate",
+                modified_trade=None,
+                rationale="Quantity exceeds desk threshold; escalation required.",
+                risk_flags=[RiskFlag(type="size", severity="high", evidence_ref="mock:size_gate")],
+                compliance=ComplianceResult(status="needs_review", policy_refs=["RISK-012"], evidence_refs=["mock:size_gate"]),
+                confidence=0.9,
+                next_steps=["escalate_to_risk"],
+                audit_id="pending",
+            )
+        else:
+            resp = TradeRecommendationResponse(
+                recommendation="proceed",
+                modified_trade=None,
+                rationale="Trade passes mock checks. Replace with tool-gated risk checks and Claude workflow.",
+                risk_flags=[],
+                compliance=ComplianceResult(status="pass", policy_refs=["RISK-000"], evidence_refs=["mock"]),
+                confidence=0.75,
+                next_steps=["create_execution_ticket"],
+                audit_id="pending",
+            )
+
+        # Dumped once: the same bytes become the audit payload and the response body.
+        decision = serialize(resp, hold=("audit_id",))
+        decision_idx = events.add(AuditEventType.DECISION_MADE, decision.with_fields(audit_id="pending"))
+        # Flush before responding: the response carries the committed audit_id.
+        await events.flush()
+
+    return Response(
+        decision.with_fields(audit_id=events.results[decision_idx].audit_id), media_type="application/json"
+    )
 
 
 @app.post("/trade/decision")
-async def trade_decision(payload: dict, force_bad_advisory: bool = False):
+async def trade_decision(payload: dict, response: Response, force_bad_advisory: bool = False):
 
     trace_id = payload["trace_id"]
+    tracing.bind_trace_id(trace_id)
 
-    await audit.log(
-        trace_id,
-        AuditEventType.REQUEST_RECEIVED,
-        {
-            "source": "orchestrator",
-            "actor": payload.get("actor"),
-            "trade": payload.get("trade"),
-            "as_of": payload.get("as_of"),
-        },
-    )
-    
-    risk_result = call_risk_evaluate(payload)
+    async def log_request():
+        return await audit.log(
+            trace_id,
+            AuditEventType.REQUEST_RECEIVED,
+            {
+                "source": "orchestrator",
+                "actor": payload.get("actor"),
+                "trade": payload.get("trade"),
+                "as_of": payload.get("as_of"),
+            },
+        )
 
-    advisory = None
-    evals = None
+    async def evaluate_risk():
+        return await risk.evaluate(payload)
 
-    try:
-        client = get_claude()
-        advisory = await client.generate_advisory(payload, risk_result)
-        evals = run_advisory_evals(advisory, risk_result)
+    async def generate_advisory(risk_result):
+        try:
+            client = get_claude()
+            advisory, meta = await client.generate_advisory_with_meta(payload, risk_result)
+            return {"advisory": advisory, "evals": run_advisory_evals(advisory, risk_result), "meta": meta, "error": None}
+        except Exception as e:
+            return {"advisory": None, "evals": None, "meta": None, "error": e}
 
-    except Exception as e:
+    def advisory_over_budget():
+        error = TimeoutError(f"advisory exceeded latency budget of {settings.advisory_budget_seconds}s")
+        return {"advisory": None, "evals": None, "meta": None, "error": error}
+
+    async def log_advisory(_request_evt, risk_result, outcome):
+        async with audit.batch(trace_id) as events:
+            if outcome["error"] is not None:
+                events.add(
+                    AuditEventType.ADVISORY_FAILED,
+                    {
+                        "error_type": type(outcome["error"]).__name__,
+                        "error": str(outcome["error"]),
+                    },
+                )
+
+            events.add(
+                AuditEventType.ADVISORY_GENERATED,
+                {
+                    "advisory": outcome["advisory"],
+                    "risk_result": risk_result,
+                    "evals": outcome["evals"],
+                    "advisory_meta": outcome["meta"],
+                    "advisory_used": False,  # advisory is not authoritative (yet)
+                },
+            )
+        return events.results
+
+    async def log_decision(_request_evt, risk_result):
+        decision = "reject" if risk_result.get("result") == "reject" else "proceed"
         await audit.log(
             trace_id,
-            AuditEventType.ADVISORY_FAILED,
+            AuditEventType.DECISION_FORWARDED,
             {
-                "error_type": type(e).__name__,
-                "error": str(e),
+                "source": "orchestrator",
+                "decision": decision,
+                "risk_result": risk_result,
             },
         )
+        return decision
 
-
-    await audit.log(
-        trace_id,
-        AuditEventType.ADVISORY_GENERATED,
-        {
-            "advisory": advisory,
-            "risk_result": risk_result,
-            "evals": evals,
-            "advisory_used": False,  # advisory is not authoritative (yet)
-        },
-    )
-    
-    decision = "reject" if risk_result.get("result") == "reject" else "proceed"
-
-    await audit.log(
-        trace_id,
-        AuditEventType.DECISION_FORWARDED,
-        {
-            "source": "orchestrator",
-            "decision": decision,
-            "risk_result": risk_result,
-        },
+    # The request audit overlaps the risk call. Once risk is back, the authoritative
+    # decision is written while the advisory runs; the advisory is capped by its budget.
+    # Any failure (risk unavailable, audit write failed) fails the request closed.
+    run = await (
+        Pipeline()
+        .add("audit_request", log_request)
+        .add("risk", evaluate_risk)
+        .add(
+            "advisory",
+            generate_advisory,
+            ("risk",),
+            timeout=settings.advisory_budget_seconds,
+            on_timeout=advisory_over_budget,
+        )
+        .add("audit_advisory", log_advisory, ("audit_request", "risk", "advisory"))
+        .add("audit_decision", log_decision, ("audit_request", "risk"))
+        .run()
     )
-    
+    response.headers["Server-Timing"] = run.server_timing()
+    for name, timing in run.timings.items():
+        STAGE_SECONDS.labels(name).observe(timing.duration_ms / 1000)
+    STAGE_SECONDS.labels("total").observe(run.total_ms / 1000)
+
     return {
         "trace_id": trace_id,
-        "decision": decision,
-        "risk": risk_result,
+        "decision": run.results["audit_decision"],
+        "risk": run.results["risk"],
     }
 
 def generate_advisory_stub(
@@ -170,20 +278,3 @@ def generate_advisory_stub(
         "model": "stub",
         "model_version": "v0"
     }
-
-
-
-def call_risk_evaluate(payload: dict) -> dict:
-    try:
-        r = requests.post(
-            f"{RISK_MCP_BASE_URL}/evaluate",
-            json=payload,
-            timeout=5,
-        )
-        r.raise_for_status()
-        return r.json()
-    except requests.RequestException as e:
-        raise HTTPException(
-            status_code=503,
-            detail="Risk MCP unavailable (fail-closed)",
-        ) from e
\ No newline at end of file
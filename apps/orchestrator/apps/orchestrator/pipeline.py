@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from shared import tracing
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[..., Awaitable[Any]]
+    deps: tuple[str, ...] = ()
+    # Optional deadline for the stage's own work (not time spent waiting on deps).
+    timeout: Optional[float] = None
+    # Called instead of failing when the deadline passes; its return value becomes the result.
+    on_timeout: Optional[Callable[[], Any]] = None
+
+
+@dataclass
+class StageTiming:
+    start_ms: float
+    duration_ms: float
+    timed_out: bool = False
+
+
+@dataclass
+class PipelineRun:
+    results: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, StageTiming] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one metric per stage plus the total."""
+        parts = [
+            f'{name};dur={t.duration_ms:.1f};desc="start={t.start_ms:.1f}{" timeout" if t.timed_out else ""}"'
+            for name, t in self.timings.items()
+        ]
+        parts.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(parts)
+
+
+class Pipeline:
+    """
+    Small DAG executor for request handling.
+
+    Each stage is an async callable that receives its dependencies' results
+    as positional arguments, in the order the deps are listed. Every stage
+    starts as soon as its last dependency finishes, so independent stages
+    overlap. Stages must be added after their dependencies.
+
+    `run()` always waits for every stage to settle, so side effects that
+    started (e.g. audit writes) are never abandoned mid-flight. It then raises
+    the first failure in stage order. A stage whose dependency failed fails
+    with the same exception.
+    """
+
+    def __init__(self) -> None:
+        self.stages: dict[str, Stage] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Awaitable[Any]],
+        deps: tuple[str, ...] = (),
+        *,
+        timeout: Optional[float] = None,
+        on_timeout: Optional[Callable[[], Any]] = None,
+    ) -> "Pipeline":
+        if name in self.stages:
+            raise ValueError(f"duplicate stage: {name}")
+        missing = [d for d in deps if d not in self.stages]
+        if missing:
+            raise ValueError(f"stage {name} depends on unknown stages: {missing}")
+        self.stages[name] = Stage(name, fn, tuple(deps), timeout, on_timeout)
+        return self
+
+    async def run(self) -> PipelineRun:
+        run = PipelineRun()
+        origin = time.perf_counter()
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def execute(stage: Stage) -> Any:
+            args = [await tasks[d] for d in stage.deps]
+            started = time.perf_counter()
+            timed_out = False
+            with tracing.span(f"stage.{stage.name}") as stage_span:
+                try:
+                    if stage.timeout is None:
+                        result = await stage.fn(*args)
+                    else:
+                        try:
+                            result = await asyncio.wait_for(stage.fn(*args), stage.timeout)
+                        except asyncio.TimeoutError:
+                            if stage.on_timeout is None:
+                                raise
+                            timed_out = True
+                            stage_span.attributes["timed_out"] = True
+                            result = stage.on_timeout()
+                finally:
+                    finished = time.perf_counter()
+                    run.timings[stage.name] = StageTiming(
+                        start_ms=(started - origin) * 1000,
+                        duration_ms=(finished - started) * 1000,
+                        timed_out=timed_out,
+                    )
+            run.results[stage.name] = result
+            return result
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(execute(stage), name=f"stage:{stage.name}")
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        run.total_ms = (time.perf_counter() - origin) * 1000
+
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return run
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import time
+
+import httpx
+from fastapi import HTTPException
+from .config import settings
+from shared import instrumentation, tracing
+
+RISK_CALL_SECONDS = instrumentation.histogram("aitdp_orchestrator_risk_call_seconds", "Latency of risk-mcp /evaluate calls")
+RISK_CALL_ERRORS = instrumentation.counter(
+    "aitdp_orchestrator_risk_call_errors_total", "risk-mcp /evaluate calls that failed closed"
+)
+
+
+class RiskClient:
+    """
+    Shared async client for risk-mcp.
+
+    One long-lived httpx.AsyncClient per process, so connections are reused
+    across requests (keep-alive) and the pool bounds how many evaluations are
+    in flight at once. Every call carries its own deadline; any failure is
+    fail-closed and surfaces as a 503.
+    """
+
+    def __init__(self, base_url: str | None = None):
+        self.base_url = (base_url or settings.risk_mcp_base_url).rstrip("/")
+        self._client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(
+                settings.risk_timeout_seconds,
+                connect=settings.risk_connect_timeout_seconds,
+                pool=settings.risk_pool_timeout_seconds,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.risk_max_connections,
+                max_keepalive_connections=settings.risk_max_keepalive,
+                keepalive_expiry=settings.risk_keepalive_seconds,
+            ),
+        )
+
+    async def close(self) -> None:
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+
+    async def evaluate(self, payload: dict, *, timeout: float | None = None) -> dict:
+        if self._client is None:
+            await self.start()
+        started = time.perf_counter()
+        try:
+            with tracing.span("risk.evaluate", "client"):
+                r = await self._client.post(
+                    "/evaluate",
+                    json=payload,
+                    headers=tracing.outbound_headers(),
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                )
+                r.raise_for_status()
+                result = r.json()
+        except (httpx.HTTPError, ValueError) as e:
+            RISK_CALL_ERRORS.inc()
+            raise HTTPException(
+                status_code=503,
+                detail="Risk MCP unavailable (fail-closed)",
+            ) from e
+        RISK_CALL_SECONDS.observe(time.perf_counter() - started)
+        return result
@@ -16,4 +16,88 @@ class Settings:
       "http://audit-mcp:8020"
     )
 
+    policy_dir: str = get_env(
+      "RISK_POLICY_DIR",
+      "/app/policies/risk"
+    )
+
+    policy_poll_seconds: float = float(get_env(
+      "RISK_POLICY_POLL_SECONDS",
+      "2"
+    ))
+
+    # "vectorized" (NumPy columns) or "scalar" for /evaluate/batch
+    batch_mode: str = get_env(
+      "RISK_BATCH_MODE",
+      "vectorized"
+    )
+
+    # Items per /evaluate/batch call (413 above this). Also capped at the outbox capacity,
+    # since a batch is committed to the outbox in one transaction.
+    batch_max_items: int = int(get_env(
+      "RISK_BATCH_MAX_ITEMS",
+      "50000"
+    ))
+
+    # Local, fsynced queue of audit events awaiting delivery to audit-mcp.
+    audit_outbox_path: str = get_env(
+      "RISK_AUDIT_OUTBOX_PATH",
+      "/data/risk-audit-outbox.db"
+    )
+
+    # Decisions fail closed once this many events are waiting.
+    audit_outbox_max_events: int = int(get_env(
+      "RISK_AUDIT_OUTBOX_MAX_EVENTS",
+      "100000"
+    ))
+
+    audit_outbox_batch_size: int = int(get_env(
+      "RISK_AUDIT_OUTBOX_BATCH_SIZE",
+      "500"
+    ))
+
+    audit_retry_max_seconds: float = float(get_env(
+      "RISK_AUDIT_RETRY_MAX_SECONDS",
+      "30"
+    ))
+
+    # Server-error retries on the same head batch before it is bisected and bad events quarantined.
+    audit_outbox_max_head_attempts: int = int(get_env(
+      "RISK_AUDIT_OUTBOX_MAX_HEAD_ATTEMPTS",
+      "10"
+    ))
+
+    # Span export: empty (off), an NDJSON file path, or an OTLP/HTTP JSON URL.
+    trace_export: str = get_env(
+      "TRACE_EXPORT",
+      ""
+    )
+
+    trace_ring_size: int = int(get_env(
+      "TRACE_RING_SIZE",
+      "10000"
+    ))
+
+    trace_export_interval_seconds: float = float(get_env(
+      "TRACE_EXPORT_INTERVAL_SECONDS",
+      "1.0"
+    ))
+
+    # /debug/profile sampling profiler; off unless enabled. In prod it also needs ADMIN_TOKEN.
+    profiler_enabled: bool = get_env(
+      "PROFILER_ENABLED",
+      "false"
+    ).lower() == "true"
+
+    # Always-on low-rate sampling (0 = off), served at /debug/profile/continuous.
+    profiler_continuous_hz: float = float(get_env(
+      "PROFILER_CONTINUOUS_HZ",
+      "0"
+    ))
+
+    admin_token: str = get_env(
+      "ADMIN_TOKEN",
+      ""
+    )
+
 settings = Settings()
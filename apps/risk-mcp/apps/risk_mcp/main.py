@@ -1,16 +1,67 @@
-from fastapi import FastAPI
-from datetime import datetime, timezone
-import requests
 import time
-import os
-from .policy_loader import load_policies
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from shared import instrumentation, tracing
+from shared.profiler import Profiler, debug_router
+from .outbox import AuditOutbox, AuditWriteError, OutboxFullError
+from .policy_watcher import PolicyWatcher
+from .rules import check_max_position, check_max_position_batch, parse_as_of
+from .vectorized import check_max_position_columnar
 from .config import settings
 
 
-class AuditWriteError(RuntimeError):
-    """Raised when an audit event cannot be persisted."""
-
-app = FastAPI(title="AITDP Risk MCP Server", version=settings.app_version)
+tracing.configure(
+    "risk-mcp",
+    settings.trace_export,
+    ring_size=settings.trace_ring_size,
+    export_interval_seconds=settings.trace_export_interval_seconds,
+)
+profiler = Profiler(continuous_hz=settings.profiler_continuous_hz if settings.profiler_enabled else 0)
+policies = PolicyWatcher(Path(settings.policy_dir), poll_seconds=settings.policy_poll_seconds)
+outbox = AuditOutbox(
+    settings.audit_outbox_path,
+    settings.audit_mcp_base_url,
+    max_events=settings.audit_outbox_max_events,
+    batch_size=settings.audit_outbox_batch_size,
+    retry_max_seconds=settings.audit_retry_max_seconds,
+    max_head_attempts=settings.audit_outbox_max_head_attempts,
+)
+
+EVALUATE_SECONDS = instrumentation.histogram("aitdp_risk_evaluate_seconds", "POST /evaluate handler latency")
+DECISIONS = instrumentation.counter("aitdp_risk_decisions_total", "Risk decisions by result", ["result"])
+EMIT_AUDIT_SECONDS = instrumentation.histogram(
+    "aitdp_risk_emit_audit_seconds", "Time to commit decision events to the audit outbox"
+)
+EMIT_AUDIT_ERRORS = instrumentation.counter("aitdp_risk_emit_audit_errors_total", "Audit outbox appends that failed")
+instrumentation.gauge("aitdp_risk_outbox_pending", "Audit events waiting in the outbox").set_function(
+    lambda: outbox.pending
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tracing.TRACER.start()
+    profiler.start()
+    policies.start()
+    outbox.start()
+    yield
+    outbox.stop()
+    policies.stop()
+    profiler.stop()
+    tracing.TRACER.stop()
+
+
+app = FastAPI(title="AITDP Risk MCP Server", version=settings.app_version, lifespan=lifespan)
+app.add_middleware(tracing.TracingMiddleware)
+app.include_router(debug_router(
+    profiler,
+    enabled=settings.profiler_enabled,
+    app_env=settings.app_env,
+    admin_token=settings.admin_token,
+    service="risk-mcp",
+))
 
 
 @app.get("/health")
@@ -23,106 +74,128 @@ def health():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(instrumentation.render(), media_type=instrumentation.CONTENT_TYPE)
+
+
+@app.get("/audit/outbox")
+def audit_outbox():
+    return outbox.stats()
+
+
+@app.get("/policies/version")
+def policies_version():
+    return policies.version()
+
+
 @app.post("/evaluate")
 def evaluate(payload: dict):
-    as_of = datetime.fromisoformat(payload["as_of"].replace("Z", "+00:00"))
-    policies = load_policies(as_of)
+    started = time.perf_counter()
+    as_of = parse_as_of(payload["as_of"])
 
     trade = payload["trade"]
     actor = payload["actor"]
     trace_id = payload["trace_id"]
 
-    for policy in policies:
-        if (
-            policy["rule"]["type"] == "max_position"
-            and trade["symbol"] == policy["scope"]["symbol"]
-            and actor["desk"] == policy["scope"]["desk"]
-        ):
-            if trade["quantity"] > policy["rule"]["max_shares"]:
-                _emit_audit(
-                    trace_id,
-                    "decision_made",
-                    {
-                        "decision": "reject",
-                        "reason": "policy_violation",
-                        "policy_id": policy["policy_id"],
-                        "version": policy["version"],
-                        "requested": trade["quantity"],
-                        "max_allowed": policy["rule"]["max_shares"],
-                    },
-                )
-                
-                return {
-                    "result": "reject",
-                    "policy_id": policy["policy_id"],
-                    "policy_version": policy["version"],
-                    "reason": "position limit exceeded",
-                }
-
-    _emit_audit(
-        trace_id,
-        "decision_made",
-        {
-            "decision": "pass",
-            "reason": "policy_clear",
-        },
-    )
-
-    return {"result": "pass"}
-
-
-def _emit_audit(
-    trace_id: str,
-    event_type: str,
-    payload: dict,
-    *,
-    retries: int = 3,
-    backoff_seconds: float = 0.5,
-):
-    last_error = None
-
-    for attempt in range(1, retries + 1):
-        try:
-            r = requests.post(
-                f"{settings.audit_mcp_base_url}/audit/log",
-                json={
-                    "trace_id": trace_id,
-                    "event_type": event_type,
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "payload": payload,
-                },
-                timeout=2,
-            )
-
-            if r.status_code >= 400:
-                print(
-                    "[AUDIT ERROR]",
-                    {
-                        "status": r.status_code,
-                        "body": r.text,
-                        "attempt": attempt,
-                    },
-                )
-
-            r.raise_for_status()
-
-            # Success
-            return
-
-        except Exception as e:
-            last_error = e
-            print(
-                "[AUDIT RETRY FAILED]",
-                {
-                    "attempt": attempt,
-                    "error": str(e),
-                },
-            )
-
-            if attempt < retries:
-                time.sleep(backoff_seconds * attempt)
-
-    # Fail closed
-    raise AuditWriteError(
-        f"Failed to write audit event after {retries} attempts"
-    ) from last_error
+    # Pin one snapshot for the whole evaluation; reloads swap in a new one.
+    snapshot = policies.current()
+
+    with tracing.span("policy.evaluate", policy_hash=snapshot.hash):
+        matched = snapshot.policies.match("max_position", actor["desk"], trade["symbol"], as_of)
+        result, audit_payload = check_max_position(matched, trade)
+
+    _emit_audit(trace_id, "decision_made", audit_payload)
+
+    DECISIONS.labels(result["result"]).inc()
+    EVALUATE_SECONDS.observe(time.perf_counter() - started)
+    return result
+
+
+@app.post("/evaluate/batch")
+def evaluate_batch(payload: dict):
+    """
+    Evaluate many {trace_id, trade, actor, as_of} items against one snapshot.
+
+    At most min(RISK_BATCH_MAX_ITEMS, RISK_AUDIT_OUTBOX_MAX_EVENTS) items per
+    call; larger batches get 413 and must be split by the caller (e.g. a
+    replay sends consecutive chunks). A full outbox answers 503.
+
+    Policy lookups are shared per (desk, symbol, effective-date epoch); the
+    "vectorized" mode applies max_position limits over NumPy columns. All
+    decision events are committed to the local audit outbox in one
+    transaction. Results are returned in request order only after that
+    commit succeeds (fail-closed).
+    """
+    items = payload["items"]
+    limit = min(settings.batch_max_items, outbox.max_events)
+    if len(items) > limit:
+        raise HTTPException(
+            status_code=413, detail=f"{len(items)} items exceeds the batch limit of {limit}; split the batch"
+        )
+    mode = payload.get("mode", settings.batch_mode)
+    snapshot = policies.current()
+
+    if mode == "vectorized":
+        decisions = check_max_position_columnar(snapshot.policies, items)
+    else:
+        decisions = check_max_position_batch(snapshot.policies, items)
+
+    results = []
+    events = []
+    last_ts = None
+
+    for item, (result, audit_payload) in zip(items, decisions):
+        results.append(result)
+        DECISIONS.labels(result["result"]).inc()
+
+        # audit_id is derived from (trace_id, timestamp); keep timestamps strictly increasing.
+        ts = datetime.now(timezone.utc)
+        if last_ts is not None and ts <= last_ts:
+            ts = last_ts + timedelta(microseconds=1)
+        last_ts = ts
+
+        events.append({
+            "trace_id": item["trace_id"],
+            "event_type": "decision_made",
+            "timestamp": ts.isoformat(),
+            "payload": audit_payload,
+        })
+
+    if events:
+        _emit_audit_batch(events)
+
+    return {
+        "policy_hash": snapshot.hash,
+        "results": results,
+    }
+
+
+def _emit_audit(trace_id: str, event_type: str, payload: dict):
+    _emit_audit_batch([{
+        "trace_id": trace_id,
+        "event_type": event_type,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "payload": payload,
+    }])
+
+
+def _emit_audit_batch(events: list[dict]):
+    """
+    Durable once this returns; delivery to audit-mcp happens in the background.
+    Raises 503 when the events cannot be made durable, so no decision is returned.
+    """
+    started = time.perf_counter()
+    try:
+        with tracing.span("outbox.append", events=len(events)):
+            outbox.append(events)
+    except OutboxFullError as e:
+        EMIT_AUDIT_ERRORS.inc()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except AuditWriteError as e:
+        EMIT_AUDIT_ERRORS.inc()
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception:
+        EMIT_AUDIT_ERRORS.inc()
+        raise
+    EMIT_AUDIT_SECONDS.observe(time.perf_counter() - started)
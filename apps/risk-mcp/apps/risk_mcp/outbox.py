@@ -0,0 +1,299 @@
+"""
+Durable local outbox for audit events.
+
+Decisions are returned once their audit events are committed to a local
+SQLite file (synchronous=FULL), not once audit-mcp has acknowledged them.
+A background thread drains the outbox to audit-mcp's /audit/log/batch in
+order, retrying with capped exponential backoff, and deletes rows only after
+a successful response. Each append is one fsync on the request path
+(bench/risk_outbox_append.py measures it). audit-mcp treats a redelivered
+event (same audit_id and content) as already written, so at-least-once
+delivery is safe.
+
+The outbox is bounded. When audit-mcp has been unreachable long enough to
+fill it, appends fail and the service stops returning decisions (fail-closed).
+
+A bad event must not take its neighbours down with it. When audit-mcp
+refuses a batch (4xx), or keeps failing the same head batch with 5xx for
+max_head_attempts tries, the batch is bisected: halves that are accepted
+are delivered, and only the single events that are still refused move to
+outbox_rejected. Connection errors and timeouts are always retried, never
+quarantined.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from shared import instrumentation
+
+log = logging.getLogger(__name__)
+
+DELIVERED = instrumentation.counter("aitdp_risk_outbox_delivered_total", "Audit events delivered to audit-mcp")
+DELIVERY_FAILURES = instrumentation.counter(
+    "aitdp_risk_outbox_delivery_failures_total", "Failed outbox delivery attempts (retried)"
+)
+REJECTED = instrumentation.counter("aitdp_risk_outbox_rejected_total", "Audit events audit-mcp refused as invalid")
+
+OUTBOX_SQL = """
+CREATE TABLE IF NOT EXISTS outbox (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  event_json TEXT NOT NULL,
+  enqueued_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS outbox_rejected (
+  id INTEGER PRIMARY KEY,
+  event_json TEXT NOT NULL,
+  enqueued_at REAL NOT NULL,
+  status INTEGER,
+  error TEXT,
+  rejected_at REAL NOT NULL
+);
+"""
+
+
+class AuditWriteError(RuntimeError):
+    """Raised when an audit event cannot be persisted."""
+
+
+class OutboxFullError(AuditWriteError):
+    """Raised when the outbox is at capacity; the caller must not return a decision."""
+
+
+class _Refused(Exception):
+    """audit-mcp answered with an error status (other than 408/429)."""
+
+    def __init__(self, status: int, body: str):
+        super().__init__(f"audit-mcp returned {status}: {body[:200]}")
+        self.status = status
+        self.body = body
+
+    @property
+    def client_error(self) -> bool:
+        return self.status < 500
+
+
+class AuditOutbox:
+    def __init__(
+        self,
+        path: str,
+        audit_base_url: str,
+        *,
+        max_events: int = 100_000,
+        batch_size: int = 500,
+        request_timeout: float = 10.0,
+        retry_initial_seconds: float = 0.5,
+        retry_max_seconds: float = 30.0,
+        max_head_attempts: int = 10,
+    ):
+        self.path = path
+        self.audit_base_url = audit_base_url.rstrip("/")
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self.request_timeout = request_timeout
+        self.retry_initial_seconds = retry_initial_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.max_head_attempts = max_head_attempts
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = wal")
+        self._conn.execute("PRAGMA synchronous = FULL")
+        self._conn.executescript(OUTBOX_SQL)
+        self._pending = self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._session = requests.Session()
+
+        self.delivered = 0
+        self.delivery_failures = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        # Consecutive server-error failures of the batch starting at _head_id.
+        self._head_id: Optional[int] = None
+        self._head_failures = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, drain_seconds: float = 5.0) -> None:
+        """Stop delivering, after a best-effort drain; undelivered events stay on disk."""
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + drain_seconds
+        while self._pending and time.monotonic() < deadline and not self.last_error:
+            self._wake.set()
+            time.sleep(0.05)
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self._session.close()
+        with self._lock:
+            self._conn.close()
+
+    def append(self, events: list[dict]) -> None:
+        """Durably enqueue events in one transaction. Returns once they are fsynced."""
+        if not events:
+            return
+        now = time.time()
+        rows = [(json.dumps(event, separators=(",", ":")), now) for event in events]
+        with self._lock:
+            if self._pending + len(rows) > self.max_events:
+                raise OutboxFullError(
+                    f"Audit outbox full ({self._pending} pending, limit {self.max_events})"
+                )
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.executemany("INSERT INTO outbox(event_json, enqueued_at) VALUES(?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise AuditWriteError("Failed to persist audit event to outbox") from e
+            self._pending += len(rows)
+        self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        """Events durably enqueued but not yet delivered or rejected."""
+        with self._lock:
+            return self._pending
+
+    def stats(self) -> dict:
+        with self._lock:
+            oldest = self._conn.execute("SELECT MIN(enqueued_at) FROM outbox").fetchone()[0]
+            pending = self._pending
+        return {
+            "pending": pending,
+            "capacity": self.max_events,
+            "oldest_pending_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "delivered": self.delivered,
+            "delivery_failures": self.delivery_failures,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
+
+    def _next_batch(self) -> list[tuple[int, str, float]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, event_json, enqueued_at FROM outbox ORDER BY id LIMIT ?", (self.batch_size,)
+            ).fetchall()
+
+    def _delete(self, last_id: int, count: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM outbox WHERE id <= ?", (last_id,))
+            self._pending -= count
+
+    def _reject(self, rows: list[tuple[int, str, float]], status: int, error: str) -> None:
+        # An event audit-mcp refuses would otherwise block the queue forever.
+        # Keep it on disk for inspection instead of dropping it.
+        log.error("[AUDIT OUTBOX REJECTED] %s", {"status": status, "body": error[:500], "ids": [r[0] for r in rows]})
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT INTO outbox_rejected(id, event_json, enqueued_at, status, error, rejected_at) "
+                "VALUES(?, ?, ?, ?, ?, ?)",
+                [(row_id, body, enqueued_at, status, error, now) for row_id, body, enqueued_at in rows],
+            )
+            self._conn.execute("DELETE FROM outbox WHERE id <= ?", (rows[-1][0],))
+            self._conn.execute("COMMIT")
+            self._pending -= len(rows)
+        self.rejected += len(rows)
+        REJECTED.inc(len(rows))
+
+    def _post(self, rows: list[tuple[int, str, float]]) -> None:
+        body = '{"events":[' + ",".join(event_json for _, event_json, _ in rows) + "]}"
+        r = self._session.post(
+            f"{self.audit_base_url}/audit/log/batch",
+            data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=self.request_timeout,
+        )
+        if r.status_code >= 400 and r.status_code not in (408, 429):
+            raise _Refused(r.status_code, r.text[:2000])
+        r.raise_for_status()
+
+    def _delivered(self, rows: list[tuple[int, str, float]]) -> None:
+        self._delete(rows[-1][0], len(rows))
+        self.delivered += len(rows)
+        DELIVERED.inc(len(rows))
+
+    def _deliver(self, rows: list[tuple[int, str, float]]) -> None:
+        # After max_head_attempts server errors on the same head, isolate those too.
+        isolate_server_errors = rows[0][0] == self._head_id and self._head_failures >= self.max_head_attempts
+        try:
+            self._post(rows)
+        except _Refused as e:
+            if not (e.client_error or isolate_server_errors):
+                if rows[0][0] != self._head_id:
+                    self._head_id, self._head_failures = rows[0][0], 0
+                self._head_failures += 1
+                raise
+            log.warning(
+                "[AUDIT OUTBOX ISOLATING] %s", {"status": e.status, "events": len(rows), "first_id": rows[0][0]}
+            )
+            self._isolate(rows, e, isolate_server_errors)
+            return
+        self._delivered(rows)
+
+    def _isolate(self, rows: list[tuple[int, str, float]], refused: _Refused, include_server_errors: bool) -> None:
+        """
+        Deliver what audit-mcp accepts out of a refused batch, in order, and
+        quarantine only the single events it still refuses. Transient errors
+        propagate; rows not yet handled stay queued and are retried as usual.
+        """
+        if len(rows) == 1:
+            self._reject(rows, refused.status, refused.body)
+            return
+        mid = len(rows) // 2
+        for half in (rows[:mid], rows[mid:]):
+            try:
+                self._post(half)
+            except _Refused as e:
+                if not (e.client_error or include_server_errors):
+                    raise
+                self._isolate(half, e, include_server_errors)
+                continue
+            self._delivered(half)
+
+    def _run(self) -> None:
+        backoff = self.retry_initial_seconds
+        while not self._stop.is_set():
+            rows = self._next_batch()
+            if not rows:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            try:
+                self._deliver(rows)
+                backoff = self.retry_initial_seconds
+                self.last_error = None
+                self._head_id, self._head_failures = None, 0
+            except Exception as e:
+                self.delivery_failures += 1
+                DELIVERY_FAILURES.inc()
+                self.last_error = str(e)
+                log.warning(
+                    "[AUDIT OUTBOX DELIVERY FAILED] %s", {"error": str(e), "pending": self._pending, "retry_in": backoff}
+                )
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.retry_max_seconds)
@@ -1,22 +1,112 @@
 import yaml
+from bisect import bisect_right
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
+from typing import Any
 
 
-POLICY_PATH = Path("/app/policies/risk/position_limits.yaml")
+def _parse_effective(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
 
 
-def load_policies(as_of: datetime):
-    with POLICY_PATH.open() as f:
-        data = yaml.safe_load(f)
+def parse_policy_document(raw: bytes | str) -> list[dict]:
+    data = yaml.safe_load(raw) or {}
+    return list(data.get("policies", []))
 
-    active = []
 
-    for policy in data.get("policies", []):
-        effective = datetime.fromisoformat(
-            policy["effective_from"].replace("Z", "+00:00")
+def read_policy_documents(path: Path) -> list[dict]:
+    return parse_policy_document(path.read_bytes())
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledPolicy:
+    policy_id: str
+    version: str
+    rule_type: str
+    desk: str | None
+    symbol: str | None
+    effective_from: datetime
+    rule: dict[str, Any]
+
+
+class _VersionChain:
+    """Effective-dated versions of one policy_id, sorted by effective_from."""
+
+    __slots__ = ("starts", "versions")
+
+    def __init__(self) -> None:
+        self.starts: list[datetime] = []
+        self.versions: list[CompiledPolicy] = []
+
+    def add(self, policy: CompiledPolicy) -> None:
+        i = bisect_right(self.starts, policy.effective_from)
+        self.starts.insert(i, policy.effective_from)
+        self.versions.insert(i, policy)
+
+    def at(self, as_of: datetime) -> CompiledPolicy | None:
+        i = bisect_right(self.starts, as_of)
+        return self.versions[i - 1] if i else None
+
+
+class CompiledPolicySet:
+    """
+    Policies indexed by (rule type, desk, symbol).
+
+    Each key holds one version chain per policy_id (in file order); the version
+    in force at `as_of` is found by bisect, so a lookup costs O(matching policies)
+    and never touches YAML or parses a datetime.
+    """
+
+    def __init__(self, policies: list[dict]):
+        self._index: dict[tuple[str, str | None, str | None], list[_VersionChain]] = {}
+        chains: dict[tuple[str, str | None, str | None, str], _VersionChain] = {}
+
+        for policy in policies:
+            scope = policy.get("scope") or {}
+            compiled = CompiledPolicy(
+                policy_id=policy["policy_id"],
+                version=policy["version"],
+                rule_type=policy["rule"]["type"],
+                desk=scope.get("desk"),
+                symbol=scope.get("symbol"),
+                effective_from=_parse_effective(policy["effective_from"]),
+                rule=dict(policy["rule"]),
+            )
+            key = (compiled.rule_type, compiled.desk, compiled.symbol)
+
+            chain = chains.get(key + (compiled.policy_id,))
+            if chain is None:
+                chain = chains[key + (compiled.policy_id,)] = _VersionChain()
+                self._index.setdefault(key, []).append(chain)
+            chain.add(compiled)
+
+        self.size = len(policies)
+        self._boundaries: list[datetime] = sorted(
+            {v.effective_from for chains_ in self._index.values() for c in chains_ for v in c.versions}
         )
-        if as_of >= effective:
-            active.append(policy)
 
-    return active
+    def epoch(self, as_of: datetime) -> int:
+        """
+        Index of the effective-date interval containing `as_of`.
+        Every lookup returns the same policies for any two instants in one epoch.
+        """
+        return bisect_right(self._boundaries, as_of)
+
+    def match(
+        self, rule_type: str, desk: str, symbol: str, as_of: datetime
+    ) -> list[CompiledPolicy]:
+        chains = self._index.get((rule_type, desk, symbol))
+        if not chains:
+            return []
+
+        matched = []
+        for chain in chains:
+            policy = chain.at(as_of)
+            if policy is not None:
+                matched.append(policy)
+        return matched
+
+
+def compile_policies(path: Path) -> CompiledPolicySet:
+    return CompiledPolicySet(read_policy_documents(path))
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from shared import instrumentation
+
+from .policy_loader import CompiledPolicySet, parse_policy_document
+
+log = logging.getLogger(__name__)
+
+RELOAD_FAILURES = instrumentation.counter("aitdp_risk_policy_reload_failures_total", "Policy reloads that failed to parse")
+
+POLICY_PATTERNS = ("*.yaml", "*.yml")
+
+# Concurrent writes can make reload() give up on a pass; current() retries this often before failing.
+INITIAL_LOAD_ATTEMPTS = 5
+
+
+class PolicyTreeError(RuntimeError):
+    """The policy tree is missing, empty, or defines no policies."""
+
+
+@dataclass(frozen=True, slots=True)
+class PolicySnapshot:
+    """An immutable, fully compiled view of the policy tree."""
+
+    policies: CompiledPolicySet
+    hash: str
+    loaded_at: datetime
+    files: tuple[str, ...]
+
+
+class PolicyWatcher:
+    """
+    Polls the policy tree for changes and swaps in a freshly compiled snapshot.
+
+    Readers call `current()` once per evaluation and keep that snapshot for the
+    whole request; a reload builds the new snapshot off to the side and replaces
+    the reference in a single assignment, so nobody ever sees a partial parse.
+    A file that fails to parse leaves the previous snapshot in place.
+
+    The watcher fails closed: the first load raises PolicyTreeError if the
+    tree is missing or defines no policies, and a later reload that finds an
+    empty tree is refused, so the previous snapshot stays in effect.
+    """
+
+    def __init__(self, root: Path, poll_seconds: float = 2.0):
+        self.root = root
+        self.poll_seconds = poll_seconds
+
+        self._snapshot: PolicySnapshot | None = None
+        self._fingerprint: tuple | None = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_reload_seconds = 0.0
+        self.reload_seconds_total = 0.0
+        self.last_error: str | None = None
+
+    def current(self) -> PolicySnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        for _ in range(INITIAL_LOAD_ATTEMPTS):
+            self.reload()
+            if self._snapshot is not None:
+                return self._snapshot
+        raise PolicyTreeError(f"policy tree {self.root} kept changing during load")
+
+    def _files(self) -> list[Path]:
+        if not self.root.is_dir():
+            return []
+        return sorted({p for pattern in POLICY_PATTERNS for p in self.root.rglob(pattern) if p.is_file()})
+
+    def _scan(self) -> tuple:
+        entries = []
+        for path in self._files():
+            st = path.stat()
+            entries.append((str(path.relative_to(self.root)), st.st_mtime_ns, st.st_size))
+        return tuple(entries)
+
+    def reload(self) -> bool:
+        """Rebuild the snapshot if the tree changed. Returns True when a new snapshot was swapped in."""
+        with self._reload_lock:
+            started = time.perf_counter()
+
+            fingerprint = self._scan()
+            digest = hashlib.sha256()
+            documents: list[tuple[str, bytes]] = []
+            for path in self._files():
+                rel = str(path.relative_to(self.root))
+                raw = path.read_bytes()
+                digest.update(rel.encode("utf-8") + b"\0" + raw + b"\0")
+                documents.append((rel, raw))
+
+            # A writer touched the tree while we were reading; try again next poll.
+            if self._scan() != fingerprint:
+                return False
+
+            snapshot_hash = digest.hexdigest()
+            if self._snapshot is not None and self._snapshot.hash == snapshot_hash:
+                self._fingerprint = fingerprint
+                return False
+
+            # Remember the fingerprint even if parsing fails, so a broken push is
+            # reported once rather than re-parsed on every poll.
+            self._fingerprint = fingerprint
+
+            if not documents:
+                if not self.root.is_dir():
+                    raise PolicyTreeError(f"policy directory not found: {self.root}")
+                raise PolicyTreeError(f"no policy files under {self.root}")
+            policies: list[dict] = []
+            for _, raw in documents:
+                policies.extend(parse_policy_document(raw))
+            if not policies:
+                raise PolicyTreeError(f"policy files under {self.root} define no policies")
+
+            self._snapshot = PolicySnapshot(
+                policies=CompiledPolicySet(policies),
+                hash=snapshot_hash,
+                loaded_at=datetime.now(timezone.utc),
+                files=tuple(rel for rel, _ in documents),
+            )
+
+            elapsed = time.perf_counter() - started
+            self.reloads += 1
+            self.last_reload_seconds = elapsed
+            self.reload_seconds_total += elapsed
+            self.last_error = None
+            return True
+
+    def check(self) -> bool:
+        if self._scan() == self._fingerprint:
+            return False
+        return self.reload()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                self.reload_failures += 1
+                RELOAD_FAILURES.inc()
+                self.last_error = f"{type(e).__name__}: {e}"
+                log.error("[POLICY RELOAD FAILED] %s", {"root": str(self.root), "error": self.last_error})
+
+    def start(self) -> None:
+        self.current()
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="policy-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 1)
+            self._thread = None
+
+    def version(self) -> dict:
+        snapshot = self.current()
+        return {
+            "hash": snapshot.hash,
+            "loaded_at": snapshot.loaded_at.isoformat(),
+            "files": list(snapshot.files),
+            "policy_count": snapshot.policies.size,
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "last_reload_seconds": self.last_reload_seconds,
+            "reload_seconds_total": self.reload_seconds_total,
+            "last_error": self.last_error,
+        }
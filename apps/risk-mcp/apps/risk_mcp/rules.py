@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from .policy_loader import CompiledPolicy, CompiledPolicySet
+
+
+def parse_as_of(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def check_max_position(matched: list[CompiledPolicy], trade: dict) -> tuple[dict, dict]:
+    """
+    Apply the matched max_position policies to one trade.
+    Returns (response body, decision_made audit payload).
+    """
+    for policy in matched:
+        if trade["quantity"] > policy.rule["max_shares"]:
+            return (
+                {
+                    "result": "reject",
+                    "policy_id": policy.policy_id,
+                    "policy_version": policy.version,
+                    "reason": "position limit exceeded",
+                },
+                {
+                    "decision": "reject",
+                    "reason": "policy_violation",
+                    "policy_id": policy.policy_id,
+                    "version": policy.version,
+                    "requested": trade["quantity"],
+                    "max_allowed": policy.rule["max_shares"],
+                },
+            )
+
+    return (
+        {"result": "pass"},
+        {
+            "decision": "pass",
+            "reason": "policy_clear",
+        },
+    )
+
+
+def check_max_position_batch(policy_set: CompiledPolicySet, items: list[dict]) -> list[tuple[dict, dict]]:
+    """
+    Scalar batch path: one policy lookup per distinct (desk, symbol, epoch),
+    then `check_max_position` per trade.
+    """
+    epochs: dict[str, tuple[datetime, int]] = {}
+    lookups: dict[tuple[str, str, int], list[CompiledPolicy]] = {}
+    decisions = []
+
+    for item in items:
+        trade = item["trade"]
+
+        as_of_raw = item["as_of"]
+        parsed = epochs.get(as_of_raw)
+        if parsed is None:
+            as_of = parse_as_of(as_of_raw)
+            parsed = epochs[as_of_raw] = (as_of, policy_set.epoch(as_of))
+        as_of, epoch = parsed
+
+        key = (item["actor"]["desk"], trade["symbol"], epoch)
+        matched = lookups.get(key)
+        if matched is None:
+            matched = lookups[key] = policy_set.match("max_position", key[0], key[1], as_of)
+
+        decisions.append(check_max_position(matched, trade))
+
+    return decisions
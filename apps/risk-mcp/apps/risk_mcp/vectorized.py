@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+
+from .policy_loader import CompiledPolicy, CompiledPolicySet
+from .rules import check_max_position, parse_as_of
+
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def _is_int64(value) -> bool:
+    # bool is an int subclass; it and anything wider than int64 take the scalar path.
+    return type(value) is int and _INT64_MIN <= value <= _INT64_MAX
+
+
+def _encode(values, codes: dict) -> np.ndarray:
+    return np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int64, count=len(values))
+
+
+def check_max_position_columnar(policy_set: CompiledPolicySet, items: list[dict]) -> list[tuple[dict, dict]]:
+    """
+    Columnar equivalent of `rules.check_max_position_batch`.
+
+    Trades become int64 columns (desk/symbol as category codes, quantity, as_of
+    epoch). Policy lookup runs once per distinct (desk, symbol, epoch) group to
+    build a padded limits matrix in match order; each trade gathers its group's
+    row and the first limit it exceeds is found with one broadcast compare.
+
+    Only trades whose quantity is a plain int, in groups whose max_shares
+    limits are all plain ints, go through the int64 columns. Anything else
+    (fractional, numeric string, bool, missing, out of range, on either
+    side) is evaluated by the scalar rule, so it is compared exactly or
+    raises exactly as `check_max_position` would, instead of being
+    truncated, coerced or overflowing.
+    """
+    fast = [i for i, item in enumerate(items) if _is_int64(item["trade"].get("quantity"))]
+    if len(fast) == len(items):
+        return _check_columnar(policy_set, items)
+
+    decisions: list = [None] * len(items)
+    fast_set = set(fast)
+    for i, item in enumerate(items):
+        if i not in fast_set:
+            trade = item["trade"]
+            as_of = parse_as_of(item["as_of"])
+            matched = policy_set.match("max_position", item["actor"]["desk"], trade["symbol"], as_of)
+            decisions[i] = check_max_position(matched, trade)
+    for i, decision in zip(fast, _check_columnar(policy_set, [items[i] for i in fast])):
+        decisions[i] = decision
+    return decisions
+
+
+def _check_columnar(policy_set: CompiledPolicySet, items: list[dict]) -> list[tuple[dict, dict]]:
+    n = len(items)
+    if n == 0:
+        return []
+
+    desks: dict[str, int] = {}
+    symbols: dict[str, int] = {}
+    epoch_by_raw: dict[str, int] = {}
+    as_of_by_epoch: dict[int, datetime] = {}
+
+    def epoch_of(raw: str) -> int:
+        epoch = epoch_by_raw.get(raw)
+        if epoch is None:
+            as_of = parse_as_of(raw)
+            epoch = epoch_by_raw[raw] = policy_set.epoch(as_of)
+            as_of_by_epoch.setdefault(epoch, as_of)
+        return epoch
+
+    desk_col = _encode([item["actor"]["desk"] for item in items], desks)
+    symbol_col = _encode([item["trade"]["symbol"] for item in items], symbols)
+    epoch_col = np.fromiter((epoch_of(item["as_of"]) for item in items), dtype=np.int64, count=n)
+    quantity = np.fromiter((item["trade"]["quantity"] for item in items), dtype=np.int64, count=n)
+
+    n_symbols = max(len(symbols), 1)
+    n_epochs = int(epoch_col.max()) + 1
+    group_key = (desk_col * n_symbols + symbol_col) * n_epochs + epoch_col
+    groups, inverse = np.unique(group_key, return_inverse=True)
+
+    desk_names = list(desks)
+    symbol_names = list(symbols)
+
+    # One lookup per group, not per trade.
+    table: list[CompiledPolicy] = []
+    matched_by_group: list[list[CompiledPolicy]] = []
+    ids_by_group: list[list[int]] = []
+    for key in groups.tolist():
+        rest, epoch = divmod(key, n_epochs)
+        desk_code, symbol_code = divmod(rest, n_symbols)
+        matched = policy_set.match(
+            "max_position", desk_names[desk_code], symbol_names[symbol_code], as_of_by_epoch[epoch]
+        )
+        matched_by_group.append(matched)
+        ids_by_group.append([])
+        # Groups with a limit that is not a plain int64 keep the scalar rule's exact semantics.
+        if all(_is_int64(policy.rule.get("max_shares")) for policy in matched):
+            for policy in matched:
+                ids_by_group[-1].append(len(table))
+                table.append(policy)
+    scalar_group = [len(ids) != len(matched) for ids, matched in zip(ids_by_group, matched_by_group)]
+
+    width = max((len(ids) for ids in ids_by_group), default=0)
+    if width == 0 and not any(scalar_group):
+        return [_pass() for _ in range(n)]
+
+    limits = np.full((len(groups), max(width, 1)), _INT64_MAX, dtype=np.int64)
+    policy_idx = np.full((len(groups), max(width, 1)), -1, dtype=np.int64)
+    for g, ids in enumerate(ids_by_group):
+        for k, pid in enumerate(ids):
+            limits[g, k] = table[pid].rule["max_shares"]
+            policy_idx[g, k] = pid
+
+    violated = quantity[:, None] > limits[inverse]
+    rejected = violated.any(axis=1)
+    first = violated.argmax(axis=1)
+    hit = policy_idx[inverse, first]
+
+    decisions = []
+    rows = zip(inverse.tolist(), quantity.tolist(), rejected.tolist(), hit.tolist())
+    for i, (g, qty, is_reject, pid) in enumerate(rows):
+        if scalar_group[g]:
+            decisions.append(check_max_position(matched_by_group[g], items[i]["trade"]))
+            continue
+        if not is_reject:
+            decisions.append(_pass())
+            continue
+
+        policy = table[pid]
+        decisions.append(
+            (
+                {
+                    "result": "reject",
+                    "policy_id": policy.policy_id,
+                    "policy_version": policy.version,
+                    "reason": "position limit exceeded",
+                },
+                {
+                    "decision": "reject",
+                    "reason": "policy_violation",
+                    "policy_id": policy.policy_id,
+                    "version": policy.version,
+                    "requested": qty,
+                    "max_allowed": policy.rule["max_shares"],
+                },
+            )
+        )
+
+    return decisions
+
+
+def _pass() -> tuple[dict, dict]:
+    return (
+        {"result": "pass"},
+        {
+            "decision": "pass",
+            "reason": "policy_clear",
+        },
+    )
@@ -0,0 +1,125 @@
+"""
+Advisory latency with and without primary/fallback hedging.
+
+Starts bench/fake_anthropic.py on a free port with a slow-tailed primary
+model and a steadier fallback, then drives ClaudeClient with unique
+prompts (no cache, no coalescing) in each mode. Reports end-to-end
+p50/p95/p99, how often the fallback won, and how many calls hit the deadline
+or failed outright (--error-rate injects 529s from the fake server).
+
+    PYTHONPATH=.:apps/orchestrator python bench/advisory_hedging.py --requests 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"fake Anthropic server did not start on port {port}")
+
+
+async def run_mode(args, hedge: bool) -> dict:
+    from apps.orchestrator.claude_client import ClaudeClient
+    from apps.orchestrator.config import settings
+
+    settings.claude_hedge_enabled = hedge
+    client = ClaudeClient(cache=None)
+    client.client = client.client.with_options(max_retries=0)
+    gate = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    winners: Counter = Counter()
+
+    async def one(i: int) -> None:
+        async with gate:
+            started = time.perf_counter()
+            try:
+                _, meta = await client.generate_advisory_with_meta(
+                    {"trade": {"symbol": "AAPL", "quantity": i, "side": "buy"}}, {"result": "pass"}
+                )
+                winners["deadline" if meta.get("deadline_exceeded") else meta.get("model")] += 1
+            except Exception as e:  # surfaced to the orchestrator as ADVISORY_FAILED
+                winners[f"error:{type(e).__name__}"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    await client.client.close()
+    latencies.sort()
+    return {
+        "hedge": hedge,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "winners": dict(winners),
+        "hedges": client.hedges,
+        "hedge_delay_s": round(client.hedge_delay(), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--primary-latency", default="bimodal:0.15,3.0,0.08")
+    parser.add_argument("--fallback-latency", default="lognormal:0.2,0.2")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--deadline", type=float, default=2.5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake")
+    os.environ["CLAUDE_DEADLINE_SECONDS"] = str(args.deadline)
+    os.environ["CLAUDE_MAX_CONCURRENCY"] = str(args.concurrency)
+    port = free_port()
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{port}"
+
+    from apps.orchestrator.config import settings
+
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            str(Path(__file__).with_name("fake_anthropic.py")),
+            "--port", str(port),
+            "--latency", f"{settings.claude_primary_model}={args.primary_latency}",
+            "--latency", f"{settings.claude_fallback_model}={args.fallback_latency}",
+            "--error-rate", str(args.error_rate),
+        ]
+    )
+    try:
+        wait_for_port(port)
+        for hedge in (False, True):
+            print(asyncio.run(run_mode(args, hedge)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Audit payload codecs: database size, write cost and read cost.
+
+Writes the same synthetic workload (a request_received, decision_made,
+advisory_generated and decision_forwarded event per trace, shaped like the
+orchestrator's) into one AuditStore per codec. Reports the file size after
+VACUUM, write throughput, a full /audit/export scan and list_by_trace,
+both as AuditEvent models and as the pre-serialized JSON that /audit/events
+returns.
+
+    PYTHONPATH=.:apps/audit-mcp python bench/audit_codecs.py [--traces 5000] [--codecs json zlib zlib-d1]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from apps.audit_mcp.codec import CODECS
+from apps.audit_mcp.storage import AuditStore
+from shared.schemas.audit import AuditEventType, AuditWriteRequest
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]
+
+
+def trace_events(i: int, ts: datetime) -> list[AuditWriteRequest]:
+    trace_id = f"trace-{i:08d}"
+    quantity = random.randint(1, 60_000)
+    actor = {"desk": "equities", "role": "trader", "user_id": f"trader-{i % 50}"}
+    trade = {"limit_price": None, "order_type": "market", "quantity": quantity,
+             "side": random.choice(["buy", "sell"]), "symbol": random.choice(SYMBOLS)}
+    risk_result = {"result": "pass"}
+    checks = {name: {"details": {}, "status": "pass"} for name in
+              ("confidence", "hallucination", "length_limits", "no_override", "recommendation", "schema")}
+    payloads = [
+        (AuditEventType.REQUEST_RECEIVED, {"actor": actor, "as_of": ts.isoformat(), "source": "orchestrator", "trade": trade}),
+        (AuditEventType.DECISION_MADE, {"decision": "proceed", "risk_result": risk_result, "source": "orchestrator"}),
+        (AuditEventType.ADVISORY_GENERATED, {
+            "advisory": {
+                "confidence": round(random.random(), 2),
+                "model": "claude",
+                "model_version": "claude-3-haiku-20240307",
+                "rationale": f"Position of {quantity} {trade['symbol']} is within desk limits; liquidity is adequate.",
+                "recommendation": "proceed",
+                "risk_flags": ["position_limit_check"],
+                "suggested_next_steps": ["review_position_size"],
+            },
+            "advisory_meta": {"deadline_exceeded": False, "hedged": False, "latency_ms": round(random.uniform(200, 900), 1),
+                              "model": "claude-3-haiku-20240307", "model_latency_ms": round(random.uniform(200, 900), 1),
+                              "source": "model"},
+            "advisory_used": False,
+            "evals": {"checks": checks, "passed": True},
+            "risk_result": risk_result,
+        }),
+        (AuditEventType.DECISION_FORWARDED, {"decision": "proceed", "risk_result": risk_result, "source": "orchestrator"}),
+    ]
+    return [
+        AuditWriteRequest(trace_id=trace_id, event_type=event_type, timestamp=ts + timedelta(microseconds=n), payload=p)
+        for n, (event_type, p) in enumerate(payloads)
+    ]
+
+
+def run(codec: str, workload: list[list[AuditWriteRequest]], batch: int) -> dict:
+    with tempfile.TemporaryDirectory() as d:
+        db_path = os.path.join(d, "audit.db")
+        store = AuditStore(db_path, payload_codec=codec)
+
+        events = [e for trace in workload for e in trace]
+        started = time.perf_counter()
+        for i in range(0, len(events), batch):
+            store.write_many(events[i : i + batch])
+        write_s = time.perf_counter() - started
+
+        start, end = events[0].timestamp - timedelta(seconds=1), events[-1].timestamp + timedelta(seconds=1)
+        started = time.perf_counter()
+        exported = sum(len(line) for _, line in store.iter_export(start, end))
+        export_s = time.perf_counter() - started
+
+        sample = [trace[0].trace_id for trace in random.sample(workload, min(1000, len(workload)))]
+        started = time.perf_counter()
+        for trace_id in sample:
+            store.list_by_trace(trace_id)
+        models_us = (time.perf_counter() - started) / len(sample) * 1e6
+        started = time.perf_counter()
+        for trace_id in sample:
+            store.list_by_trace_json(trace_id)
+        json_us = (time.perf_counter() - started) / len(sample) * 1e6
+        store.close()
+
+        conn = sqlite3.connect(db_path)
+        payload_bytes = conn.execute("SELECT SUM(LENGTH(CAST(payload_json AS BLOB))) FROM audit_events").fetchone()[0]
+        conn.execute("VACUUM")
+        conn.close()
+        return {
+            "codec": codec,
+            "db_mb": round(os.path.getsize(db_path) / 1e6, 2),
+            "payload_mb": round(payload_bytes / 1e6, 2),
+            "writes_per_s": round(len(events) / write_s),
+            "export_mb_per_s": round(exported / 1e6 / export_s, 1),
+            "list_by_trace_us": round(models_us, 1),
+            "list_by_trace_json_us": round(json_us, 1),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--traces", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--codecs", nargs="+", default=list(CODECS))
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    ts = datetime.now(timezone.utc)
+    workload = [trace_events(i, ts + timedelta(milliseconds=i)) for i in range(args.traces)]
+
+    results = [run(codec, workload, args.batch) for codec in args.codecs]
+    base = next((r for r in results if r["codec"] == "json"), results[0])
+    for r in results:
+        r["size_ratio"] = round(base["db_mb"] / r["db_mb"], 2)
+        print(r)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Audit store read latency under sustained write load.
+
+A writer process group-commits batches through AuditStore.write_many as fast
+as it can while reader threads call list_by_trace on random traces. Reports
+read p50/p99/p999 and write throughput for each journal mode, so the WAL +
+reader pool profile can be compared against the rollback-journal baseline.
+The writer lives in its own process so the numbers reflect SQLite locking
+rather than GIL contention.
+
+    PYTHONPATH=.:apps/audit-mcp python bench/audit_read_under_write.py --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from apps.audit_mcp.config import StorageSettings
+from apps.audit_mcp.storage import AuditStore
+from shared.schemas.audit import AuditEventType, AuditWriteRequest
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def _write_loop(db_path: str, storage: StorageSettings, args, stop, written) -> None:
+    store = AuditStore(db_path, storage=storage)
+    traces = [f"trace-{i}" for i in range(args.traces)]
+    ts = datetime.now(timezone.utc)
+    while not stop.is_set():
+        batch = []
+        for _ in range(args.batch):
+            ts += timedelta(microseconds=1)
+            batch.append(
+                AuditWriteRequest(
+                    trace_id=random.choice(traces),
+                    event_type=AuditEventType.DECISION_MADE,
+                    timestamp=ts,
+                    payload={"decision": "pass", "reason": "policy_clear", "pad": "x" * args.payload_bytes},
+                )
+            )
+        store.write_many(batch)
+        with written.get_lock():
+            written.value += len(batch)
+    store.close()
+
+
+def run_profile(args, journal_mode: str) -> dict:
+    storage = StorageSettings(
+        journal_mode=journal_mode,
+        synchronous=args.synchronous,
+        reader_pool_size=args.readers,
+    )
+    db_path = str(Path(tempfile.mkdtemp(prefix="audit-bench-")) / "audit.db")
+    store = AuditStore(db_path, storage=storage)
+
+    traces = [f"trace-{i}" for i in range(args.traces)]
+    stop = mp.Event()
+    written = mp.Value("q", 0)
+    read_latencies: list[list[float]] = [[] for _ in range(args.readers)]
+
+    def reader(slot: int) -> None:
+        out = read_latencies[slot]
+        while not stop.is_set():
+            started = time.perf_counter()
+            store.list_by_trace(random.choice(traces))
+            out.append(time.perf_counter() - started)
+
+    writer = mp.Process(target=_write_loop, args=(db_path, storage, args, stop, written))
+    writer.start()
+    time.sleep(args.warmup)
+    written_at_start = written.value
+
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(args.readers)]
+    for t in threads:
+        t.start()
+
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    writer.join()
+    store.close()
+
+    reads = sorted(x for slot in read_latencies for x in slot)
+    return {
+        "journal_mode": journal_mode,
+        "synchronous": args.synchronous,
+        "writes_per_s": round((written.value - written_at_start) / args.seconds),
+        "reads": len(reads),
+        "read_p50_ms": round(percentile(reads, 50) * 1000, 3),
+        "read_p99_ms": round(percentile(reads, 99) * 1000, 3),
+        "read_p999_ms": round(percentile(reads, 99.9) * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--traces", type=int, default=1_000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--payload-bytes", type=int, default=256)
+    parser.add_argument("--synchronous", choices=["NORMAL", "FULL"], default="NORMAL")
+    parser.add_argument("--journal-mode", choices=["wal", "delete", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["delete", "wal"] if args.journal_mode == "both" else [args.journal_mode]
+    for mode in modes:
+        print(run_profile(args, mode))
+
+
+if __name__ == "__main__":
+    main()
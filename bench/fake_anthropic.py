@@ -0,0 +1,160 @@
+"""
+Local stand-in for the Anthropic Messages API with configurable latency.
+
+Serves POST /v1/messages and answers with a valid advisory JSON after a
+delay drawn from a per-model distribution. Point the orchestrator at it with
+ANTHROPIC_BASE_URL=http://127.0.0.1:8099 (any ANTHROPIC_API_KEY works).
+
+Distributions (per model, or "default"):
+    fixed:SECONDS
+    uniform:LOW,HIGH
+    lognormal:MEDIAN,SIGMA          median latency and log-space sigma
+    bimodal:FAST,SLOW,P_SLOW        FAST most of the time, SLOW with probability P_SLOW
+
+    python bench/fake_anthropic.py --port 8099 \\
+        --latency claude-3-haiku-20240307=bimodal:0.3,4.0,0.1 \\
+        --latency claude-3-5-haiku-20241022=lognormal:0.5,0.3 \\
+        --error-rate 0.01 --invalid-rate 0.01
+
+GET /stats returns request counts per model; POST /config replaces the
+distributions and rates at runtime (same syntax, as JSON).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import uuid
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def parse_distribution(spec: str):
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        (seconds,) = values
+        return lambda: seconds
+    if kind == "uniform":
+        low, high = values
+        return lambda: random.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    if kind == "bimodal":
+        fast, slow, p_slow = values
+        return lambda: slow if random.random() < p_slow else fast
+    raise ValueError(f"unknown latency distribution: {spec}")
+
+
+class FakeConfig:
+    def __init__(self, latencies: dict[str, str], error_rate: float, invalid_rate: float):
+        self.specs = dict(latencies)
+        self.latencies = {model: parse_distribution(spec) for model, spec in latencies.items()}
+        self.latencies.setdefault("default", parse_distribution("fixed:0.2"))
+        self.error_rate = error_rate
+        self.invalid_rate = invalid_rate
+
+    def delay(self, model: str) -> float:
+        return max(0.0, (self.latencies.get(model) or self.latencies["default"])())
+
+
+def advisory_text(prompt: str) -> str:
+    recommendation = "caution" if '"result": "reject"' in prompt else "proceed"
+    return json.dumps({
+        "recommendation": recommendation,
+        "rationale": "Fake advisory generated for load testing.",
+        "risk_flags": ["position_limit_check"],
+        "confidence": 0.6,
+        "suggested_next_steps": ["review_position_size"],
+    })
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI(title="Fake Anthropic")
+    app.state.config = config
+    requests_by_model: Counter = Counter()
+    outcomes: Counter = Counter()
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        model = body.get("model", "default")
+        cfg: FakeConfig = app.state.config
+        requests_by_model[model] += 1
+
+        await asyncio.sleep(cfg.delay(model))
+
+        if random.random() < cfg.error_rate:
+            outcomes["error"] += 1
+            return JSONResponse(
+                status_code=529,
+                content={"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}},
+            )
+
+        prompt = body["messages"][-1]["content"]
+        if random.random() < cfg.invalid_rate:
+            outcomes["invalid"] += 1
+            text = "I cannot help with that."
+        else:
+            outcomes["ok"] += 1
+            text = advisory_text(prompt if isinstance(prompt, str) else json.dumps(prompt))
+
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(str(prompt)) // 4, "output_tokens": len(text) // 4},
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": dict(requests_by_model), "outcomes": dict(outcomes)}
+
+    @app.post("/config")
+    async def configure(body: dict):
+        cfg: FakeConfig = app.state.config
+        app.state.config = FakeConfig(
+            {**cfg.specs, **body.get("latency", {})},
+            body.get("error_rate", cfg.error_rate),
+            body.get("invalid_rate", cfg.invalid_rate),
+        )
+        return {"latency": app.state.config.specs}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", action="append", default=[], metavar="MODEL=DIST")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    latencies = dict(spec.split("=", 1) for spec in args.latency)
+    for spec in latencies.values():
+        parse_distribution(spec)
+
+    import uvicorn
+
+    uvicorn.run(
+        create_app(FakeConfig(latencies, args.error_rate, args.invalid_rate)),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
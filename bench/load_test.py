@@ -0,0 +1,341 @@
+"""
+Open-loop load test for the full stack on localhost.
+
+Boots the fake Anthropic server, audit-mcp, risk-mcp and the orchestrator
+as uvicorn subprocesses on free ports (temporary data directories, the
+repo's policies/risk tree), then fires requests at a fixed rate regardless
+of how fast responses come back. Latency is measured from each request's
+scheduled send time, so queueing inside the client counts against the
+service instead of hiding it (no coordinated omission).
+
+Reports throughput, errors and p50/p99/p999 per endpoint, plus per-stage
+timings taken from the orchestrator's Server-Timing header. With
+--baseline, compares p99s against a previous --output file and exits
+non-zero on a regression beyond --max-regression.
+
+    PYTHONPATH=. python bench/load_test.py --rps 50 --seconds 30 \\
+        --mix decision=8,risk=1,audit=1 --llm-latency lognormal:0.4,0.3 \\
+        --llm-error-rate 0.01 --output bench_output.json
+
+The load generator shares the machine with the services; on small hosts
+keep --rps modest or point --*-url at services running elsewhere.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+REPO = Path(__file__).resolve().parent.parent
+SYMBOLS = ["AAPL", "MSFT", "NVDA"]
+DESKS = ["equities", "macro"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class Stack:
+    """The three services plus the LLM stub, each in its own uvicorn process."""
+
+    def __init__(self, args):
+        self.args = args
+        self.data_dir = Path(tempfile.mkdtemp(prefix="aitdp-load-"))
+        self.ports = {name: free_port() for name in ("llm", "audit", "risk", "orchestrator")}
+        self.procs: list[subprocess.Popen] = []
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.ports[name]}"
+
+    def _spawn(self, name: str, argv: list[str], cwd: Path, env: dict[str, str]) -> None:
+        log = open(self.data_dir / f"{name}.log", "w")
+        python_path = os.pathsep.join(p for p in (str(REPO), str(cwd), os.environ.get("PYTHONPATH")) if p)
+        full_env = {**os.environ, **env, "PYTHONPATH": python_path}
+        self.procs.append(
+            subprocess.Popen(argv, cwd=cwd, env=full_env, stdout=log, stderr=subprocess.STDOUT)
+        )
+
+    def _uvicorn(self, name: str, app_dir: str, module: str, env: dict[str, str]) -> None:
+        self._spawn(
+            name,
+            [sys.executable, "-m", "uvicorn", module, "--port", str(self.ports[name]), "--log-level", "warning",
+             "--no-access-log"],
+            REPO / "apps" / app_dir,
+            env,
+        )
+
+    def start(self) -> None:
+        a = self.args
+        primary = os.environ.get("CLAUDE_PRIMARY_MODEL", "claude-3-haiku-20240307")
+        fallback = os.environ.get("CLAUDE_FALLBACK_MODEL", "claude-3-5-haiku-20241022")
+        self._spawn(
+            "llm",
+            [sys.executable, str(REPO / "bench" / "fake_anthropic.py"), "--port", str(self.ports["llm"]),
+             "--latency", f"{primary}={a.llm_latency}",
+             "--latency", f"{fallback}={a.llm_fallback_latency}",
+             "--error-rate", str(a.llm_error_rate), "--invalid-rate", str(a.llm_invalid_rate)],
+            REPO,
+            {},
+        )
+        self._uvicorn("audit", "audit-mcp", "apps.audit_mcp.main:app", {
+            "AUDIT_DB_PATH": str(self.data_dir / "audit.db"),
+        })
+        self._wait("audit")
+        self._uvicorn("risk", "risk-mcp", "apps.risk_mcp.main:app", {
+            "AUDIT_MCP_BASE_URL": self.url("audit"),
+            "RISK_POLICY_DIR": str(REPO / "policies" / "risk"),
+            "RISK_AUDIT_OUTBOX_PATH": str(self.data_dir / "risk-outbox.db"),
+        })
+        self._uvicorn("orchestrator", "orchestrator", "apps.orchestrator.main:app", {
+            "AUDIT_MCP_BASE_URL": self.url("audit"),
+            "RISK_MCP_BASE_URL": self.url("risk"),
+            "ANTHROPIC_API_KEY": os.environ.get("ANTHROPIC_API_KEY", "fake"),
+            "ANTHROPIC_BASE_URL": self.url("llm"),
+            "ADVISORY_CACHE_ENABLED": "true" if a.advisory_cache else "false",
+        })
+        for name in ("llm", "risk", "orchestrator"):
+            self._wait(name)
+
+    def _wait(self, name: str, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        path = "/stats" if name == "llm" else "/health"
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(self.url(name) + path, timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"{name} did not become healthy; see {self.data_dir / (name + '.log')}")
+
+    def stop(self) -> None:
+        for proc in self.procs:
+            proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def make_trade(rng: random.Random, distinct: int) -> tuple[dict, dict]:
+    # A bounded pool of distinct trades controls how often advisories repeat (cache/coalescing).
+    n = rng.randrange(distinct)
+    trade = {
+        "symbol": SYMBOLS[n % len(SYMBOLS)],
+        "side": "buy" if n % 2 else "sell",
+        "quantity": 100 + (n * 997) % 80_000,
+        "order_type": "market",
+    }
+    actor = {"user_id": f"trader-{n % 17}", "role": "trader", "desk": DESKS[n % len(DESKS)]}
+    return trade, actor
+
+
+def build_request(kind: str, urls: dict[str, str], rng: random.Random, distinct: int) -> tuple[str, dict, dict]:
+    trace_id = f"load-{uuid.uuid4()}"
+    trade, actor = make_trade(rng, distinct)
+    as_of = datetime.now(timezone.utc).isoformat()
+    if kind == "decision":
+        return f"{urls['orchestrator']}/trade/decision", {}, {
+            "trace_id": trace_id, "actor": actor, "trade": trade, "as_of": as_of,
+        }
+    if kind == "recommendation":
+        return f"{urls['orchestrator']}/trade/recommendation", {"X-Trace-Id": trace_id}, {
+            "request_id": str(uuid.uuid4()), "actor": actor, "trade": trade, "intent": "load test", "as_of": as_of,
+        }
+    if kind == "risk":
+        return f"{urls['risk']}/evaluate", {}, {
+            "trace_id": trace_id, "actor": actor, "trade": trade, "as_of": as_of,
+        }
+    if kind == "audit":
+        return f"{urls['audit']}/audit/log", {}, {
+            "trace_id": trace_id, "event_type": "request_received", "timestamp": as_of,
+            "payload": {"source": "load_test", "trade": trade},
+        }
+    raise ValueError(f"unknown endpoint kind: {kind}")
+
+
+def parse_server_timing(header: str) -> dict[str, float]:
+    stages = {}
+    for metric in header.split(","):
+        name, *params = [p.strip() for p in metric.split(";")]
+        for param in params:
+            if param.startswith("dur="):
+                stages[name] = float(param[4:])
+    return stages
+
+
+async def drive(args, urls: dict[str, str]) -> dict:
+    mix = {k: float(v) for k, v in (part.split("=") for part in args.mix.split(","))}
+    kinds, weights = list(mix), list(mix.values())
+    rng = random.Random(args.seed)
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    stage_ms: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, Counter] = defaultdict(Counter)
+    late_starts = 0
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+
+        async def fire(kind: str, scheduled: float) -> None:
+            url, headers, body = build_request(kind, urls, rng, args.distinct_trades)
+            try:
+                r = await client.post(url, json=body, headers=headers)
+                status = str(r.status_code)
+                timing = r.headers.get("server-timing")
+                if timing and r.status_code == 200:
+                    for stage, dur in parse_server_timing(timing).items():
+                        stage_ms[stage].append(dur)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies[kind].append(time.perf_counter() - scheduled)
+            statuses[kind][status] += 1
+
+        total = int(args.rps * args.seconds)
+        start = time.perf_counter() + 0.1
+        tasks = []
+        for i in range(total):
+            scheduled = start + i / args.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -0.01:
+                late_starts += 1
+            tasks.append(asyncio.create_task(fire(rng.choices(kinds, weights)[0], scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for kind, values in latencies.items():
+        values.sort()
+        ok = statuses[kind].get("200", 0)
+        endpoints[kind] = {
+            "requests": len(values),
+            "ok": ok,
+            "throughput_rps": round(ok / elapsed, 2),
+            "statuses": dict(statuses[kind]),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "p999_ms": round(percentile(values, 99.9) * 1000, 2),
+        }
+    stages = {}
+    for stage, values in stage_ms.items():
+        values.sort()
+        stages[stage] = {
+            "samples": len(values),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "p999_ms": round(percentile(values, 99.9), 2),
+        }
+
+    return {
+        "target_rps": args.rps,
+        "seconds": round(elapsed, 2),
+        "late_starts": late_starts,
+        "endpoints": endpoints,
+        "stages": stages,
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    regressions = []
+    for section in ("endpoints", "stages"):
+        for name, current in report[section].items():
+            before = baseline.get(section, {}).get(name)
+            if not before or not before.get("p99_ms"):
+                continue
+            ratio = current["p99_ms"] / before["p99_ms"]
+            if ratio > 1 + max_regression:
+                regressions.append(
+                    f"{section[:-1]} {name}: p99 {before['p99_ms']}ms -> {current['p99_ms']}ms ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    print(f"target {report['target_rps']} rps for {report['seconds']}s, late starts: {report['late_starts']}")
+    print(f"{'endpoint':<16}{'reqs':>8}{'ok rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}  statuses")
+    for name, e in sorted(report["endpoints"].items()):
+        print(f"{name:<16}{e['requests']:>8}{e['throughput_rps']:>10}{e['p50_ms']:>10}{e['p99_ms']:>10}"
+              f"{e['p999_ms']:>10}  {e['statuses']}")
+    if report["stages"]:
+        print(f"{'stage':<16}{'samples':>8}{'':>10}{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}")
+        for name, s in report["stages"].items():
+            print(f"{name:<16}{s['samples']:>8}{'':>10}{s['p50_ms']:>10}{s['p99_ms']:>10}{s['p999_ms']:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--mix", default="decision=8,risk=1,audit=1",
+                        help="endpoint weights: decision, recommendation, risk, audit")
+    parser.add_argument("--distinct-trades", type=int, default=500)
+    parser.add_argument("--llm-latency", default="lognormal:0.4,0.3")
+    parser.add_argument("--llm-fallback-latency", default="lognormal:0.5,0.3")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-invalid-rate", type=float, default=0.0)
+    parser.add_argument("--no-advisory-cache", dest="advisory_cache", action="store_false")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--orchestrator-url", help="use running services instead of booting the stack")
+    parser.add_argument("--risk-url")
+    parser.add_argument("--audit-url")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report from a previous run to compare p99s against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p99 growth vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    stack = None
+    if args.orchestrator_url:
+        urls = {"orchestrator": args.orchestrator_url, "risk": args.risk_url, "audit": args.audit_url}
+    else:
+        stack = Stack(args)
+        stack.start()
+        urls = {name: stack.url(name) for name in ("orchestrator", "risk", "audit")}
+
+    try:
+        report = asyncio.run(drive(args, urls))
+    finally:
+        if stack is not None:
+            stack.stop()
+
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.max_regression)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Per-observation cost of shared/instrumentation.
+
+Times histogram.observe, counter.inc (direct child and via labels()), the
+timed() decorator and Histogram.time()/observe_since(), and subtracts the
+cost of an empty call so the numbers are the instrumentation's own overhead.
+With --threads N it repeats the histogram case with N threads observing at
+once, and checks that no observation was lost. It then runs --churn
+short-lived threads and checks that their shards are retired on merge
+without losing counts. Exits non-zero if observe() exceeds --budget-ns.
+
+    PYTHONPATH=. python bench/metrics_overhead.py [--iterations 1000000] [--threads 4] [--churn 500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+import timeit
+
+from shared.instrumentation import Registry, timed
+
+
+def per_call_ns(fn, iterations: int, repeat: int = 5) -> float:
+    return min(timeit.repeat(fn, number=iterations, repeat=repeat)) / iterations * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--churn", type=int, default=500)
+    parser.add_argument("--budget-ns", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    registry = Registry()
+    hist = registry.histogram("bench_seconds", "bench")
+    labelled = registry.counter("bench_labelled_total", "bench", ["route"])
+    child = labelled.labels("/evaluate")
+    plain = registry.counter("bench_total", "bench")
+
+    def noop(x=None):
+        return x
+
+    @timed(hist)
+    def decorated():
+        return None
+
+    def with_timer():
+        started = hist.time()
+        hist.observe_since(started)
+
+    baseline = per_call_ns(lambda: noop(0.0123), args.iterations)
+    cases = {
+        "histogram.observe": lambda: hist.observe(0.0123),
+        "counter.inc": lambda: plain.inc(),
+        "labelled.inc (child)": lambda: child.inc(),
+        "labelled.labels().inc": lambda: labelled.labels("/evaluate").inc(),
+        "timed() decorator": decorated,
+        "histogram.time()/observe_since": with_timer,
+    }
+    results = {name: round(per_call_ns(fn, args.iterations) - baseline, 1) for name, fn in cases.items()}
+    print({"baseline_call_ns": round(baseline, 1), "overhead_ns": results})
+
+    if args.threads > 1:
+        contended = registry.histogram("bench_threads_seconds", "bench")
+        per_thread = args.iterations // args.threads
+
+        def work():
+            for _ in range(per_thread):
+                contended.observe(0.0004)
+
+        threads = [threading.Thread(target=work) for _ in range(args.threads)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        counts, _ = contended.snapshot()
+        print({
+            "threads": args.threads,
+            "observations": sum(counts),
+            "expected": per_thread * args.threads,
+            "ns_per_observation": round(elapsed / (per_thread * args.threads) * 1e9, 1),
+        })
+        if sum(counts) != per_thread * args.threads:
+            raise SystemExit("lost observations under concurrency")
+
+    if args.churn:
+        churned = registry.histogram("bench_churn_seconds", "bench")
+        total = registry.counter("bench_churn_total", "bench")
+
+        def short_lived():
+            churned.observe(0.0004)
+            total.inc()
+
+        for _ in range(args.churn):
+            t = threading.Thread(target=short_lived)
+            t.start()
+            t.join()
+        counts, _ = churned.snapshot()
+        print({
+            "churned_threads": args.churn,
+            "observations": sum(counts),
+            "counter": total.value,
+            "live_shards": len(churned._shards),
+        })
+        if sum(counts) != args.churn or total.value != args.churn:
+            raise SystemExit("lost observations from exited threads")
+        if len(churned._shards) > threading.active_count():
+            raise SystemExit("shards of exited threads were not retired")
+
+    if results["histogram.observe"] > args.budget_ns:
+        raise SystemExit(f"histogram.observe overhead {results['histogram.observe']}ns exceeds {args.budget_ns}ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cost of the durable audit outbox on risk-mcp's request path.
+
+Every /evaluate and /evaluate/batch call returns only after
+AuditOutbox.append has committed its events (WAL, synchronous=FULL), i.e.
+after one fsync per request. This measures append latency for one event
+(a single /evaluate) and for a batch, and the aggregate appends/s when
+--threads request handlers append at once (appends serialize on the outbox
+lock). synchronous=NORMAL is included for comparison only: it gives up
+durability of the last commits on power loss.
+
+fsync cost depends entirely on the disk: point --dir at the volume the
+service's RISK_AUDIT_OUTBOX_PATH lives on (tmpfs reports near-zero).
+
+    PYTHONPATH=.:apps/risk-mcp python bench/risk_outbox_append.py [--dir /var/lib/risk-mcp] [--appends 500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from apps.risk_mcp.outbox import AuditOutbox
+
+
+def event(i: int) -> dict:
+    return {
+        "trace_id": f"trace-{i:08d}",
+        "event_type": "decision_made",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "payload": {"decision": "proceed", "policy_id": "RISK-POS-001", "requested": 1500, "max_allowed": 50_000},
+    }
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+def run(directory: str, synchronous: str, appends: int, batch: int, threads: int) -> dict:
+    with tempfile.TemporaryDirectory(dir=directory) as d:
+        outbox = AuditOutbox(f"{d}/outbox.db", "http://127.0.0.1:9", max_events=10_000_000)
+        outbox._conn.execute(f"PRAGMA synchronous = {synchronous}")
+
+        def latencies(size: int) -> list[float]:
+            out = []
+            for i in range(appends):
+                events = [event(i * size + j) for j in range(size)]
+                started = time.perf_counter()
+                outbox.append(events)
+                out.append((time.perf_counter() - started) * 1000)
+            return sorted(out)
+
+        single = latencies(1)
+        batched = latencies(batch)
+
+        per_thread = appends // threads
+
+        def worker(offset: int) -> None:
+            for i in range(per_thread):
+                outbox.append([event(offset + i)])
+
+        workers = [threading.Thread(target=worker, args=(n * per_thread,)) for n in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+        outbox._conn.close()
+        return {
+            "synchronous": synchronous,
+            "append_1_p50_ms": round(percentile(single, 0.5), 3),
+            "append_1_p99_ms": round(percentile(single, 0.99), 3),
+            f"append_{batch}_p50_ms": round(percentile(batched, 0.5), 3),
+            f"append_{batch}_p99_ms": round(percentile(batched, 0.99), 3),
+            f"appends_per_s_{threads}_threads": round(per_thread * threads / elapsed),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dir", default=None, help="directory on the disk to measure (default: system temp dir)")
+    parser.add_argument("--appends", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    for synchronous in ("FULL", "NORMAL"):
+        print(run(args.dir, synchronous, args.appends, args.batch, args.threads))
+
+
+if __name__ == "__main__":
+    main()
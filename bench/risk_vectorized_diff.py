@@ -0,0 +1,166 @@
+"""
+Differential harness: scalar vs vectorized max_position evaluation.
+
+Generates random policy sets (several desks/symbols, multiple policies per
+key, multiple effective-dated versions per policy) and random trades, then
+asserts that the per-trade scalar path, the scalar batch path and the NumPy
+columnar path return identical results and audit payloads.
+
+A share of trades get off-type quantities (fractional, numeric strings,
+bools, huge ints, missing), and the same share of policies get off-type
+max_shares limits (fractional, bools, ints wider than int64). Ints above
+2**53 on both sides check that int64 compares stay exact. For all of these
+the paths must agree on the decision or raise the same exception type,
+since /evaluate/batch takes raw dicts and policies are plain YAML.
+
+    PYTHONPATH=.:apps/risk-mcp python bench/risk_vectorized_diff.py --rounds 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+from apps.risk_mcp.policy_loader import CompiledPolicySet
+from apps.risk_mcp.rules import check_max_position, check_max_position_batch, parse_as_of
+from apps.risk_mcp.vectorized import check_max_position_columnar
+
+DESKS = ["equities", "fx", "rates", "credit"]
+SYMBOLS = ["AAPL", "MSFT", "GOOG", "TSLA", "NVDA", "AMZN"]
+BASE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+BIG = (1 << 60) + 1  # beyond float64's exact integers, within int64
+
+
+def random_limit(rng: random.Random, odd_share: float):
+    limit = rng.randint(1, 100_000)
+    if rng.random() >= odd_share:
+        return limit
+    return rng.choice([limit + 0.5, float(limit), True, 1 << 70, BIG - 1, BIG])
+
+
+def random_policies(rng: random.Random, odd_share: float = 0.0) -> list[dict]:
+    policies = []
+    for n in range(rng.randint(0, 40)):
+        desk = rng.choice(DESKS)
+        symbol = rng.choice(SYMBOLS)
+        for v in range(rng.randint(1, 3)):
+            policies.append(
+                {
+                    "policy_id": f"RISK-POS-{n}",
+                    "version": f"v{v + 1}",
+                    "scope": {"desk": desk, "symbol": symbol},
+                    "rule": {
+                        "type": rng.choice(["max_position", "max_position", "max_notional"]),
+                        "max_shares": random_limit(rng, odd_share),
+                    },
+                    "effective_from": _iso(BASE + timedelta(days=rng.randint(-30, 365))),
+                }
+            )
+    rng.shuffle(policies)
+    return policies
+
+
+def random_quantity(rng: random.Random, odd_share: float):
+    quantity = rng.randint(1, 120_000)
+    if rng.random() >= odd_share:
+        return quantity
+    return rng.choice([
+        quantity + 0.5,
+        float(quantity),
+        str(quantity),
+        True,
+        1 << 70,
+        BIG,
+        BIG - 1,
+        _MISSING,
+    ])
+
+
+_MISSING = object()
+
+
+def random_items(rng: random.Random, n: int, odd_share: float = 0.0) -> list[dict]:
+    items = []
+    for i in range(n):
+        trade = {"symbol": rng.choice(SYMBOLS + ["ZZZZ"])}
+        quantity = random_quantity(rng, odd_share)
+        if quantity is not _MISSING:
+            trade["quantity"] = quantity
+        items.append({
+            "trace_id": f"trace-{i}",
+            "actor": {"desk": rng.choice(DESKS + ["unknown"])},
+            "trade": trade,
+            "as_of": _iso(BASE + timedelta(days=rng.randint(-60, 400), seconds=rng.randint(0, 86_399))),
+        })
+    return items
+
+
+def _outcome(fn):
+    try:
+        return fn()
+    except Exception as e:
+        return ("raises", type(e).__name__)
+
+
+def check_round(rng: random.Random, n_items: int, odd_share: float) -> int:
+    policy_set = CompiledPolicySet(random_policies(rng, odd_share))
+    items = random_items(rng, n_items, odd_share)
+
+    def scalar(item):
+        return check_max_position(
+            policy_set.match(
+                "max_position", item["actor"]["desk"], item["trade"]["symbol"], parse_as_of(item["as_of"])
+            ),
+            item["trade"],
+        )
+
+    # Batches raise on their first bad row, so compare trade by trade as well as whole batches.
+    mismatches = 0
+    for item in items:
+        a = _outcome(lambda: scalar(item))
+        b = _outcome(lambda: check_max_position_batch(policy_set, [item])[0])
+        c = _outcome(lambda: check_max_position_columnar(policy_set, [item])[0])
+        if not (a == b == c):
+            mismatches += 1
+            if mismatches <= 5:
+                print("MISMATCH", {"item": item, "scalar": a, "batch": b, "columnar": c})
+
+    whole = _outcome(lambda: [scalar(item) for item in items])
+    if not (whole == _outcome(lambda: check_max_position_batch(policy_set, items))
+            == _outcome(lambda: check_max_position_columnar(policy_set, items))):
+        mismatches += 1
+        print("BATCH MISMATCH", {"items": len(items), "scalar": whole if whole[0] == "raises" else "ok"})
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--items", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--odd-share", type=float, default=0.05, help="Share of trades and policies with off-type quantities/limits"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    total = 0
+    for _ in range(args.rounds):
+        # Half the rounds are all-int so whole batches also exercise the pure columnar path.
+        odd_share = args.odd_share if rng.random() < 0.5 else 0.0
+        total += check_round(rng, rng.randint(0, args.items), odd_share)
+
+    print({"rounds": args.rounds, "mismatches": total})
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Per-request serialization cost of the shared schemas.
+
+Times validation and dumping for every model in shared/schemas/trade.py and
+audit.py. It then compares what one /trade/recommendation request spends on
+JSON work in two ways:
+
+  before   model_dump() for the audit payload, model_dump(mode="json") for the
+           decision event, model_copy for the response, an AuditWriteBatchRequest
+           built and dumped for the audit call, and FastAPI's response encoding
+  after    shared.schemas.serialization: each model dumped once to bytes,
+           spliced into the audit batch body and reused as the response body
+
+    PYTHONPATH=.:apps/orchestrator python bench/schema_serialization.py [--iterations 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from shared.schemas import serialization
+from shared.schemas.audit import (
+    AuditEvent,
+    AuditEventType,
+    AuditWriteBatchRequest,
+    AuditWriteBatchResponse,
+    AuditWriteRequest,
+    AuditWriteResponse,
+)
+from shared.schemas.serialization import dumps, json_array, serialize
+from shared.schemas.trade import (
+    ComplianceResult,
+    RiskFlag,
+    TradeIntent,
+    TradeRecommendationRequest,
+    TradeRecommendationResponse,
+)
+
+NOW = datetime(2026, 1, 2, 15, 30, tzinfo=timezone.utc)
+
+REQUEST = {
+    "request_id": "6f1c7a1e-4b7e-4b8e-9d0a-3f1f2b8c9d10",
+    "actor": {"user_id": "trader-7", "desk": "equities", "role": "trader"},
+    "trade": {"symbol": "AAPL", "side": "buy", "quantity": 1500, "order_type": "limit", "limit_price": 187.25},
+    "intent": "rebalance into large-cap tech ahead of earnings",
+    "constraints": {"max_slippage_bps": 15},
+    "as_of": NOW.isoformat(),
+}
+RESPONSE = {
+    "recommendation": "escalate",
+    "modified_trade": None,
+    "rationale": "Quantity exceeds desk threshold; escalation required.",
+    "risk_flags": [{"type": "size", "severity": "high", "evidence_ref": "mock:size_gate"}],
+    "compliance": {"status": "needs_review", "policy_refs": ["RISK-012"], "evidence_refs": ["mock:size_gate"]},
+    "confidence": 0.9,
+    "next_steps": ["escalate_to_risk"],
+    "audit_id": "pending",
+}
+WRITE = {"trace_id": "trace-1", "event_type": "decision_made", "timestamp": NOW.isoformat(), "payload": RESPONSE}
+WRITE_RESPONSE = {"audit_id": "AUD-0123456789ab", "event_hash": "ab" * 32, "prev_hash": "cd" * 32, "seq": 2}
+
+SAMPLES = {
+    TradeIntent: REQUEST["trade"],
+    TradeRecommendationRequest: REQUEST,
+    RiskFlag: RESPONSE["risk_flags"][0],
+    ComplianceResult: RESPONSE["compliance"],
+    TradeRecommendationResponse: RESPONSE,
+    AuditWriteRequest: WRITE,
+    AuditWriteResponse: WRITE_RESPONSE,
+    AuditWriteBatchRequest: {"events": [WRITE, WRITE]},
+    AuditWriteBatchResponse: {"results": [WRITE_RESPONSE, WRITE_RESPONSE]},
+    AuditEvent: {**WRITE, "audit_id": "AUD-0123456789ab", "event_hash": "ab" * 32, "seq": 2},
+}
+
+
+def per_call_us(fn, iterations: int) -> float:
+    return round(min(timeit.repeat(fn, number=iterations, repeat=5)) / iterations * 1e6, 2)
+
+
+def request_path_before(req: TradeRecommendationRequest, resp: TradeRecommendationResponse) -> bytes:
+    received = {
+        "request_id": req.request_id,
+        "actor": req.actor.model_dump(),
+        "trade": req.trade.model_dump(),
+        "intent": req.intent,
+        "as_of": req.as_of.isoformat(),
+    }
+    events = [
+        AuditWriteRequest(trace_id="trace-1", event_type=AuditEventType.REQUEST_RECEIVED, timestamp=NOW, payload=received),
+        AuditWriteRequest(
+            trace_id="trace-1", event_type=AuditEventType.DECISION_MADE, timestamp=NOW, payload=resp.model_dump(mode="json")
+        ),
+    ]
+    json.dumps(AuditWriteBatchRequest(events=events).model_dump(mode="json")).encode()
+    final = resp.model_copy(update={"audit_id": "AUD-0123456789ab"})
+    # FastAPI with response_model: re-validate, jsonable_encoder, json.dumps.
+    validated = TradeRecommendationResponse.model_validate(final.model_dump())
+    return json.dumps(jsonable_encoder(validated), separators=(",", ":")).encode()
+
+
+def request_path_after(req: TradeRecommendationRequest, resp: TradeRecommendationResponse) -> bytes:
+    from apps.orchestrator.audit_client import encode_event
+
+    received = {"request_id": req.request_id, "actor": req.actor, "trade": req.trade,
+                "intent": req.intent, "as_of": req.as_of.isoformat()}
+    decision = serialize(resp, hold=("audit_id",))
+    events = [
+        encode_event("trace-1", AuditEventType.REQUEST_RECEIVED, NOW, received),
+        encode_event("trace-1", AuditEventType.DECISION_MADE, NOW, decision.with_fields(audit_id="pending")),
+    ]
+    b'{"events":' + json_array(events) + b"}"
+    return decision.with_fields(audit_id="AUD-0123456789ab")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    print({"json_backend": serialization.BACKEND})
+    for model, sample in SAMPLES.items():
+        instance = model.model_validate(sample)
+        raw = json.dumps(sample)
+        print({
+            "model": model.__name__,
+            "validate_us": per_call_us(lambda: model.model_validate(sample), n),
+            "validate_json_us": per_call_us(lambda: model.model_validate_json(raw), n),
+            "model_dump_json_mode_us": per_call_us(lambda: instance.model_dump(mode="json"), n),
+            "model_dump_json_us": per_call_us(instance.model_dump_json, n),
+            "dumps_us": per_call_us(lambda: dumps(instance), n),
+        })
+
+    req = TradeRecommendationRequest.model_validate(REQUEST)
+    resp = TradeRecommendationResponse.model_validate(RESPONSE)
+    before, after = request_path_before(req, resp), request_path_after(req, resp)
+    if json.loads(before) != json.loads(after):
+        raise SystemExit("response bodies differ between the two paths")
+    before_us = per_call_us(lambda: request_path_before(req, resp), n)
+    after_us = per_call_us(lambda: request_path_after(req, resp), n)
+    print({"request_path": "/trade/recommendation", "before_us": before_us, "after_us": after_us,
+           "speedup": round(before_us / after_us, 2)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Local stand-in for an OTLP/HTTP trace collector, plus a per-decision latency breakdown.
+
+Accepts OTLP JSON at POST /v1/traces (what TRACE_EXPORT=http://.../v1/traces
+sends), keeps the most recent spans in memory and optionally appends them as
+NDJSON in the same flat format the file exporter writes.
+
+    python bench/trace_collector.py --port 4318 [--out spans.ndjson]
+    # services: TRACE_EXPORT=http://127.0.0.1:4318/v1/traces
+
+GET /traces/{trace_id} returns a trace's spans and its breakdown. GET
+/breakdown summarizes recent /trade/decision traces: the end-to-end p50/p99
+and how much wall time went to risk, audit and the model. Overlapping calls
+within a category (e.g. parallel audit writes) are counted once.
+
+    python bench/trace_collector.py --summarize spans.ndjson   # same summary from files
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections import OrderedDict, defaultdict
+from typing import Any, Iterable
+
+from fastapi import FastAPI, HTTPException, Request
+
+# Orchestrator client spans by category.
+CATEGORIES = {"risk.evaluate": "risk", "audit.write": "audit", "model.call": "model"}
+DECISION_ROOT = "POST /trade/decision"
+
+
+def _attr_value(value: dict[str, Any]) -> Any:
+    for key in ("stringValue", "boolValue", "doubleValue"):
+        if key in value:
+            return value[key]
+    if "intValue" in value:
+        return int(value["intValue"])
+    return None
+
+
+def flatten_otlp(body: dict[str, Any]) -> Iterable[dict[str, Any]]:
+    """OTLP JSON -> the flat span dicts written by shared.tracing.FileExporter."""
+    kinds = {1: "internal", 2: "server", 3: "client"}
+    for resource_spans in body.get("resourceSpans", []):
+        resource = {a["key"]: _attr_value(a["value"]) for a in resource_spans.get("resource", {}).get("attributes", [])}
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for s in scope_spans.get("spans", []):
+                attributes = {a["key"]: _attr_value(a["value"]) for a in s.get("attributes", [])}
+                start, end = int(s["startTimeUnixNano"]), int(s["endTimeUnixNano"])
+                yield {
+                    "trace_id": attributes.pop("aitdp.trace_id", s["traceId"]),
+                    "span_id": s["spanId"],
+                    "parent_id": s.get("parentSpanId"),
+                    "name": s["name"],
+                    "service": resource.get("service.name"),
+                    "kind": kinds.get(s.get("kind"), "internal"),
+                    "start_ns": start,
+                    "end_ns": end,
+                    "duration_ms": round((end - start) / 1e6, 3),
+                    "attributes": attributes,
+                    "error": (s.get("status") or {}).get("message"),
+                }
+
+
+def _union_ms(intervals: list[tuple[int, int]]) -> float:
+    total = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total / 1e6
+
+
+def breakdown(spans: list[dict[str, Any]]) -> dict[str, Any] | None:
+    """Wall time per category for one decision trace; None if its root span is missing."""
+    root = next((s for s in spans if s["name"] == DECISION_ROOT and s["service"] == "orchestrator"), None)
+    if root is None:
+        return None
+    intervals: dict[str, list[tuple[int, int]]] = defaultdict(list)
+    for s in spans:
+        category = CATEGORIES.get(s["name"])
+        if category and s["service"] == "orchestrator":
+            intervals[category].append((s["start_ns"], s["end_ns"]))
+    result = {"total_ms": root["duration_ms"]}
+    for category in ("risk", "audit", "model"):
+        result[f"{category}_ms"] = round(_union_ms(intervals[category]), 3)
+    # Time inside the callees, from their own server spans.
+    for service in ("risk-mcp", "audit-mcp"):
+        result[f"{service}_server_ms"] = round(
+            sum(s["duration_ms"] for s in spans if s["service"] == service and s["kind"] == "server"), 3
+        )
+    return result
+
+
+def _percentile(values: list[float], p: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def summarize(traces: dict[str, list[dict[str, Any]]]) -> dict[str, Any]:
+    rows = [b for b in (breakdown(spans) for spans in traces.values()) if b is not None]
+    summary: dict[str, Any] = {"decisions": len(rows)}
+    if rows:
+        for key in rows[0]:
+            values = [r[key] for r in rows]
+            summary[key] = {"p50": _percentile(values, 50), "p99": _percentile(values, 99)}
+        total = sum(r["total_ms"] for r in rows)
+        summary["share_of_total"] = {
+            c: round(sum(r[f"{c}_ms"] for r in rows) / total, 3) if total else None for c in ("risk", "audit", "model")
+        }
+    return summary
+
+
+def group_by_trace(spans: Iterable[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
+    traces: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for s in spans:
+        traces[s["trace_id"]].append(s)
+    return traces
+
+
+def create_app(max_traces: int = 10_000, out_path: str | None = None) -> FastAPI:
+    app = FastAPI(title="Trace Collector")
+    traces: OrderedDict[str, list[dict[str, Any]]] = OrderedDict()
+
+    @app.post("/v1/traces")
+    async def ingest(request: Request):
+        spans = list(flatten_otlp(await request.json()))
+        for s in spans:
+            traces.setdefault(s["trace_id"], []).append(s)
+            traces.move_to_end(s["trace_id"])
+        while len(traces) > max_traces:
+            traces.popitem(last=False)
+        if out_path:
+            with open(out_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(s, separators=(",", ":")) + "\n" for s in spans))
+        return {"partialSuccess": {}}
+
+    @app.get("/traces/{trace_id}")
+    async def get_trace(trace_id: str):
+        spans = traces.get(trace_id)
+        if spans is None:
+            raise HTTPException(status_code=404, detail="unknown trace")
+        spans = sorted(spans, key=lambda s: s["start_ns"])
+        return {"trace_id": trace_id, "breakdown": breakdown(spans), "spans": spans}
+
+    @app.get("/breakdown")
+    async def get_breakdown():
+        return summarize(traces)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--out", default=None, help="Also append received spans to this NDJSON file")
+    parser.add_argument("--max-traces", type=int, default=10_000)
+    parser.add_argument("--summarize", nargs="+", metavar="NDJSON", help="Summarize span files and exit")
+    args = parser.parse_args()
+
+    if args.summarize:
+        def spans():
+            for path in args.summarize:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+
+        print(json.dumps(summarize(group_by_trace(spans())), indent=2))
+        return
+
+    import uvicorn
+
+    uvicorn.run(create_app(args.max_traces, args.out), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+In-process metrics: counters, gauges and latency histograms, rendered in the
+Prometheus text format.
+
+Hot-path updates take no lock. Every metric keeps one shard per thread,
+keyed by thread id, and each shard has a single writer. A scrape sums the
+shards, so it may be a few observations behind a writer that is mid-update,
+but it never loses updates. Locks are only taken to create a shard or a
+labelled child, and at merge time. Shards of threads that have exited are
+folded into a retired total when merging, so thread-pool churn does not
+grow the shard dicts.
+
+Histograms are HDR-style log-linear: values are bucketed in whole
+microseconds, with 8 sub-buckets per power of two (<= 12.5% relative error)
+from 1µs to ~38h. Exposition uses the power-of-two bucket edges, which line
+up exactly with the internal buckets.
+
+    REQUEST_SECONDS = histogram("aitdp_example_seconds", "Example latency")
+    started = REQUEST_SECONDS.time()
+    ...
+    REQUEST_SECONDS.observe_since(started)
+
+Each service serves `render()` at GET /metrics. Run several uvicorn
+workers and each one has its own registry, so scrape them individually.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import math
+import threading
+from threading import get_ident
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_SUB_BITS = 3                          # 8 sub-buckets per power of two
+_MANTISSA_BITS = _SUB_BITS + 1
+_LINEAR = 1 << _MANTISSA_BITS          # values below this (µs) get one bucket each
+_MAX_BITS = 37                         # 2**37 µs ≈ 38 hours; larger values land in the last bucket
+_BUCKETS = (_MAX_BITS - _MANTISSA_BITS + 2) << _SUB_BITS
+_SUM = _BUCKETS                        # shard slot holding the running sum in seconds
+
+# Exposed `le` edges: powers of two from 16µs to ~67s, exact bucket boundaries.
+_EXPOSED_EDGES_US = tuple(1 << k for k in range(4, 27))
+_LE_INF = 'le="+Inf"'
+
+
+def _bucket_upper_us(idx: int) -> int:
+    """Exclusive upper bound, in µs, of internal bucket `idx`."""
+    if idx < _LINEAR:
+        return idx + 1
+    shift = (idx >> _SUB_BITS) - 1
+    return ((idx - (shift << _SUB_BITS)) + 1) << shift
+
+
+_BUCKET_UPPER_US = tuple(_bucket_upper_us(i) for i in range(_BUCKETS))
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Sharded:
+    """Per-thread shards plus `_retired`, the folded-in shards of exited threads."""
+
+    __slots__ = ("_shards", "_lock", "_retired")
+
+    def __init__(self, width: int = 1) -> None:
+        self._shards: dict[int, list] = {}
+        self._lock = threading.Lock()
+        self._retired: list = [0] * (width - 1) + [0.0]
+
+    def _merge_shards(self) -> list[list]:
+        """Retire the shards of exited threads, then return every shard to sum."""
+        shards = self._shards
+        # Cheap check first: dead shards can only exist once there are more shards than threads.
+        if len(shards) > threading.active_count():
+            with self._lock:
+                live = {t.ident for t in threading.enumerate()}
+                for ident in [ident for ident in shards if ident not in live]:
+                    shard = shards.pop(ident)
+                    self._retired = [a + b for a, b in zip(self._retired, shard)]
+        return [self._retired, *list(shards.values())]
+
+
+class Counter(_Sharded):
+    """Monotonic counter."""
+
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0) -> None:
+        try:
+            self._shards[get_ident()][0] += amount
+        except KeyError:
+            with self._lock:
+                self._shards.setdefault(get_ident(), [0.0])[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(shard[0] for shard in self._merge_shards())
+
+
+class Gauge(_Sharded):
+    """
+    Point-in-time value.
+
+    Use `set()`, or `inc()`/`dec()`, or `set_function()` for values computed at
+    scrape time (queue depths, pool sizes) — not a mix of them.
+    """
+
+    __slots__ = ("_value", "_fn")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        try:
+            self._shards[get_ident()][0] += amount
+        except KeyError:
+            with self._lock:
+                self._shards.setdefault(get_ident(), [0.0])[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._fn = fn
+
+    @property
+    def value(self) -> float:
+        if self._fn is not None:
+            return float(self._fn())
+        return self._value + sum(shard[0] for shard in self._merge_shards())
+
+
+class Histogram(_Sharded):
+    """Latency histogram in seconds; see the module docstring for the bucket layout."""
+
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        super().__init__(_BUCKETS + 1)
+
+    def observe(self, seconds: float) -> None:
+        try:
+            shard = self._shards[get_ident()]
+        except KeyError:
+            with self._lock:
+                shard = self._shards.setdefault(get_ident(), [0] * _BUCKETS + [0.0])
+        us = int(seconds * 1_000_000)
+        if us < _LINEAR:
+            idx = us if us > 0 else 0
+        else:
+            shift = us.bit_length() - _MANTISSA_BITS
+            idx = (shift << _SUB_BITS) + (us >> shift)
+            if idx >= _BUCKETS:
+                idx = _BUCKETS - 1
+        shard[idx] += 1
+        shard[_SUM] += seconds
+
+    def time(self) -> float:
+        """Start a measurement; pass the result to `observe_since`."""
+        return perf_counter()
+
+    def observe_since(self, started: float) -> None:
+        """Observe the time elapsed since `started` (a `time()` / perf_counter() reading)."""
+        self.observe(perf_counter() - started)
+
+    def snapshot(self) -> tuple[list[int], float]:
+        """Merged (bucket counts, sum of seconds) across all shards."""
+        counts = [0] * _BUCKETS
+        total = 0.0
+        for shard in self._merge_shards():
+            for i, n in enumerate(shard[:_BUCKETS]):
+                if n:
+                    counts[i] += n
+            total += shard[_SUM]
+        return counts, total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound (seconds) of the bucket holding quantile `q`; None when empty."""
+        counts, _ = self.snapshot()
+        count = sum(counts)
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= rank and n:
+                return _BUCKET_UPPER_US[i] / 1_000_000
+        return _BUCKET_UPPER_US[-1] / 1_000_000
+
+    def summary(self) -> dict[str, Any]:
+        counts, total = self.snapshot()
+        count = sum(counts)
+        return {
+            "count": count,
+            "sum_seconds": round(total, 6),
+            **{f"p{label}_seconds": self.quantile(q) for label, q in (("50", 0.5), ("99", 0.99), ("999", 0.999))},
+        }
+
+
+_KINDS = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+
+class MetricFamily:
+    """A named metric with optional labels; `labels(...)` returns the child to update."""
+
+    def __init__(self, kind: str, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str, **kwargs: str):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        child = self._children.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, _KINDS[self.kind]())
+        return child
+
+    def children(self) -> list[tuple[tuple[str, ...], Any]]:
+        return list(self._children.items())
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for values, child in self.children():
+            if self.kind == "histogram":
+                yield from self._render_histogram(values, child)
+            else:
+                suffix = "_total" if self.kind == "counter" and not self.name.endswith("_total") else ""
+                yield f"{self.name}{suffix}{_label_text(self.labelnames, values)} {_format_value(child.value)}"
+
+    def _render_histogram(self, values: tuple[str, ...], child: Histogram) -> Iterator[str]:
+        counts, total = child.snapshot()
+        cumulative = 0
+        i = 0
+        for edge in _EXPOSED_EDGES_US:
+            while i < _BUCKETS and _BUCKET_UPPER_US[i] <= edge:
+                cumulative += counts[i]
+                i += 1
+            le = f'le="{_format_value(edge / 1_000_000)}"'
+            yield f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}"
+        count = sum(counts)
+        yield f"{self.name}_bucket{_label_text(self.labelnames, values, _LE_INF)} {count}"
+        yield f"{self.name}_sum{_label_text(self.labelnames, values)} {_format_value(total)}"
+        yield f"{self.name}_count{_label_text(self.labelnames, values)} {count}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._families: dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, kind: str, name: str, documentation: str, labelnames: Iterable[str]):
+        labelnames = tuple(labelnames)
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(kind, name, documentation, labelnames)
+            elif family.kind != kind or family.labelnames != labelnames:
+                raise ValueError(f"metric {name} already registered as {family.kind}{family.labelnames}")
+        # Unlabelled metrics hand back their single child so call sites update it directly.
+        return family if labelnames else family.labels()
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        return self._family("counter", name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        return self._family("gauge", name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        return self._family("histogram", name, documentation, labelnames)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for family in list(self._families.values()):
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+render = REGISTRY.render
+
+
+def timed(hist: Histogram):
+    """Decorator observing each call's duration; works on plain and async functions."""
+
+    def wrap(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    hist.observe(perf_counter() - started)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(perf_counter() - started)
+
+        return wrapper
+
+    return wrap
@@ -0,0 +1,237 @@
+"""
+Sampling profiler for live services.
+
+A daemon thread wakes `hz` times per second, snapshots every other thread's
+Python stack with sys._current_frames() and counts the stacks. The workers
+are never interrupted or traced, so the cost is one stack walk per thread
+per sample, paid on the sampler thread. It is cheap enough to leave running
+at a few Hz.
+
+Output is the collapsed-stack format ("thread;module:func;module:func N"),
+which flamegraph.pl, speedscope and inferno read directly. By default,
+samples whose leaf is an idle wait (event-loop select, worker queue get,
+condition wait) are dropped, so the output shows where busy time goes.
+
+Two modes, both served by `debug_router()`:
+  - GET /debug/profile?seconds=30&hz=100 runs a one-off capture and returns it.
+  - With continuous_hz > 0, a low-rate sampler runs all the time and keeps
+    per-minute windows; GET /debug/profile/continuous?minutes=5 merges the
+    recent ones.
+
+Access: the routes 404 unless the profiler is enabled. When an admin token
+is configured, callers must send it as X-Admin-Token. In prod, the routes
+refuse to run without a configured token.
+"""
+
+from __future__ import annotations
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+
+MAX_CAPTURE_SECONDS = 300
+MAX_HZ = 250
+MAX_DEPTH = 128
+
+# (file basename, function) leaves that mean "this thread is waiting, not working".
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("base_events.py", "_run_once"),
+}
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename).removesuffix('.py')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame, thread_name: str, include_idle: bool = False) -> Optional[str]:
+    """Root-to-leaf "thread;frame;frame" for one thread, or None for an idle stack."""
+    leaf = frame.f_code
+    if not include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES:
+        return None
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(thread_name.replace(";", "_").replace(" ", "_"))
+    labels.reverse()
+    return ";".join(labels)
+
+
+def render_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class StackSampler:
+    """Samples all other threads at `hz` into a Counter of collapsed stacks."""
+
+    def __init__(self, hz: float, include_idle: bool = False, window_seconds: Optional[float] = None,
+                 max_windows: int = 0):
+        self.interval = 1.0 / hz
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        # Continuous mode: rotate self.stacks into a bounded deque of (window_start, Counter).
+        self.window_seconds = window_seconds
+        self.windows: deque[tuple[float, Counter]] = deque(maxlen=max_windows or None)
+        self._window_start = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        return self.stacks
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names: dict[int, str] = {}
+        names_refreshed = 0.0
+        while not self._stop.wait(self.interval):
+            now = time.time()
+            if now - names_refreshed > 1.0:
+                names = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+                names_refreshed = now
+            batch = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = collapse(frame, names.get(ident, f"thread-{ident}"), self.include_idle)
+                if stack is not None:
+                    batch.append(stack)
+            del frame
+            with self._lock:
+                if self.window_seconds and now - self._window_start >= self.window_seconds:
+                    self.windows.append((self._window_start, self.stacks))
+                    self.stacks = Counter()
+                    self._window_start = now
+                self.stacks.update(batch)
+                self.samples += 1
+
+    def recent(self, seconds: float) -> Counter:
+        """Continuous mode: merged stacks for windows started within the last `seconds`."""
+        cutoff = time.time() - seconds
+        merged: Counter = Counter()
+        with self._lock:
+            for window_start, stacks in self.windows:
+                if window_start >= cutoff:
+                    merged.update(stacks)
+            merged.update(self.stacks)
+        return merged
+
+
+class Profiler:
+    """Per-process profiler state: one on-demand capture at a time, plus the optional continuous sampler."""
+
+    def __init__(self, continuous_hz: float = 0.0, window_minutes: int = 60):
+        self.continuous_hz = continuous_hz
+        self.window_minutes = window_minutes
+        self.continuous: Optional[StackSampler] = None
+        self._capture_lock = threading.Lock()
+
+    def start(self) -> None:
+        if self.continuous_hz > 0 and self.continuous is None:
+            self.continuous = StackSampler(
+                min(self.continuous_hz, MAX_HZ), window_seconds=60, max_windows=self.window_minutes
+            )
+            self.continuous.start()
+
+    def stop(self) -> None:
+        if self.continuous is not None:
+            self.continuous.stop()
+            self.continuous = None
+
+    def begin_capture(self, hz: float, include_idle: bool = False) -> Optional[StackSampler]:
+        """Start a one-off capture; None if one is already running."""
+        if not self._capture_lock.acquire(blocking=False):
+            return None
+        sampler = StackSampler(min(hz, MAX_HZ), include_idle=include_idle)
+        sampler.start()
+        return sampler
+
+    def end_capture(self, sampler: StackSampler) -> Counter:
+        try:
+            return sampler.stop()
+        finally:
+            self._capture_lock.release()
+
+
+def access_error(app_env: str, admin_token: str, provided: Optional[str]) -> Optional[str]:
+    """Why a profiling request must be refused, or None if it may run."""
+    if admin_token:
+        if not provided or not hmac.compare_digest(provided, admin_token):
+            return "invalid or missing X-Admin-Token"
+        return None
+    if app_env.lower() in ("prod", "production"):
+        return "profiling in prod requires ADMIN_TOKEN"
+    return None
+
+
+def debug_router(profiler: Profiler, *, enabled: bool, app_env: str, admin_token: str, service: str):
+    """FastAPI router exposing /debug/profile and /debug/profile/continuous."""
+    import asyncio
+
+    from fastapi import APIRouter, Header, HTTPException, Query
+    from fastapi.responses import PlainTextResponse
+
+    router = APIRouter(include_in_schema=False)
+
+    def guard(token: Optional[str]) -> None:
+        if not enabled:
+            raise HTTPException(status_code=404, detail="Not Found")
+        error = access_error(app_env, admin_token, token)
+        if error:
+            raise HTTPException(status_code=403, detail=error)
+
+    def collapsed_response(stacks: Counter, samples: int, label: str) -> PlainTextResponse:
+        return PlainTextResponse(
+            render_collapsed(stacks),
+            headers={
+                "X-Profile-Samples": str(samples),
+                "Content-Disposition": f'inline; filename="{service}-{label}-{int(time.time())}.collapsed"',
+            },
+        )
+
+    @router.get("/debug/profile")
+    async def profile(
+        seconds: float = Query(default=10, gt=0, le=MAX_CAPTURE_SECONDS),
+        hz: float = Query(default=100, gt=0, le=MAX_HZ),
+        include_idle: bool = False,
+        x_admin_token: Optional[str] = Header(default=None, alias="X-Admin-Token"),
+    ):
+        guard(x_admin_token)
+        sampler = profiler.begin_capture(hz, include_idle)
+        if sampler is None:
+            raise HTTPException(status_code=409, detail="a profile capture is already running")
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stacks = profiler.end_capture(sampler)
+        return collapsed_response(stacks, sampler.samples, "profile")
+
+    @router.get("/debug/profile/continuous")
+    async def continuous(
+        minutes: float = Query(default=5, gt=0),
+        x_admin_token: Optional[str] = Header(default=None, alias="X-Admin-Token"),
+    ):
+        guard(x_admin_token)
+        sampler = profiler.continuous
+        if sampler is None:
+            raise HTTPException(status_code=409, detail="continuous profiling is off (PROFILER_CONTINUOUS_HZ=0)")
+        return collapsed_response(sampler.recent(minutes * 60), sampler.samples, "continuous")
+
+    return router
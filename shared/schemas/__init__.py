@@ -1,3 +1,10 @@
 from .common import Actor
 from .trade import TradeIntent, TradeRecommendationRequest, TradeRecommendationResponse
-from .audit import AuditEvent, AuditWriteRequest, AuditWriteResponse, AuditEventType
+from .audit import (
+    AuditEvent,
+    AuditWriteRequest,
+    AuditWriteResponse,
+    AuditWriteBatchRequest,
+    AuditWriteBatchResponse,
+    AuditEventType,
+)
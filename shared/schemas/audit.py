@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 class AuditEventType(str, Enum):
@@ -19,6 +19,7 @@ class AuditEvent(BaseModel):
     payload: Dict[str, Any]
     prev_hash: Optional[str] = None
     event_hash: Optional[str] = None
+    seq: Optional[int] = None
 
 class AuditWriteRequest(BaseModel):
     trace_id: str = Field(..., min_length=1)
@@ -30,3 +31,10 @@ class AuditWriteResponse(BaseModel):
     audit_id: str
     event_hash: str
     prev_hash: Optional[str] = None
+    seq: Optional[int] = None
+
+class AuditWriteBatchRequest(BaseModel):
+    events: List[AuditWriteRequest] = Field(..., min_length=1)
+
+class AuditWriteBatchResponse(BaseModel):
+    results: List[AuditWriteResponse]
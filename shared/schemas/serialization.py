@@ -0,0 +1,82 @@
+"""
+Serialize-once helpers for the request path.
+
+Models are dumped straight to JSON bytes by pydantic-core, with no
+intermediate dict. Plain dicts go through orjson when it is installed and
+through pydantic-core otherwise. Already-serialized fragments are spliced
+into their envelopes as bytes. A model dumped once for an audit payload can
+then be reused, unchanged, in the audit batch body and the HTTP response.
+
+    decision = serialize(resp, hold=("audit_id",))
+    events.add(AuditEventType.DECISION_MADE, decision.with_fields(audit_id="pending"))
+    ...
+    return Response(decision.with_fields(audit_id=audit_id), media_type="application/json")
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from pydantic import BaseModel
+from pydantic_core import to_json, to_jsonable_python
+
+try:
+    import orjson
+except ImportError:  # optional fast backend
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "pydantic-core"
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON bytes for a model or any JSON-able value (models, datetimes and enums included)."""
+    if isinstance(obj, BaseModel):
+        return obj.__pydantic_serializer__.to_json(obj)
+    if orjson is not None:
+        return orjson.dumps(obj, default=to_jsonable_python, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    return to_json(obj)
+
+
+def splice(obj_json: bytes, **fields: bytes) -> bytes:
+    """Append already-serialized values to a serialized JSON object."""
+    if not fields:
+        return obj_json
+    extra = b",".join(b'"%s":%s' % (name.encode(), value) for name, value in fields.items())
+    if obj_json == b"{}":
+        return b"{" + extra + b"}"
+    return obj_json[:-1] + b"," + extra + b"}"
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+
+@dataclass(frozen=True, slots=True)
+class Serialized:
+    """
+    A model dumped once. `body` is its JSON object without the `held` fields,
+    which are appended per use by `with_fields` (e.g. an audit_id that is only
+    known after the audit write).
+    """
+
+    model: BaseModel
+    body: bytes
+    held: tuple[str, ...] = ()
+
+    def with_fields(self, **values: Any) -> bytes:
+        missing = set(self.held) - values.keys()
+        if missing:
+            raise ValueError(f"missing held fields: {sorted(missing)}")
+        return splice(self.body, **{name: dumps(value) for name, value in values.items()})
+
+    @property
+    def json(self) -> bytes:
+        """The complete object, with held fields at their current model values."""
+        return self.with_fields(**{name: getattr(self.model, name) for name in self.held})
+
+
+def serialize(model: BaseModel, hold: Iterable[str] = ()) -> Serialized:
+    held = tuple(hold)
+    body = model.__pydantic_serializer__.to_json(model, exclude=set(held) or None)
+    return Serialized(model, body, held)
@@ -0,0 +1,350 @@
+"""
+Lightweight span recording with cross-service propagation.
+
+The current span lives in a ContextVar, so it follows asyncio tasks and
+starlette's threadpool. Outbound calls carry it in two headers: X-Trace-Id
+(the same id used as the audit key) and X-Parent-Span-Id. TracingMiddleware
+opens a server span for every inbound request and continues the caller's
+trace when those headers are present.
+
+Finished spans go to a bounded in-memory ring buffer. A background thread
+drains it in batches to the configured exporter, either an NDJSON file or
+an OTLP/HTTP JSON endpoint (e.g. bench/trace_collector.py). If the exporter
+falls behind, the oldest spans are dropped and counted; request handling
+never blocks on export.
+
+    tracing.configure("risk-mcp", export_target="/data/spans.ndjson")
+    app.add_middleware(tracing.TracingMiddleware)
+    with tracing.span("policy.evaluate", symbol="AAPL"):
+        ...
+
+Without an export target, spans are still created, so trace ids propagate,
+but they are not recorded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+log = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Trace-Id"
+PARENT_SPAN_HEADER = "X-Parent-Span-Id"
+
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+def new_trace_id() -> str:
+    return f"trace-{random.getrandbits(128):032x}"
+
+
+def new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+@dataclass(slots=True)
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    service: str
+    kind: str
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("aitdp_current_span", default=None)
+
+
+class FileExporter:
+    """Appends spans as NDJSON (one Span.to_dict() per line)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: list[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(s.to_dict(), separators=(",", ":")) + "\n" for s in spans))
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+def to_otlp(service: str, spans: list[Span]) -> dict[str, Any]:
+    """
+    OTLP/HTTP JSON body for one service's spans.
+
+    OTLP trace ids are 16 bytes, so our free-form trace id is hashed into one
+    and also kept verbatim as the `aitdp.trace_id` attribute.
+    """
+    otlp_spans = []
+    for s in spans:
+        otlp = {
+            "traceId": hashlib.sha256(s.trace_id.encode()).hexdigest()[:32],
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": _OTLP_KINDS.get(s.kind, 1),
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": _otlp_attributes({"aitdp.trace_id": s.trace_id, **s.attributes}),
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 0},
+        }
+        if s.parent_id:
+            otlp["parentSpanId"] = s.parent_id
+        otlp_spans.append(otlp)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": service})},
+            "scopeSpans": [{"scope": {"name": "aitdp"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+class OTLPHttpExporter:
+    """POSTs OTLP/HTTP JSON to a collector, e.g. http://localhost:4318/v1/traces."""
+
+    def __init__(self, url: str, service: str, timeout: float = 5.0):
+        self.url = url
+        self.service = service
+        self.timeout = timeout
+
+    def export(self, spans: list[Span]) -> None:
+        body = json.dumps(to_otlp(self.service, spans), separators=(",", ":")).encode()
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout) as r:
+            r.read()
+
+
+def exporter_for(target: str, service: str):
+    """'' -> None, http(s) URL -> OTLPHttpExporter, anything else -> FileExporter."""
+    if not target:
+        return None
+    if target.startswith(("http://", "https://")):
+        return OTLPHttpExporter(target, service)
+    return FileExporter(target)
+
+
+class Tracer:
+    def __init__(self, service: str = "unknown", exporter=None, ring_size: int = 10_000,
+                 batch_size: int = 512, export_interval_seconds: float = 1.0):
+        self.service = service
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.export_interval_seconds = export_interval_seconds
+        self._ring: deque[Span] = deque(maxlen=ring_size)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.recorded = 0
+        self.dropped = 0
+        self.exported = 0
+        self.export_failures = 0
+
+    @property
+    def recording(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str = "internal",
+        *,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        **attributes: Any,
+    ) -> Iterator[Span]:
+        """
+        Open a span as a child of the current one.
+
+        Passing `trace_id` starts from a remote parent instead (`parent_id` may be None).
+        """
+        parent = _current.get()
+        if trace_id is None and parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        s = Span(trace_id or new_trace_id(), new_span_id(), parent_id, name, self.service, kind,
+                 time.time_ns(), attributes=attributes)
+        token = _current.set(s)
+        started = time.perf_counter_ns()
+        try:
+            yield s
+        except BaseException as e:
+            s.error = type(e).__name__
+            raise
+        finally:
+            s.end_ns = s.start_ns + (time.perf_counter_ns() - started)
+            _current.reset(token)
+            if self.exporter is not None:
+                self._record(s)
+
+    def _record(self, s: Span) -> None:
+        if len(self._ring) == self._ring.maxlen:
+            self.dropped += 1
+        self._ring.append(s)
+        self.recorded += 1
+        if len(self._ring) >= self.batch_size:
+            self._wake.set()
+
+    def _drain(self) -> None:
+        while self._ring:
+            batch = []
+            while self._ring and len(batch) < self.batch_size:
+                batch.append(self._ring.popleft())
+            try:
+                self.exporter.export(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                self.export_failures += 1
+                log.warning("[TRACE EXPORT FAILED] %s", {"spans": len(batch), "error": str(e)})
+                return
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.export_interval_seconds)
+            self._wake.clear()
+            self._drain()
+
+    def start(self) -> None:
+        if self.exporter is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self._drain()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "service": self.service,
+            "recording": self.recording,
+            "buffered": len(self._ring),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "exported": self.exported,
+            "export_failures": self.export_failures,
+        }
+
+
+TRACER = Tracer()
+
+
+def configure(service: str, export_target: str = "", ring_size: int = 10_000,
+              export_interval_seconds: float = 1.0) -> Tracer:
+    """Set up the process-wide tracer; call once at import time of the app's main module."""
+    TRACER.service = service
+    TRACER.exporter = exporter_for(export_target, service)
+    TRACER._ring = deque(maxlen=ring_size)
+    TRACER.export_interval_seconds = export_interval_seconds
+    return TRACER
+
+
+def span(name: str, kind: str = "internal", **attributes: Any):
+    return TRACER.span(name, kind, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def outbound_headers() -> dict[str, str]:
+    """Headers that continue the current trace in the callee."""
+    s = _current.get()
+    if s is None:
+        return {}
+    return {TRACE_HEADER: s.trace_id, PARENT_SPAN_HEADER: s.span_id}
+
+
+def bind_trace_id(trace_id: str) -> None:
+    """
+    Adopt a business trace id (e.g. from the request body) for the current span
+    and everything opened under it, when the caller did not send X-Trace-Id.
+    """
+    s = _current.get()
+    if s is not None and s.parent_id is None:
+        s.trace_id = trace_id
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per HTTP request."""
+
+    def __init__(self, app, tracer: Tracer = TRACER, exclude_paths: tuple[str, ...] = ("/health", "/metrics")):
+        self.app = app
+        self.tracer = tracer
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-trace-id":
+                trace_id = value.decode("latin-1")
+            elif key == b"x-parent-span-id":
+                parent_id = value.decode("latin-1")
+
+        status: dict[str, int] = {}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        with self.tracer.span(
+            f"{scope['method']} {scope['path']}", "server", trace_id=trace_id, parent_id=parent_id
+        ) as s:
+            await self.app(scope, receive, send_with_status)
+            s.attributes["http.status_code"] = status.get("code")